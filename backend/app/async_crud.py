@@ -0,0 +1,54 @@
+"""
+Awaitable versions of the CRUD operations for the routers.
+Each function takes either an AsyncSession (DB_ASYNC mode) or a blocking
+Session and runs the matching function from app.crud without blocking
+the event loop, so both modes share a single set of queries.
+"""
+import functools
+
+from app import crud
+from app.database import run_db
+
+
+def _awaitable(fn):
+    """Wrap a crud function so it can be awaited with any session type."""
+    @functools.wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        return await run_db(db, fn, *args, **kwargs)
+    return wrapper
+
+
+# ========== Player CRUD ==========
+
+create_player = _awaitable(crud.create_player)
+bulk_create_players = _awaitable(crud.bulk_create_players)
+get_player = _awaitable(crud.get_player)
+get_player_by_username = _awaitable(crud.get_player_by_username)
+get_player_by_email = _awaitable(crud.get_player_by_email)
+get_players = _awaitable(crud.get_players)
+get_players_after = _awaitable(crud.get_players_after)
+get_usernames = _awaitable(crud.get_usernames)
+
+# ========== Level CRUD ==========
+
+create_level = _awaitable(crud.create_level)
+get_level = _awaitable(crud.get_level)
+get_level_by_number = _awaitable(crud.get_level_by_number)
+get_levels = _awaitable(crud.get_levels)
+
+# ========== Game CRUD ==========
+
+create_game = _awaitable(crud.create_game)
+create_games_batch = _awaitable(crud.create_games_batch)
+update_game = _awaitable(crud.update_game)
+update_games_bulk = _awaitable(crud.update_games_bulk)
+get_game = _awaitable(crud.get_game)
+get_player_games = _awaitable(crud.get_player_games)
+get_player_games_before = _awaitable(crud.get_player_games_before)
+get_leaderboard = _awaitable(crud.get_leaderboard)
+
+# ========== Game Replay CRUD ==========
+
+save_game_replay = _awaitable(crud.save_game_replay)
+get_game_replay = _awaitable(crud.get_game_replay)
+get_game_replay_chunk = _awaitable(crud.get_game_replay_chunk)
@@ -0,0 +1,307 @@
+"""
+Chunked bulk loading of games, for staging and load-test databases.
+Games come from a file (the NDJSON/CSV written by app/export.py, or any
+file with the same columns) or from a synthetic generator. Each chunk is
+one Core insert() executemany in its own transaction, and the secondary
+indexes of the games table are dropped for the load and rebuilt once at
+the end. Used by the load_games.py script.
+
+Loading bypasses the per-game rollup upkeep, so rebuild player_stats and
+leaderboard_buckets afterwards (load_games.py does).
+"""
+import csv
+import itertools
+import json
+import math
+import random
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from app import crud, models
+
+# Rows inserted per executemany/transaction
+DEFAULT_CHUNK_SIZE = 5000
+
+# Domain of the e-mail addresses given to players created by a load
+IMPORT_EMAIL_DOMAIN = "imported.invalid"
+
+_INT_COLUMNS = ("player_id", "level_number", "score", "food_eaten", "duration_seconds")
+_TIME_COLUMNS = ("created_at", "finished_at")
+
+
+# ========== Deferred indexes ==========
+
+def deferrable_indexes(engine: Engine, table) -> List:
+    """
+    Secondary indexes of `table` that can be dropped during a load: the
+    non-unique ones that exist. MySQL refuses to drop the last index on a
+    foreign key column, so there the first index on each one is kept.
+    """
+    existing = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+    foreign_keys = set()
+    if engine.dialect.name == "mysql":
+        foreign_keys = {foreign_key.parent.name for foreign_key in table.foreign_keys}
+
+    indexes = []
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if index.unique or index.name not in existing:
+            continue
+        leading = list(index.columns)[0].name
+        if leading in foreign_keys:
+            foreign_keys.discard(leading)
+            continue
+        indexes.append(index)
+    return indexes
+
+
+@contextmanager
+def deferred_indexes(engine: Engine, table) -> Iterator[List[str]]:
+    """
+    Drop the deferrable indexes of `table` for the duration of the block
+    and build them again afterwards, even if the load fails. Yields their
+    names. Should the process die in between, init_db.py recreates them.
+    """
+    indexes = deferrable_indexes(engine, table)
+    for index in indexes:
+        index.drop(bind=engine)
+    try:
+        yield [index.name for index in indexes]
+    finally:
+        for index in indexes:
+            index.create(bind=engine)
+
+
+# ========== Reading game files ==========
+
+def _utc(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp into the naive UTC datetimes the games table stores."""
+    if value in (None, ""):
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _parse_row(row: dict) -> dict:
+    """Convert one file row (strings from CSV, JSON values from NDJSON) to column values."""
+    game = {"username": row.get("username") or None, "email": row.get("email") or None}
+    for column in _INT_COLUMNS:
+        value = row.get(column)
+        game[column] = None if value in (None, "") else int(value)
+    completed = row.get("completed")
+    if isinstance(completed, str):
+        completed = completed.strip().lower() in ("1", "true", "yes")
+    game["completed"] = bool(completed)
+    for column in _TIME_COLUMNS:
+        value = row.get(column)
+        game[column] = value if isinstance(value, datetime) else _utc(value)
+    return game
+
+
+def read_games(path: str, fmt: str, stats: dict) -> Iterator[dict]:
+    """
+    Yield games from an NDJSON or CSV file ('-' for stdin), counting
+    unreadable rows in stats['invalid']. Each row needs a `username` or a
+    `player_id`, and a `level_number`; the other game columns are optional.
+    """
+    with (sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")) as handle:
+        rows = csv.DictReader(handle) if fmt == "csv" else (line for line in handle if line.strip())
+        for row in rows:
+            try:
+                game = _parse_row(row if fmt == "csv" else json.loads(row))
+            except (AttributeError, TypeError, ValueError):  # Includes malformed JSON lines
+                stats["invalid"] += 1
+                continue
+            if game["level_number"] is None or (game["username"] is None and game["player_id"] is None):
+                stats["invalid"] += 1
+                continue
+            yield game
+
+
+# ========== Loading ==========
+
+class GameLoader:
+    """
+    Insert games chunk by chunk. Levels are resolved by level_number and
+    players by username, creating the players a file refers to that do
+    not exist yet (with an e-mail under IMPORT_EMAIL_DOMAIN unless the
+    row has one). Games for an unknown level or player_id count as invalid.
+    """
+
+    def __init__(self, engine: Engine, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.stats = {"read": 0, "inserted": 0, "invalid": 0, "players_created": 0}
+        self._player_ids: Dict[str, int] = {}
+        with engine.connect() as conn:
+            self.level_ids = dict(conn.execute(select(models.Level.level_number, models.Level.id)).all())
+        if not self.level_ids:
+            raise RuntimeError("No levels found: run init_db.py first")
+
+    def load(self, games: Iterable[dict], progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """Insert all `games`, calling progress(stats) after each chunk. Returns the stats."""
+        chunk = []
+        for game in games:
+            chunk.append(game)
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk, progress)
+        if chunk:
+            self._flush(chunk, progress)
+        return self.stats
+
+    def _flush(self, chunk: List[dict], progress) -> None:
+        self.stats["read"] += len(chunk)
+        games = [game for game in chunk if game["level_number"] in self.level_ids]
+        with self.engine.begin() as conn:
+            games = self._known_player_ids(conn, games)
+            self.stats["invalid"] += len(chunk) - len(games)
+            self._resolve_players(conn, games)
+            rows = [
+                {
+                    "player_id": game["player_id"] if game["username"] is None else self._player_ids[game["username"]],
+                    "level_id": self.level_ids[game["level_number"]],
+                    "score": game["score"] or 0,
+                    "food_eaten": game["food_eaten"] or 0,
+                    "duration_seconds": game["duration_seconds"] or 0,
+                    "completed": game["completed"],
+                    "created_at": game["created_at"] or crud._utcnow().replace(microsecond=0),
+                    "finished_at": game["finished_at"],
+                }
+                for game in games
+            ]
+            if rows:
+                conn.execute(insert(models.Game.__table__), rows)
+        self.stats["inserted"] += len(rows)
+        chunk.clear()
+        if progress is not None:
+            progress(self.stats)
+
+    @staticmethod
+    def _known_player_ids(conn: Connection, chunk: List[dict]) -> List[dict]:
+        """The games of this chunk minus those whose player_id has no player (one query)."""
+        ids = {game["player_id"] for game in chunk if game["username"] is None}
+        if not ids:
+            return chunk
+        players = models.Player.__table__
+        known = set(conn.execute(select(players.c.id).where(players.c.id.in_(ids))).scalars())
+        return [game for game in chunk if game["username"] is not None or game["player_id"] in known]
+
+    def _resolve_players(self, conn: Connection, chunk: List[dict]) -> None:
+        """Fill the username -> id cache for this chunk, creating missing players."""
+        missing = {game["username"]: game["email"] for game in chunk
+                   if game["username"] is not None and game["username"] not in self._player_ids}
+        if not missing:
+            return
+        players = models.Player.__table__
+        names = list(missing)
+        found = dict(conn.execute(select(players.c.username, players.c.id).where(players.c.username.in_(names))).all())
+        new = [
+            {"username": name, "email": missing[name] or f"{name}@{IMPORT_EMAIL_DOMAIN}"}
+            for name in names if name not in found
+        ]
+        if new:
+            conn.execute(insert(players), new)
+            self.stats["players_created"] += len(new)
+            found.update(conn.execute(
+                select(players.c.username, players.c.id).where(players.c.username.in_([row["username"] for row in new]))
+            ).all())
+        self._player_ids.update(found)
+
+
+# ========== Synthetic data ==========
+
+def create_synthetic_players(engine: Engine, count: int, prefix: str = "synth_",
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+    """
+    Make sure players {prefix}0000001 .. {prefix}{count} exist, inserting
+    the missing ones in chunks, and return their ids. Rerunning with the
+    same prefix reuses them.
+    """
+    players = models.Player.__table__
+    statement = (
+        insert(players)
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .prefix_with("IGNORE", dialect="mysql")
+    )
+    names = [f"{prefix}{number:07d}" for number in range(1, count + 1)]
+    for start in range(0, count, chunk_size):
+        with engine.begin() as conn:
+            conn.execute(statement, [
+                {"username": name, "email": f"{name}@{IMPORT_EMAIL_DOMAIN}"}
+                for name in names[start:start + chunk_size]
+            ])
+
+    ids = []
+    with engine.connect() as conn:
+        for start in range(0, count, chunk_size):
+            ids.extend(conn.execute(
+                select(players.c.id).where(players.c.username.in_(names[start:start + chunk_size]))
+            ).scalars())
+    return ids
+
+
+# Share of games played at each hour of the day (UTC), peaking in the evening
+_HOUR_WEIGHTS = [2, 1, 1, 1, 1, 1, 2, 3, 4, 4, 4, 5, 6, 5, 5, 5, 6, 7, 9, 10, 10, 9, 6, 4]
+_HOUR_CUM_WEIGHTS = list(itertools.accumulate(_HOUR_WEIGHTS))
+
+
+def synthetic_games(player_ids: List[int], count: int, levels: int = 10, days: int = 90,
+                    seed: Optional[int] = None, now: Optional[datetime] = None) -> Iterator[dict]:
+    """
+    Yield `count` games for these players with plausible distributions:
+    - activity per player is log-normal, so a few players play most games;
+    - more active players reach higher levels, and most games are played
+      on the lower levels a player has reached;
+    - food eaten is exponential with a mean that falls with the level, the
+      score is 10 per food (as in the frontend), and durations follow;
+    - start times spread over the last `days` days, busier in the evening;
+    - about 5% of games are abandoned before any result (unfinished), and
+      completions are rare and rarer on higher levels.
+    """
+    rng = random.Random(seed)
+    now = (now or crud._utcnow()).replace(microsecond=0)
+    activity = [rng.lognormvariate(0, 1.2) for _ in player_ids]
+    highest = max(activity)
+    reach = [1 + min(levels - 1, int(levels * math.log1p(weight) / math.log1p(highest))) for weight in activity]
+    cumulative = list(itertools.accumulate(activity))
+    indexes = range(len(player_ids))
+    hours = range(24)
+
+    for _ in range(count):
+        player = rng.choices(indexes, cum_weights=cumulative)[0]
+        level_number = 1 + int(reach[player] * rng.random() ** 1.5)
+        day = now - timedelta(days=rng.randrange(days))
+        created_at = day.replace(
+            hour=rng.choices(hours, cum_weights=_HOUR_CUM_WEIGHTS)[0], minute=rng.randrange(60), second=rng.randrange(60)
+        )
+        if created_at > now:
+            created_at -= timedelta(days=1)
+
+        game = {
+            "username": None, "email": None, "player_id": player_ids[player], "level_number": level_number,
+            "score": 0, "food_eaten": 0, "duration_seconds": 0, "completed": False,
+            "created_at": created_at, "finished_at": None,
+        }
+        if rng.random() >= 0.05:
+            food = int(rng.expovariate((1 + 0.15 * (level_number - 1)) / 12))
+            duration = max(1, int(food * rng.uniform(2, 5) + rng.expovariate(1 / 8)))
+            game.update(
+                score=10 * food,
+                food_eaten=food,
+                duration_seconds=duration,
+                completed=rng.random() < 0.02 * (levels + 1 - level_number) / levels,
+                finished_at=created_at + timedelta(seconds=duration),
+            )
+        yield game
+
+
+def count_games(engine: Engine) -> int:
+    """Number of rows in the games table."""
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(models.Game.__table__)).scalar()
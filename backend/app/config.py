@@ -4,6 +4,7 @@ Uses pydantic-settings for environment variable management.
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import List, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -16,6 +17,36 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
     
+    # Full SQLAlchemy URL; overrides the DB_* settings above when set
+    # (e.g. sqlite:///./snake.db for local runs and benchmarks)
+    DATABASE_URL: Optional[str] = None
+    
+    # Use AsyncEngine/AsyncSession (aiomysql/aiosqlite) in the routers
+    # instead of the blocking Session run in the threadpool
+    DB_ASYNC: bool = False
+    
+    # Connection pool of each engine. Every uvicorn worker opens up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections; GET /health/pool reports
+    # occupancy and checkout wait times to size them by.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 3600  # Replace connections older than this (seconds)
+    # Reuse the most recently returned connection first, so surplus ones
+    # stay idle long enough to be closed
+    DB_POOL_USE_LIFO: bool = False
+    # Test connections on checkout: "always" (one round trip per checkout),
+    # "idle" (only after DB_POOL_PRE_PING_IDLE_S seconds unused) or "never"
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "always"
+    DB_POOL_PRE_PING_IDLE_S: float = 30
+    
+    # Read replicas (comma-separated SQLAlchemy URLs, same driver as the
+    # primary). Read-only endpoints use them round-robin; writes always go
+    # to the primary. A client reads from the primary for
+    # READ_YOUR_WRITES_S seconds after its own writes.
+    DB_REPLICA_URLS: str = ""
+    READ_YOUR_WRITES_S: float = 5
+    
     # Application settings
     APP_NAME: str
     APP_VERSION: str
@@ -24,6 +55,70 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str
     
+    # Write-behind for PUT /games/{id}: results are buffered in memory and
+    # written in bulk every WRITE_BEHIND_FLUSH_MS or WRITE_BEHIND_MAX_ITEMS
+    # updates, whichever comes first. Lower latency and fewer commits, at
+    # the cost of losing up to one flush window of results on a crash.
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_FLUSH_MS: int = 200
+    WRITE_BEHIND_MAX_ITEMS: int = 500
+    
+    # Windowed leaderboards: day and week buckets older than this many
+    # days/weeks are pruned every LEADERBOARD_PRUNE_INTERVAL_S seconds
+    # (0 disables the background pruning)
+    LEADERBOARD_KEEP_DAYS: int = 7
+    LEADERBOARD_KEEP_WEEKS: int = 4
+    LEADERBOARD_PRUNE_INTERVAL_S: int = 3600
+    
+    # The rank index behind GET /players/{id}/rank follows this worker's
+    # commits as they happen; it is also reloaded from player_stats every
+    # RANK_INDEX_REFRESH_S seconds to pick up other workers' (0 = never)
+    RANK_INDEX_REFRESH_S: int = 60
+    
+    # /ws/leaderboard: subscribers get the top LEADERBOARD_WS_TOP_N on
+    # connect, then diffs. Changes are coalesced over
+    # LEADERBOARD_WS_MIN_INTERVAL_MS; a client more than LEADERBOARD_WS_QUEUE
+    # messages behind is resynced with one snapshot. Other workers' commits
+    # are picked up every LEADERBOARD_WS_POLL_S seconds (0 = never)
+    LEADERBOARD_WS_TOP_N: int = 10
+    LEADERBOARD_WS_MIN_INTERVAL_MS: int = 250
+    LEADERBOARD_WS_QUEUE: int = 16
+    LEADERBOARD_WS_POLL_S: int = 30
+    
+    # Shared-memory leaderboard for several workers on one host: the top
+    # LEADERBOARD_SHM_SIZE of the all-time board are kept in the shared
+    # memory segment LEADERBOARD_SHM_NAME, refreshed every
+    # LEADERBOARD_SHM_REFRESH_S seconds by a single process (whichever
+    # worker holds its lock file, or leaderboard_refresher.py as a sidecar).
+    # A snapshot older than LEADERBOARD_SHM_MAX_AGE_S is ignored.
+    LEADERBOARD_SHM_ENABLED: bool = False
+    LEADERBOARD_SHM_NAME: str = "snake_leaderboard"
+    LEADERBOARD_SHM_SIZE: int = 100
+    LEADERBOARD_SHM_REFRESH_S: float = 1.0
+    LEADERBOARD_SHM_MAX_AGE_S: float = 10.0
+    
+    # HTTP caching of the read endpoints (ETag + If-None-Match -> 304).
+    # Cache-Control sent by each router; leaderboard ETags also roll over
+    # every LEADERBOARD_ETAG_WINDOW_S seconds (0 = only on local changes)
+    CACHE_CONTROL_LEVELS: str = "public, max-age=300"
+    CACHE_CONTROL_LEADERBOARD: str = "public, max-age=5"
+    LEADERBOARD_ETAG_WINDOW_S: int = 30
+    
+    # Largest replay body accepted by PUT /games/{id}/replay, in bytes
+    REPLAY_MAX_BYTES: int = 256 * 1024
+    # Longest replay it re-simulates, in ticks (about 2 hours at the
+    # fastest level; the engine plays well over 100k ticks per second)
+    REPLAY_MAX_TICKS: int = 100_000
+    
+    # List endpoints copy rows straight into JSON bytes instead of
+    # re-validating them through FastAPI's response_model path
+    # (same response bodies, much less CPU per item; see app/fast_json.py)
+    FAST_JSON: bool = False
+    
+    # Per-route latency, SQL statement and pool metrics on /metrics
+    # (Prometheus text format)
+    METRICS_ENABLED: bool = True
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -33,10 +128,30 @@ class Settings(BaseSettings):
     @property
     def database_url(self) -> str:
         """Build MySQL database URL."""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return (
             f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}"
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
         )
+    
+    @property
+    def replica_urls(self) -> List[str]:
+        """Read replica URLs from DB_REPLICA_URLS."""
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+    
+    @property
+    def async_database_url(self) -> str:
+        """Same database as database_url, through an asyncio driver."""
+        return to_async_url(self.database_url)
+
+
+def to_async_url(url: str) -> str:
+    """Swap the blocking DBAPI driver in a URL for its asyncio counterpart."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    drivers = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+    return f"{drivers.get(dialect, scheme)}{sep}{rest}"
 
 
 @lru_cache
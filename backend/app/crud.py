@@ -2,26 +2,91 @@
 CRUD operations (Create, Read, Update, Delete) for database models.
 These functions handle all database interactions.
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, bindparam, case, delete, desc, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 from app import models, schemas
+from app.http_cache import mark_changed
+from app.level_cache import level_cache
+from app.rank_index import record_reload, record_score_delta
+from app.replay import ReplayHeader
+
+# bucket_start of the all-time ("all") leaderboard buckets
+BUCKET_EPOCH = date(1970, 1, 1)
+LEADERBOARD_WINDOWS = ("day", "week", "all")
+
+# (period, bucket_start, level_number, player_id) -> (score_delta, games_delta, level_number)
+BucketDeltas = Dict[Tuple[str, date, int, int], Tuple[int, int, int]]
+
+
+def _utcnow() -> datetime:
+    """Current UTC time, naive like the DATETIME values read back from the database."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _insert_row(db: Session, model, values: dict):
+    """
+    INSERT a single row without committing.
+    Uses INSERT ... RETURNING where the dialect supports it, so generated
+    IDs and server defaults come back without another SELECT; the object
+    returned is then detached. Otherwise it is flushed into the session
+    and must be refreshed after the commit.
+    """
+    table = model.__table__
+    if db.get_bind().dialect.insert_returning:
+        row = db.execute(insert(table).values(**values).returning(*table.c)).one()
+        return model(**row._mapping)
+    db_object = model(**values)
+    db.add(db_object)
+    db.flush()
+    return db_object
 
 
 # ========== Player CRUD ==========
 
 def create_player(db: Session, player: schemas.PlayerCreate) -> models.Player:
-    """Create a new player in the database."""
-    db_player = models.Player(
-        username=player.username,
-        email=player.email
-    )
-    db.add(db_player)
-    db.commit()
-    db.refresh(db_player)  # Get the player with the generated ID
+    """
+    Create a new player with a single INSERT.
+    The unique indexes on username and email reject duplicates: an
+    IntegrityError is raised (after rolling back) instead of pre-checking.
+    """
+    try:
+        db_player = _insert_row(db, models.Player, {
+            'username': player.username,
+            'email': player.email
+        })
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    
+    if db_player in db:
+        db.refresh(db_player)  # No RETURNING: get the generated ID
     return db_player
 
 
+def bulk_create_players(db: Session, players: List[dict], chunk_size: int = 1000) -> int:
+    """
+    Insert many players ({'username', 'email'} dicts) with one executemany
+    per chunk, committing each chunk. Rows whose username or email is
+    already taken are skipped by the unique indexes (INSERT IGNORE).
+    Returns the number of players inserted.
+    """
+    statement = (
+        insert(models.Player.__table__)
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .prefix_with("IGNORE", dialect="mysql")
+    )
+    inserted = 0
+    for start in range(0, len(players), chunk_size):
+        result = db.execute(statement, players[start:start + chunk_size])
+        inserted += result.rowcount
+        db.commit()
+    return inserted
+
+
 def get_player(db: Session, player_id: int) -> Optional[models.Player]:
     """Get a player by ID."""
     return db.query(models.Player).filter(models.Player.id == player_id).first()
@@ -42,6 +107,26 @@ def get_players(db: Session, skip: int = 0, limit: int = 100) -> List[models.Pla
     return db.query(models.Player).offset(skip).limit(limit).all()
 
 
+def get_players_after(db: Session, after_id: Optional[int] = None, limit: int = 100) -> List[models.Player]:
+    """
+    Get players ordered by ID, starting after a keyset cursor.
+    Each page is an index range scan, however deep it is.
+    """
+    query = db.query(models.Player)
+    if after_id is not None:
+        query = query.filter(models.Player.id > after_id)
+    return query.order_by(models.Player.id).limit(limit).all()
+
+
+def get_usernames(db: Session, player_ids: List[int]) -> Dict[int, str]:
+    """Map player IDs to usernames with one primary-key IN query."""
+    if not player_ids:
+        return {}
+    return dict(db.execute(
+        select(models.Player.id, models.Player.username).where(models.Player.id.in_(player_ids))
+    ).all())
+
+
 # ========== Level CRUD ==========
 
 def create_level(db: Session, level: schemas.LevelCreate) -> models.Level:
@@ -56,9 +141,21 @@ def create_level(db: Session, level: schemas.LevelCreate) -> models.Level:
     db.add(db_level)
     db.commit()
     db.refresh(db_level)
+    level_cache.invalidate()
     return db_level
 
 
+def bulk_create_levels(db: Session, levels: List[dict]) -> int:
+    """
+    Insert many levels (LevelCreate fields as dicts) with one executemany
+    and one commit. Returns the number of levels inserted.
+    """
+    db.execute(insert(models.Level.__table__), levels)
+    db.commit()
+    level_cache.invalidate()
+    return len(levels)
+
+
 def get_level(db: Session, level_id: int) -> Optional[models.Level]:
     """Get a level by ID."""
     return db.query(models.Level).filter(models.Level.id == level_id).first()
@@ -77,21 +174,50 @@ def get_levels(db: Session) -> List[models.Level]:
 # ========== Game CRUD ==========
 
 def create_game(db: Session, game: schemas.GameCreate) -> models.Game:
-    """Create a new game session."""
-    db_game = models.Game(
-        player_id=game.player_id,
-        level_id=game.level_id
-    )
-    db.add(db_game)
-    db.commit()
-    db.refresh(db_game)
+    """
+    Create a new game session with a single INSERT.
+    The foreign keys validate player_id and level_id: an unknown one
+    raises IntegrityError (after rolling back) instead of being pre-checked.
+    """
+    try:
+        db_game = _insert_row(db, models.Game, {
+            'player_id': game.player_id,
+            'level_id': game.level_id
+        })
+        _bump_player_stats(db, game.player_id, games_delta=1, level_id=game.level_id)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    
+    if db_game in db:
+        db.refresh(db_game)  # No RETURNING: fetch created_at
     return db_game
 
 
 def update_game(db: Session, game_id: int, game_update: schemas.GameUpdate) -> Optional[models.Game]:
-    """Update game results after playing."""
-    db_game = db.query(models.Game).filter(models.Game.id == game_id).first()
+    """
+    Update game results after playing.
+    The first result marks the game finished and credits the windowed
+    leaderboard buckets; later corrections adjust the same buckets.
+    """
+    row = (
+        db.query(models.Game, models.Level.level_number)
+        .join(models.Level, models.Game.level_id == models.Level.id)
+        .filter(models.Game.id == game_id)
+        .first()
+    )
+    db_game = row[0] if row else None
     if db_game:
+        score_delta = game_update.score - (db_game.score or 0)
+        if score_delta:
+            _bump_player_stats(db, db_game.player_id, score_delta=score_delta)
+        bucket_deltas: BucketDeltas = {}
+        db_game.finished_at = _credit_finished_game(
+            bucket_deltas, db_game.player_id, row.level_number,
+            db_game.finished_at, db_game.score, game_update.score
+        )
+        _apply_bucket_deltas(db, bucket_deltas)
         db_game.score = game_update.score
         db_game.food_eaten = game_update.food_eaten
         db_game.duration_seconds = game_update.duration_seconds
@@ -101,15 +227,138 @@ def update_game(db: Session, game_id: int, game_update: schemas.GameUpdate) -> O
     return db_game
 
 
+def update_games_bulk(db: Session, updates: Dict[int, schemas.GameUpdate]) -> int:
+    """
+    Apply many game results at once (the write-behind flush).
+    One SELECT for the current scores, one executemany UPDATE, then the
+    player_stats and leaderboard bucket deltas, all in a single transaction.
+    Returns the number of games updated; unknown game IDs are skipped.
+    """
+    current = db.execute(
+        select(
+            models.Game.id, models.Game.player_id, models.Level.level_number,
+            models.Game.score, models.Game.finished_at
+        )
+        .join(models.Level, models.Game.level_id == models.Level.id)
+        .where(models.Game.id.in_(updates))
+    ).all()
+    if not current:
+        return 0
+    
+    deltas: Dict[int, Tuple[int, int, int]] = {}
+    bucket_deltas: BucketDeltas = {}
+    now = _utcnow()
+    rows = []
+    for game_id, player_id, level_number, old_score, finished_at in current:
+        game_update = updates[game_id]
+        score_delta = game_update.score - (old_score or 0)
+        if score_delta:
+            total, _, _ = deltas.get(player_id, (0, 0, 0))
+            deltas[player_id] = (total + score_delta, 0, 0)
+        rows.append({
+            'id': game_id,
+            'score': game_update.score,
+            'food_eaten': game_update.food_eaten,
+            'duration_seconds': game_update.duration_seconds,
+            'completed': game_update.completed,
+            'finished_at': _credit_finished_game(
+                bucket_deltas, player_id, level_number, finished_at, old_score, game_update.score, now
+            ),
+        })
+    
+    # ORM bulk UPDATE by primary key: a single executemany
+    db.execute(update(models.Game), rows)
+    _apply_player_stats_deltas(db, deltas)
+    _apply_bucket_deltas(db, bucket_deltas)
+    db.commit()
+    return len(rows)
+
+
+def create_games_batch(
+    db: Session,
+    games: List[schemas.GameBatchItem],
+    chunk_size: int = 500
+) -> List[dict]:
+    """
+    Insert many finished games at once.
+    Player IDs are validated with one IN query and level IDs against the
+    level cache; valid rows go in with one executemany per chunk, each
+    chunk in its own transaction together with its player_stats and
+    leaderboard bucket deltas.
+    Returns one status dictionary per submitted game, in order.
+    """
+    player_ids = {game.player_id for game in games}
+    known_players = set(db.scalars(
+        select(models.Player.id).where(models.Player.id.in_(player_ids))
+    ))
+    
+    results = []
+    valid = []
+    for index, game in enumerate(games):
+        level = level_cache.get_level(game.level_id)
+        if game.player_id not in known_players:
+            results.append({'index': index, 'status': 'rejected', 'detail': 'Player not found'})
+        elif level is None:
+            results.append({'index': index, 'status': 'rejected', 'detail': 'Level not found'})
+        else:
+            results.append({'index': index, 'status': 'created'})
+            valid.append((index, game, level.level_number))
+    
+    returning = db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order
+    now = _utcnow()
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        rows = [
+            {
+                'player_id': game.player_id,
+                'level_id': game.level_id,
+                'score': game.score,
+                'food_eaten': game.food_eaten,
+                'duration_seconds': game.duration_seconds,
+                'completed': game.completed,
+                'finished_at': now,
+            }
+            for _, game, _ in chunk
+        ]
+        
+        deltas: Dict[int, Tuple[int, int, int]] = {}
+        bucket_deltas: BucketDeltas = {}
+        for _, game, level_number in chunk:
+            score, played, highest = deltas.get(game.player_id, (0, 0, 0))
+            deltas[game.player_id] = (score + game.score, played + 1, max(highest, level_number))
+            _add_bucket_deltas(bucket_deltas, game.player_id, level_number, now, game.score, 1)
+        
+        if returning:
+            ids = db.scalars(
+                insert(models.Game).returning(models.Game.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            for (index, _, _), game_id in zip(chunk, ids):
+                results[index]['id'] = game_id
+        else:
+            db.execute(insert(models.Game), rows)
+        _apply_player_stats_deltas(db, deltas)
+        _apply_bucket_deltas(db, bucket_deltas)
+        db.commit()
+    
+    return results
+
+
 def get_game(db: Session, game_id: int) -> Optional[models.Game]:
-    """Get a game by ID."""
-    return db.query(models.Game).filter(models.Game.id == game_id).first()
+    """Get a game by ID, with its player and level loaded."""
+    return (
+        db.query(models.Game)
+        .options(joinedload(models.Game.player), joinedload(models.Game.level))
+        .filter(models.Game.id == game_id)
+        .first()
+    )
 
 
 def get_player_games(db: Session, player_id: int, skip: int = 0, limit: int = 50) -> List[models.Game]:
-    """Get all games for a specific player."""
+    """Get all games for a specific player, with player and level loaded."""
     return (
         db.query(models.Game)
+        .options(joinedload(models.Game.player), joinedload(models.Game.level))
         .filter(models.Game.player_id == player_id)
         .order_by(desc(models.Game.created_at))
         .offset(skip)
@@ -118,22 +367,111 @@ def get_player_games(db: Session, player_id: int, skip: int = 0, limit: int = 50
     )
 
 
-def get_leaderboard(db: Session, limit: int = 10) -> List[dict]:
+def get_player_games_before(
+    db: Session,
+    player_id: int,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: int = 50
+) -> List[models.Game]:
+    """
+    Get a player's games newest first, starting after a keyset cursor.
+    `before` is the (created_at, id) of the last game already returned.
+    """
+    query = (
+        db.query(models.Game)
+        .options(joinedload(models.Game.player), joinedload(models.Game.level))
+        .filter(models.Game.player_id == player_id)
+    )
+    if before is not None:
+        created_at, game_id = before
+        query = query.filter(or_(
+            models.Game.created_at < created_at,
+            and_(models.Game.created_at == created_at, models.Game.id < game_id)
+        ))
+    return (
+        query
+        .order_by(desc(models.Game.created_at), desc(models.Game.id))
+        .limit(limit)
+        .all()
+    )
+
+
+def game_export_query(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    level_number: Optional[int] = None
+):
+    """
+    Flat rows of every game joined with its player and level, in ID order,
+    for streaming exports. `start` is inclusive and `end` exclusive (on
+    created_at). Columns: see app/export.py EXPORT_COLUMNS.
+    """
+    query = (
+        select(
+            models.Game.id.label('game_id'),
+            models.Game.player_id,
+            models.Player.username,
+            models.Level.level_number,
+            models.Level.name.label('level_name'),
+            models.Game.score,
+            models.Game.food_eaten,
+            models.Game.duration_seconds,
+            models.Game.completed,
+            models.Game.created_at,
+            models.Game.finished_at
+        )
+        .join(models.Player, models.Player.id == models.Game.player_id)
+        .join(models.Level, models.Level.id == models.Game.level_id)
+        .order_by(models.Game.id)
+    )
+    if start is not None:
+        query = query.where(models.Game.created_at >= start)
+    if end is not None:
+        query = query.where(models.Game.created_at < end)
+    if level_number is not None:
+        query = query.where(models.Level.level_number == level_number)
+    return query
+
+
+def get_top_player_stats(db: Session, limit: int) -> List[Tuple[int, int, int, int]]:
+    """
+    The all-time leaderboard without usernames: (player_id, total_score,
+    games_played, highest_level) in rank order, from the player_stats
+    rollup (for the shared-memory leaderboard).
+    """
+    stats = models.PlayerStats
+    return [tuple(row) for row in db.execute(
+        select(stats.player_id, stats.total_score, stats.games_played, stats.highest_level)
+        .order_by(desc(stats.total_score), stats.player_id)
+        .limit(limit)
+    )]
+
+
+def get_leaderboard(
+    db: Session,
+    limit: int = 10,
+    window: str = "all",
+    level_number: Optional[int] = None
+) -> List[dict]:
     """
     Get top players by total score.
+    Reads the player_stats rollup, or for a day/week window or a single
+    level the leaderboard_buckets rollup, so the cost does not grow with
+    the games table.
     Returns a list of dictionaries with player stats.
     """
+    if window != "all" or level_number is not None:
+        return _get_bucket_leaderboard(db, limit, window, level_number)
+    
     results = (
         db.query(
             models.Player.username,
-            func.sum(models.Game.score).label('total_score'),
-            func.count(models.Game.id).label('games_played'),
-            func.max(models.Level.level_number).label('highest_level')
+            models.PlayerStats.total_score,
+            models.PlayerStats.games_played,
+            models.PlayerStats.highest_level
         )
-        .join(models.Game, models.Player.id == models.Game.player_id)
-        .join(models.Level, models.Game.level_id == models.Level.id)
-        .group_by(models.Player.id)
-        .order_by(desc('total_score'))
+        .join(models.Player, models.Player.id == models.PlayerStats.player_id)
+        .order_by(desc(models.PlayerStats.total_score), models.PlayerStats.player_id)
         .limit(limit)
         .all()
     )
@@ -149,3 +487,382 @@ def get_leaderboard(db: Session, limit: int = 10) -> List[dict]:
         })
     
     return leaderboard
+
+
+# ========== Game Replay CRUD ==========
+
+def save_game_replay(db: Session, game_id: int, header: ReplayHeader, data: bytes) -> models.GameReplay:
+    """Store (or replace) the replay of a game."""
+    db_replay = db.merge(models.GameReplay(
+        game_id=game_id,
+        seed=header.seed,
+        cols=header.cols,
+        rows=header.rows,
+        ticks=header.ticks,
+        move_count=header.move_count,
+        size=len(data),
+        data=data
+    ))
+    db.commit()
+    return db_replay
+
+
+def get_game_replay(db: Session, game_id: int) -> Optional[models.GameReplay]:
+    """Get a game's replay metadata; the blob itself is not loaded."""
+    return db.get(models.GameReplay, game_id)
+
+
+def get_game_replay_chunk(db: Session, game_id: int, offset: int, size: int) -> bytes:
+    """Read `size` bytes of a replay blob starting at `offset`, in the database."""
+    chunk = db.execute(
+        select(func.substr(models.GameReplay.data, offset + 1, size))
+        .where(models.GameReplay.game_id == game_id)
+    ).scalar()
+    return bytes(chunk or b"")
+
+
+def _get_bucket_leaderboard(db: Session, limit: int, window: str, level_number: Optional[int]) -> List[dict]:
+    """Top players of the current day/week/all-time bucket, overall or for one level."""
+    buckets = models.LeaderboardBucket
+    results = (
+        db.query(
+            models.Player.username,
+            buckets.total_score,
+            buckets.games_played,
+            buckets.highest_level
+        )
+        .join(models.Player, models.Player.id == buckets.player_id)
+        .filter(
+            buckets.period == window,
+            buckets.bucket_start == bucket_start(window, _utcnow()),
+            buckets.level_number == (level_number or 0)
+        )
+        .order_by(desc(buckets.total_score), buckets.player_id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            'rank': rank,
+            'username': row.username,
+            'total_score': row.total_score,
+            'games_played': row.games_played,
+            'highest_level': row.highest_level
+        }
+        for rank, row in enumerate(results, start=1)
+    ]
+
+
+# ========== Leaderboard Buckets (windowed rollups) ==========
+
+def bucket_start(period: str, moment: datetime) -> date:
+    """First day of the bucket of `period` that contains `moment` (UTC)."""
+    if period == "day":
+        return moment.date()
+    if period == "week":
+        return moment.date() - timedelta(days=moment.weekday())
+    return BUCKET_EPOCH
+
+
+def _add_bucket_deltas(
+    deltas: BucketDeltas,
+    player_id: int,
+    level_number: int,
+    finished_at: datetime,
+    score_delta: int,
+    games_delta: int
+) -> None:
+    """Accumulate a finished game's contribution to every bucket it belongs to."""
+    keys = [
+        ("day", bucket_start("day", finished_at), 0),
+        ("day", bucket_start("day", finished_at), level_number),
+        ("week", bucket_start("week", finished_at), 0),
+        ("week", bucket_start("week", finished_at), level_number),
+        ("all", BUCKET_EPOCH, level_number),
+    ]
+    for period, start, level in keys:
+        key = (period, start, level, player_id)
+        score, games, highest = deltas.get(key, (0, 0, 0))
+        deltas[key] = (score + score_delta, games + games_delta, max(highest, level_number))
+
+
+def _credit_finished_game(
+    deltas: BucketDeltas,
+    player_id: int,
+    level_number: int,
+    finished_at: Optional[datetime],
+    old_score: Optional[int],
+    new_score: int,
+    now: Optional[datetime] = None
+) -> datetime:
+    """
+    Record a game result in the bucket deltas and return the game's finished_at.
+    The first result finishes the game now and counts it with its full
+    score; later results only move the score, in the original buckets.
+    """
+    if finished_at is None:
+        finished_at = now or _utcnow()
+        _add_bucket_deltas(deltas, player_id, level_number, finished_at, new_score, 1)
+    elif new_score != (old_score or 0):
+        _add_bucket_deltas(deltas, player_id, level_number, finished_at, new_score - (old_score or 0), 0)
+    return finished_at
+
+
+def _apply_bucket_deltas(db: Session, deltas: BucketDeltas) -> None:
+    """
+    Apply leaderboard bucket increments inside the caller's transaction.
+    Same two statements as _apply_player_stats_deltas: create missing rows,
+    then one executemany UPDATE.
+    """
+    if not deltas:
+        return
+    buckets = models.LeaderboardBucket.__table__
+    mark_changed(db, "leaderboard")
+    
+    db.execute(
+        insert(buckets)
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .prefix_with("IGNORE", dialect="mysql"),
+        [
+            {
+                'period': period, 'bucket_start': start, 'level_number': level, 'player_id': player_id,
+                'total_score': 0, 'games_played': 0, 'highest_level': 0
+            }
+            for period, start, level, player_id in deltas
+        ]
+    )
+    db.execute(
+        update(buckets)
+        .where(
+            buckets.c.period == bindparam('b_period'),
+            buckets.c.bucket_start == bindparam('b_start'),
+            buckets.c.level_number == bindparam('b_level_number'),
+            buckets.c.player_id == bindparam('b_player_id')
+        )
+        .values(
+            total_score=buckets.c.total_score + bindparam('b_score'),
+            games_played=buckets.c.games_played + bindparam('b_games'),
+            highest_level=case(
+                (buckets.c.highest_level < bindparam('b_level'), bindparam('b_level')),
+                else_=buckets.c.highest_level
+            )
+        ),
+        [
+            {
+                'b_period': period, 'b_start': start, 'b_level_number': level, 'b_player_id': player_id,
+                'b_score': score, 'b_games': games, 'b_level': highest
+            }
+            for (period, start, level, player_id), (score, games, highest) in deltas.items()
+        ]
+    )
+
+
+def prune_leaderboard_buckets(db: Session, keep_days: int, keep_weeks: int, now: Optional[datetime] = None) -> int:
+    """
+    Delete day buckets older than `keep_days` days and week buckets older
+    than `keep_weeks` weeks (the current bucket counts as one).
+    Returns the number of rows deleted.
+    """
+    now = now or _utcnow()
+    buckets = models.LeaderboardBucket
+    deleted = 0
+    for period, oldest in (
+        ("day", bucket_start("day", now) - timedelta(days=keep_days - 1)),
+        ("week", bucket_start("week", now) - timedelta(weeks=keep_weeks - 1)),
+    ):
+        deleted += db.execute(
+            delete(buckets)
+            .where(buckets.period == period, buckets.bucket_start < oldest)
+        ).rowcount
+    db.commit()
+    return deleted
+
+
+def rebuild_leaderboard_buckets(db: Session, batch_size: int = 10000) -> int:
+    """
+    Recompute leaderboard_buckets from the finished games.
+    Streams the games in batches and applies the deltas in one transaction.
+    Returns the number of bucket rows written.
+    """
+    deltas: BucketDeltas = {}
+    rows = db.execute(
+        select(models.Game.player_id, models.Level.level_number, models.Game.score, models.Game.finished_at)
+        .join(models.Level, models.Game.level_id == models.Level.id)
+        .where(models.Game.finished_at.is_not(None))
+        .execution_options(yield_per=batch_size)
+    )
+    for player_id, level_number, score, finished_at in rows:
+        _add_bucket_deltas(deltas, player_id, level_number, finished_at, score or 0, 1)
+    
+    db.execute(delete(models.LeaderboardBucket))
+    mark_changed(db, "leaderboard")
+    _apply_bucket_deltas(db, deltas)
+    db.commit()
+    return len(deltas)
+
+
+# ========== Player Stats (leaderboard rollup) ==========
+
+def _bump_player_stats(
+    db: Session,
+    player_id: int,
+    score_delta: int = 0,
+    games_delta: int = 0,
+    level_id: Optional[int] = None
+) -> None:
+    """
+    Apply an increment to a player's rollup row inside the caller's transaction.
+    The row is created on the player's first game. The rank index follows
+    once the transaction commits.
+    """
+    stats = models.PlayerStats
+    level_number = None
+    if level_id is not None:
+        level_number = (
+            select(models.Level.level_number)
+            .where(models.Level.id == level_id)
+            .scalar_subquery()
+        )
+    
+    values = {
+        'total_score': stats.total_score + score_delta,
+        'games_played': stats.games_played + games_delta,
+    }
+    if level_number is not None:
+        values['highest_level'] = case(
+            (stats.highest_level < level_number, level_number),
+            else_=stats.highest_level
+        )
+    record_score_delta(db, player_id, score_delta)
+    mark_changed(db, "leaderboard")
+    
+    result = db.execute(
+        update(stats)
+        .where(stats.player_id == player_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return
+    
+    # First game for this player: create the row. A concurrent request may
+    # have created it in the meantime, in which case fall back to the update.
+    try:
+        with db.begin_nested():
+            db.execute(insert(stats).values(
+                player_id=player_id,
+                total_score=score_delta,
+                games_played=games_delta,
+                highest_level=func.coalesce(level_number, 0) if level_number is not None else 0
+            ))
+    except IntegrityError:
+        db.execute(
+            update(stats)
+            .where(stats.player_id == player_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _apply_player_stats_deltas(db: Session, deltas: Dict[int, Tuple[int, int, int]]) -> None:
+    """
+    Apply many rollup increments inside the caller's transaction.
+    `deltas` maps player_id to (score_delta, games_delta, level_number).
+    Missing rows are created first, then all rows are updated with one executemany.
+    """
+    if not deltas:
+        return
+    stats = models.PlayerStats.__table__
+    for player_id, (score, _, _) in deltas.items():
+        record_score_delta(db, player_id, score)
+    mark_changed(db, "leaderboard")
+    
+    # INSERT OR IGNORE / INSERT IGNORE: concurrent writers may create the same rows
+    db.execute(
+        insert(stats)
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .prefix_with("IGNORE", dialect="mysql"),
+        [
+            {'player_id': player_id, 'total_score': 0, 'games_played': 0, 'highest_level': 0}
+            for player_id in deltas
+        ]
+    )
+    db.execute(
+        update(stats)
+        .where(stats.c.player_id == bindparam('b_player_id'))
+        .values(
+            total_score=stats.c.total_score + bindparam('b_score'),
+            games_played=stats.c.games_played + bindparam('b_games'),
+            highest_level=case(
+                (stats.c.highest_level < bindparam('b_level'), bindparam('b_level')),
+                else_=stats.c.highest_level
+            )
+        ),
+        [
+            {'b_player_id': player_id, 'b_score': score, 'b_games': games, 'b_level': level_number}
+            for player_id, (score, games, level_number) in deltas.items()
+        ]
+    )
+
+
+def _aggregate_player_stats():
+    """Build the full GROUP BY over games that player_stats mirrors."""
+    return (
+        select(
+            models.Game.player_id,
+            func.sum(models.Game.score).label('total_score'),
+            func.count(models.Game.id).label('games_played'),
+            func.max(models.Level.level_number).label('highest_level')
+        )
+        .join(models.Level, models.Game.level_id == models.Level.id)
+        .group_by(models.Game.player_id)
+    )
+
+
+def rebuild_player_stats(db: Session) -> int:
+    """
+    Recompute the player_stats table from scratch from the games table.
+    Returns the number of rollup rows written.
+    """
+    db.execute(delete(models.PlayerStats))
+    aggregate = _aggregate_player_stats().subquery()
+    db.execute(
+        insert(models.PlayerStats).from_select(
+            ['player_id', 'total_score', 'games_played', 'highest_level'],
+            select(
+                aggregate.c.player_id,
+                func.coalesce(aggregate.c.total_score, 0),
+                aggregate.c.games_played,
+                aggregate.c.highest_level
+            )
+        )
+    )
+    record_reload(db)
+    mark_changed(db, "leaderboard")
+    db.commit()
+    return db.query(func.count(models.PlayerStats.player_id)).scalar()
+
+
+def check_player_stats(db: Session) -> List[dict]:
+    """
+    Compare the player_stats rollup against the full aggregation over games.
+    Returns one dictionary per player whose rollup is wrong or missing.
+    """
+    expected = {
+        row.player_id: (row.total_score or 0, row.games_played, row.highest_level)
+        for row in db.execute(_aggregate_player_stats())
+    }
+    actual = {
+        row.player_id: (row.total_score, row.games_played, row.highest_level)
+        for row in db.query(models.PlayerStats).all()
+    }
+    
+    mismatches = []
+    for player_id in sorted(expected.keys() | actual.keys()):
+        if expected.get(player_id) != actual.get(player_id):
+            mismatches.append({
+                'player_id': player_id,
+                'expected': expected.get(player_id),
+                'actual': actual.get(player_id)
+            })
+    return mismatches
@@ -1,47 +1,209 @@
 """
 Database configuration using SQLAlchemy 2.0.
 Sets up the engine, session factory, and base model.
+With DB_ASYNC enabled, an AsyncEngine/AsyncSession pair serves the routers.
+
+The engines are built on first use (or by init_engines() in the app's
+lifespan), not at import: importing the app, the models or the CLI
+scripts does not load a DBAPI driver or read the settings for it, and
+tests that bring their own engine never build the default one. The
+module attributes `engine`, `SessionLocal`, `async_engine` and
+`AsyncSessionLocal` stay available and trigger the build.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+from typing import Callable, Optional, Union
+
+from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from app import metrics
 from app.config import get_settings
+from app.pool import configure_engine, engine_options
+from app.replicas import replicas
+
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """
+    SQLite only enforces foreign keys when asked to, per connection.
+    Game creation relies on them, so turn them on for every SQLite engine.
+    """
+    if "sqlite" in type(dbapi_connection).__module__:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class _Engines:
+    """The primary engines and session factories, built once on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built = False
+        self.engine: Optional[Engine] = None
+        self.session_factory: Optional[Callable[[], Session]] = None
+        self.async_engine = None
+        self.async_session_factory: Optional[Callable[[], AsyncSession]] = None
+
+    def build(self) -> "_Engines":
+        if self.built:
+            return self
+        with self._lock:
+            if not self.built:
+                self._build()
+                self.built = True
+        return self
+
+    def _build(self) -> None:
+        settings = get_settings()
+        
+        # Create SQLAlchemy engine
+        # echo=True shows SQL queries in console (useful for debugging)
+        # Pool sizing and pre-ping policy come from the DB_POOL_* settings
+        self.engine = create_engine(
+            settings.database_url,
+            echo=settings.DEBUG,
+            **engine_options(settings.database_url, settings)
+        )
+        configure_engine(self.engine, settings)
+        
+        # Create session factory
+        # autocommit=False: We manually commit transactions
+        # autoflush=False: We manually flush changes
+        self.session_factory = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=self.engine
+        )
+        
+        # Async engine and session factory, only built in async mode so the
+        # asyncio driver is not required otherwise.
+        # expire_on_commit=False: attributes cannot be lazily refreshed once the
+        # session has handed objects back to the event loop.
+        if settings.DB_ASYNC:
+            self.async_engine = create_async_engine(
+                settings.async_database_url,
+                echo=settings.DEBUG,
+                **engine_options(settings.async_database_url, settings, asynchronous=True)
+            )
+            configure_engine(self.async_engine.sync_engine, settings)
+            self.async_session_factory = async_sessionmaker(
+                self.async_engine,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        
+        # Request/SQL instrumentation
+        if settings.METRICS_ENABLED:
+            metrics.instrument(self.engine)
+            if self.async_engine is not None:
+                metrics.instrument(self.async_engine.sync_engine)
+
+
+_engines = _Engines()
+
+
+def init_engines() -> None:
+    """Build the engines and session factories now (application startup)."""
+    _engines.build()
+
+
+def engines_built() -> bool:
+    """Whether the primary engines exist yet."""
+    return _engines.built
+
+
+def __getattr__(name: str):
+    """Lazy module attributes: engine, SessionLocal, async_engine, AsyncSessionLocal."""
+    attributes = {
+        "engine": "engine",
+        "SessionLocal": "session_factory",
+        "async_engine": "async_engine",
+        "AsyncSessionLocal": "async_session_factory",
+    }
+    if name in attributes:
+        return getattr(_engines.build(), attributes[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Get settings instance
-settings = get_settings()
-
-# Create SQLAlchemy engine
-# echo=True shows SQL queries in console (useful for debugging)
-engine = create_engine(
-    settings.database_url,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,  # Verify connections before using them
-    pool_recycle=3600,   # Recycle connections after 1 hour
-)
-
-# Create session factory
-# autocommit=False: We manually commit transactions
-# autoflush=False: We manually flush changes
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+
+# Either kind of session handed out by get_db
+DBSession = Union[Session, AsyncSession]
 
 # Base class for all models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
     Dependency function to get database session.
     Used with FastAPI's Depends().
+    Yields an AsyncSession in async mode and a Session otherwise.
     Ensures session is closed after request.
     """
-    db = SessionLocal()
+    engines = _engines.build()
+    if engines.async_session_factory is not None:
+        async with engines.async_session_factory() as db:
+            yield db
+        return
+
+    db = engines.session_factory()
     try:
         yield db
     finally:
-        db.close()
+        # Closing returns the connection to the pool (a rollback round trip)
+        await run_in_threadpool(db.close)
+
+
+async def get_read_db(request: Request, db: DBSession = Depends(get_db)):
+    """
+    Dependency for read-only endpoints: a session on a read replica when
+    DB_REPLICA_URLS is set, or the primary session from get_db otherwise
+    (and for clients that wrote within READ_YOUR_WRITES_S seconds).
+    The primary session is not used then, so it never opens a connection.
+    """
+    session_factory = replicas.session_factory_for(request)
+    if session_factory is None:
+        yield db
+        return
+    
+    replica_db = session_factory()
+    try:
+        yield replica_db
+    finally:
+        await close_db(replica_db)
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Await a crud function against either kind of session.
+    An AsyncSession runs it through run_sync on the asyncio driver;
+    a blocking Session runs it in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def session_like(db):
+    """
+    A new session of the same kind, on the same engine, as `db`.
+    For work that outlives the request, such as a streamed response body:
+    the request's own session is closed once the endpoint returns.
+    """
+    if isinstance(db, AsyncSession):
+        return AsyncSession(bind=db.bind, autoflush=False, expire_on_commit=False)
+    return Session(bind=db.get_bind(), autoflush=False)
+
+
+async def close_db(db) -> None:
+    """Close a session of either kind without blocking the event loop."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
 
 
 def init_db():
@@ -49,4 +211,4 @@ def init_db():
     Initialize database by creating all tables.
     Call this on application startup.
     """
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=_engines.build().engine)
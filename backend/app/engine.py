@@ -0,0 +1,264 @@
+"""
+Headless snake engine for server-side replay verification.
+Implements the same rules as gameLoop/generateFood/generateObstacles in
+frontend/game.js, on a flat bytearray board instead of list scans, and
+uses a seeded PRNG (mulberry32) so a run can be re-simulated exactly
+from its seed and move log.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+# Directions, numbered as stored in move logs
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTION_NAMES = ("UP", "DOWN", "LEFT", "RIGHT")
+OPPOSITE = (DOWN, UP, RIGHT, LEFT)
+
+# Board cell contents
+EMPTY, SNAKE, OBSTACLE, WALL = 0, 1, 2, 3
+
+POINTS_PER_FOOD = 10
+
+
+def obstacles_for_grid(level, cols: int, rows: int) -> int:
+    """
+    Obstacle count for a cols x rows grid, keeping the level's obstacle
+    density. Same float arithmetic as initGame, including its fallback to
+    the level's own count when the scaled count rounds down to zero.
+    """
+    ratio = level.obstacles_count / (level.grid_size * level.grid_size)
+    return int(cols * rows * ratio) or level.obstacles_count
+
+
+def grid_fits(cols: int, rows: int, obstacles_count: int) -> bool:
+    """Whether a cols x rows grid holds the starting snake, food and obstacles."""
+    return cols >= 4 and rows >= 1 and obstacles_count <= cols * rows - 4
+
+
+def duration_seconds(level, ticks: int) -> int:
+    """Wall-clock length of a run of `ticks` ticks at the level's speed (ms per tick)."""
+    return ticks * level.speed // 1000
+
+
+class Mulberry32:
+    """
+    Small 32-bit PRNG with an exact JavaScript counterpart, so the browser
+    and the server draw the same food and obstacle positions from a seed.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int):
+        self.state = seed & 0xFFFFFFFF
+
+    def random(self) -> float:
+        """Next float in [0, 1), like Math.random()."""
+        self.state = (self.state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = self.state
+        t = ((t ^ (t >> 15)) * (t | 1)) & 0xFFFFFFFF
+        t ^= (t + (((t ^ (t >> 7)) * (t | 61)) & 0xFFFFFFFF)) & 0xFFFFFFFF
+        return ((t ^ (t >> 14)) & 0xFFFFFFFF) / 4294967296
+
+
+@dataclass
+class SimulationResult:
+    """Outcome of re-simulating a run."""
+    score: int
+    food_eaten: int
+    ticks: int  # Ticks actually played
+    alive: bool  # False if the run ended in a collision
+    length: int
+
+
+class SnakeGame:
+    """
+    One game on a cols x rows board.
+    The board is a bytearray of cells (EMPTY/SNAKE/OBSTACLE/WALL) with a
+    one-cell WALL border, so moving is an index offset and every collision
+    check (walls, body, obstacles) is a single lookup.
+    """
+
+    def __init__(self, cols: int, rows: int, obstacles_count: int, seed: int):
+        if not grid_fits(cols, rows, obstacles_count):
+            raise ValueError("Grid too small for the snake, food and obstacles")
+        self.cols = cols
+        self.rows = rows
+        self.width = width = cols + 2
+        self.offsets = (-width, width, -1, 1)  # UP, DOWN, LEFT, RIGHT
+        self.board = bytearray([WALL]) * (width * (rows + 2))
+        for y in range(rows):
+            start = self.cell(0, y)
+            self.board[start:start + cols] = bytes(cols)
+        self.rng = Mulberry32(seed)
+        # Cells the snake can cover; once it does, no food can be placed
+        self.capacity = cols * rows - obstacles_count
+
+        # Snake starts in the middle, three cells long, heading right
+        center_x, center_y = cols // 2, rows // 2
+        self.snake = deque()
+        for offset in range(3):
+            cell = self.cell(center_x - offset, center_y)
+            self.snake.append(cell)
+            self.board[cell] = SNAKE
+
+        self.direction = RIGHT
+        self.next_direction = RIGHT
+        self.score = 0
+        self.food_eaten = 0
+        self.ticks = 0
+        self.alive = True
+
+        self.food = self._random_free_cell()
+        for _ in range(obstacles_count):
+            cell = self._random_free_cell(avoid_food=True)
+            self.board[cell] = OBSTACLE
+
+    @classmethod
+    def from_level(
+        cls,
+        level,
+        seed: int,
+        cols: Optional[int] = None,
+        rows: Optional[int] = None
+    ) -> "SnakeGame":
+        """
+        Build a game from a Level.
+        The browser sizes its grid to the canvas; pass that cols x rows to
+        scale the obstacle count the same way initGame does.
+        """
+        cols = cols or level.grid_size
+        rows = rows or level.grid_size
+        return cls(cols, rows, obstacles_for_grid(level, cols, rows), seed)
+
+    def cell(self, x: int, y: int) -> int:
+        """Board index of grid position (x, y)."""
+        return (y + 1) * self.width + x + 1
+
+    def position(self, cell: int) -> Tuple[int, int]:
+        """Grid position (x, y) of a board index."""
+        y, x = divmod(cell, self.width)
+        return x - 1, y - 1
+
+    def _random_free_cell(self, avoid_food: bool = False) -> int:
+        # Rejection sampling, drawing x then y exactly like the frontend.
+        # Callers make sure a free cell is left, or this never returns
+        rng, cols, rows, board = self.rng, self.cols, self.rows, self.board
+        while True:
+            x = int(rng.random() * cols)
+            y = int(rng.random() * rows)
+            cell = self.cell(x, y)
+            if board[cell] == EMPTY and not (avoid_food and cell == self.food):
+                return cell
+
+    def turn(self, direction: int) -> None:
+        """Queue a direction change; reversing onto the body is ignored."""
+        if direction != OPPOSITE[self.direction]:
+            self.next_direction = direction
+
+    def step(self) -> bool:
+        """
+        Advance one tick. Returns False once the run is over: the snake
+        crashed, or it filled the board on an earlier tick.
+        """
+        if not self.alive or self.food is None:
+            return False
+        self.direction = self.next_direction
+        self.ticks += 1
+
+        # Walls, body (the tail has not moved yet) and obstacles in one lookup
+        cell = self.snake[0] + self.offsets[self.direction]
+        if self.board[cell] != EMPTY:
+            self.alive = False
+            return False
+
+        self.snake.appendleft(cell)
+        self.board[cell] = SNAKE
+        if cell == self.food:
+            self.score += POINTS_PER_FOOD
+            self.food_eaten += 1
+            if len(self.snake) == self.capacity:
+                self.food = None  # Board full: the run ends here
+            else:
+                self.food = self._random_free_cell()
+        else:
+            self.board[self.snake.pop()] = EMPTY
+        return True
+
+
+def simulate(
+    cols: int,
+    rows: int,
+    obstacles_count: int,
+    seed: int,
+    moves: Iterable[Tuple[int, int]],
+    total_ticks: int
+) -> SimulationResult:
+    """
+    Re-simulate a run.
+    `moves` are (tick, direction) pairs in tick order: the key press that
+    happened before tick `tick` was played (ticks count from 0).
+    The run stops after `total_ticks` ticks, at the first collision, or
+    when the snake fills the board (still alive).
+    """
+    game = SnakeGame(cols, rows, obstacles_count, seed)
+
+    # Same rules as SnakeGame.step, with the state held in locals: this
+    # loop is what bounds replay verification throughput
+    board, snake, offsets = game.board, game.snake, game.offsets
+    appendleft, pop = snake.appendleft, snake.pop
+    food = game.food
+    capacity = game.capacity
+    direction = RIGHT
+    food_eaten = 0
+    ticks = 0
+    alive = True
+
+    moves = iter(moves)
+    pending = next(moves, (total_ticks, RIGHT))
+    while ticks < total_ticks:
+        if pending[0] <= ticks:
+            # Every press before this tick is checked against the direction
+            # the snake is moving in; the last accepted one wins
+            next_direction = direction
+            while pending[0] <= ticks:
+                if pending[1] != OPPOSITE[direction]:
+                    next_direction = pending[1]
+                pending = next(moves, (total_ticks, RIGHT))
+            direction = next_direction
+        ticks += 1
+        cell = snake[0] + offsets[direction]
+        if board[cell]:
+            alive = False
+            break
+        appendleft(cell)
+        board[cell] = SNAKE
+        if cell == food:
+            food_eaten += 1
+            if len(snake) == capacity:
+                break
+            food = game._random_free_cell()
+        else:
+            board[pop()] = EMPTY
+
+    return SimulationResult(
+        score=food_eaten * POINTS_PER_FOOD,
+        food_eaten=food_eaten,
+        ticks=ticks,
+        alive=alive,
+        length=len(snake)
+    )
+
+
+def verify(
+    cols: int,
+    rows: int,
+    obstacles_count: int,
+    seed: int,
+    moves: Iterable[Tuple[int, int]],
+    total_ticks: int,
+    score: int,
+    food_eaten: int
+) -> bool:
+    """True if re-simulating the run reproduces the claimed score and food count."""
+    result = simulate(cols, rows, obstacles_count, seed, moves, total_ticks)
+    return result.score == score and result.food_eaten == food_eaten
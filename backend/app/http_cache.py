@@ -0,0 +1,106 @@
+"""
+Conditional GET support for the read endpoints.
+Each cacheable resource ("levels", "leaderboard") has an in-process
+version counter, bumped whenever its data changes. Its strong ETag is
+derived from the counter, so If-None-Match can be answered with
+304 Not Modified before any database work. Cache-Control policies come
+from Settings.
+"""
+import secrets
+import threading
+import time
+from typing import Dict
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+# Key of the per-session set of changed resources in Session.info
+_CHANGED_KEY = "http_cache_changed"
+
+# Distinguishes this process's ETags from another worker's (or a restart's)
+_INSTANCE = secrets.token_hex(4)
+
+
+class VersionCounters:
+    """Monotonic version per resource name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+
+    def bump(self, resource: str) -> None:
+        """Record that a resource changed."""
+        with self._lock:
+            self._versions[resource] = self._versions.get(resource, 0) + 1
+
+    def get(self, resource: str) -> int:
+        """Current version of a resource."""
+        return self._versions.get(resource, 0)
+
+
+versions = VersionCounters()
+
+
+def etag(resource: str) -> str:
+    """
+    Strong ETag of a resource's current version.
+    Leaderboard data can also change through other workers' commits,
+    which this process never sees; rolling the tag over every
+    LEADERBOARD_ETAG_WINDOW_S seconds bounds how long it can confirm a
+    stale copy.
+    """
+    tag = f"{_INSTANCE}-{resource}-{versions.get(resource)}"
+    window = get_settings().LEADERBOARD_ETAG_WINDOW_S
+    if resource == "leaderboard" and window > 0:
+        tag += f"-{int(time.time() // window)}"
+    return f'"{tag}"'
+
+
+def _matches(if_none_match: str, current: str) -> bool:
+    # If-None-Match uses the weak comparison: ignore W/ prefixes
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == current for candidate in candidates)
+
+
+def conditional(resource: str, cache_control_setting: str):
+    """
+    Build a dependency for GET endpoints serving `resource`.
+    It answers a matching If-None-Match with 304 (raised before the
+    endpoint runs) and otherwise sets ETag and Cache-Control on the response.
+    """
+    def dependency(request: Request, response: Response) -> None:
+        current = etag(resource)
+        headers = {
+            "ETag": current,
+            "Cache-Control": getattr(get_settings(), cache_control_setting),
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, current):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
+
+
+# ========== Session hooks ==========
+
+def mark_changed(db: Session, resource: str) -> None:
+    """Bump a resource's version once `db` commits."""
+    db.info.setdefault(_CHANGED_KEY, set()).add(resource)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session: Session) -> None:
+    for resource in session.info.pop(_CHANGED_KEY, ()):
+        versions.bump(resource)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_KEY, None)
@@ -33,10 +33,11 @@ def init_levels():
     
     print("🎮 Initializing 10 game levels...")
     
-    for level_data in levels_data:
-        level_schema = schemas.LevelCreate(**level_data)
-        db_level = crud.create_level(db, level_schema)
-        print(f"  ✓ Level {db_level.level_number}: {db_level.name} created")
+    # Validate every level, then insert them all in one statement
+    levels = [schemas.LevelCreate(**level_data).model_dump() for level_data in levels_data]
+    crud.bulk_create_levels(db, levels)
+    for level in levels:
+        print(f"  ✓ Level {level['level_number']}: {level['name']} created")
     
     print("✅ All levels initialized successfully!")
     db.close()
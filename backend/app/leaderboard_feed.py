@@ -0,0 +1,243 @@
+"""
+Push of the all-time leaderboard over WebSocket (/ws/leaderboard).
+Subscribers get the top LEADERBOARD_WS_TOP_N on connect, then only
+what changed. Commits that touch a player whose total is (or was) at or
+above the current top N cutoff, as seen by the rank index, including
+new games that only change games_played, wake one broadcaster task, which
+re-reads the top N once per LEADERBOARD_WS_MIN_INTERVAL_MS, diffs it
+against the previous one and fans the encoded diff out to every
+subscriber. Each subscriber has its own bounded queue and sender task,
+so a slow client never holds up the others: when its queue is full, its
+pending messages are replaced by one snapshot. Other workers' commits
+are picked up every LEADERBOARD_WS_POLL_S seconds.
+
+Messages (JSON):
+- {"type": "snapshot", "version": v, "entries": [LeaderboardEntry, ...]}
+- {"type": "diff", "version": v, "changed": [LeaderboardEntry, ...], "removed": [username, ...]}
+  `changed` holds new entries and entries whose rank or stats changed;
+  entries are keyed by username.
+"""
+import asyncio
+import json
+import logging
+from contextlib import suppress
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import crud, database
+from app.config import get_settings
+from app.rank_index import rank_index
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One WebSocket client: a bounded queue of encoded messages."""
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.resyncs = 0
+
+    def offer(self, message: str, snapshot: Callable[[], str]) -> None:
+        """Queue a message without waiting; a client that fell behind gets a snapshot instead."""
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+            return
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(snapshot())
+        self.resyncs += 1
+
+
+def diff_entries(old: List[dict], new: List[dict]) -> dict:
+    """Entries of `new` that are new or changed since `old`, and usernames that left."""
+    previous = {entry['username']: entry for entry in old}
+    current = {entry['username'] for entry in new}
+    return {
+        'changed': [entry for entry in new if previous.get(entry['username']) != entry],
+        'removed': [username for username in previous if username not in current],
+    }
+
+
+class LeaderboardFeed:
+    """Top-N leaderboard shared by all WebSocket subscribers of this worker."""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self._subscribers: Set[Subscriber] = set()
+        self._entries: Optional[List[dict]] = None
+        self._version = 0
+        self._cutoff: Optional[int] = None  # Lowest total in a full top N
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._first_load: Optional[asyncio.Lock] = None
+        self.refreshes = 0
+        self.broadcasts = 0
+        rank_index.add_listener(self._committed)
+
+    def configure(self, session_factory: Callable[[], Session]) -> None:
+        """Use a different session factory for reading (e.g. in tests)."""
+        self._session_factory = session_factory
+
+    # ========== Change detection ==========
+
+    def _committed(self, deltas: Optional[Dict[int, int]]) -> None:
+        """Rank index listener, called in the committing thread."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or not self._affects_top(deltas):
+            return
+        with suppress(RuntimeError):  # The loop closed meanwhile
+            loop.call_soon_threadsafe(wake.set)
+
+    def _affects_top(self, deltas: Optional[Dict[int, int]]) -> bool:
+        """
+        Whether these committed changes can change the top N entries.
+        A zero delta still counts: the player's games played or highest
+        level changed, which the entries show too.
+        """
+        cutoff = self._cutoff
+        if deltas is None or cutoff is None:
+            return True
+        for player_id, delta in deltas.items():
+            total = rank_index.total(player_id)
+            if total is None or total >= cutoff or total - delta >= cutoff:
+                return True
+        return False
+
+    # ========== Broadcasting ==========
+
+    def _load(self) -> List[dict]:
+        factory = self._session_factory or database.SessionLocal
+        db = factory()
+        try:
+            return crud.get_leaderboard(db, limit=get_settings().LEADERBOARD_WS_TOP_N)
+        finally:
+            db.close()
+
+    def _set_entries(self, entries: List[dict]) -> None:
+        self._entries = entries
+        self._version += 1
+        full = len(entries) >= get_settings().LEADERBOARD_WS_TOP_N
+        self._cutoff = entries[-1]['total_score'] if entries and full else None
+        self.refreshes += 1
+
+    def _snapshot(self) -> str:
+        return json.dumps({'type': 'snapshot', 'version': self._version, 'entries': self._entries})
+
+    async def refresh(self) -> None:
+        """Re-read the top N and send the differences to every subscriber."""
+        entries = await run_in_threadpool(self._load)
+        old = self._entries or []
+        self._set_entries(entries)
+        changes = diff_entries(old, entries)
+        if not changes['changed'] and not changes['removed']:
+            return
+
+        message = json.dumps({'type': 'diff', 'version': self._version, **changes})
+        snapshot = None
+
+        def lazy_snapshot() -> str:
+            nonlocal snapshot
+            if snapshot is None:
+                snapshot = self._snapshot()
+            return snapshot
+
+        for subscriber in self._subscribers:
+            subscriber.offer(message, lazy_snapshot)
+        self.broadcasts += 1
+
+    async def _broadcast_loop(self) -> None:
+        while True:
+            settings = get_settings()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.LEADERBOARD_WS_POLL_S or None)
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except SQLAlchemyError:
+                logger.exception("Refreshing the leaderboard feed failed")
+            # Changes arriving meanwhile are coalesced into the next refresh
+            await asyncio.sleep(settings.LEADERBOARD_WS_MIN_INTERVAL_MS / 1000)
+
+    def _start(self) -> None:
+        """Start the broadcaster on the running loop (once per set of subscribers)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._first_load = asyncio.Lock()
+        self._entries = None
+        self._cutoff = None
+        self._task = loop.create_task(self._broadcast_loop())
+
+    async def _stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if self._subscribers or self._task is not None:
+            return  # Someone subscribed meanwhile and started a new broadcaster
+        self._loop = self._wake = None
+        self._entries = self._cutoff = None
+
+    # ========== Subscribers ==========
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """Feed an accepted WebSocket until the client disconnects."""
+        self._start()
+        subscriber = Subscriber(get_settings().LEADERBOARD_WS_QUEUE)
+        # Join before awaiting anything, so that a last subscriber leaving
+        # meanwhile does not stop the broadcaster under this one
+        self._subscribers.add(subscriber)
+
+        sender = None
+        try:
+            async with self._first_load:
+                if self._entries is None:
+                    self._set_entries(await run_in_threadpool(self._load))
+            # Diffs queued before the snapshot are already part of it
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(self._snapshot())
+            sender = asyncio.create_task(self._send(websocket, subscriber))
+            while True:
+                # Clients only listen; this returns when they go away
+                message = await websocket.receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._subscribers.discard(subscriber)
+            if sender is not None:
+                sender.cancel()
+                with suppress(asyncio.CancelledError, Exception):
+                    await sender
+            if not self._subscribers:
+                await self._stop()
+
+    @staticmethod
+    async def _send(websocket: WebSocket, subscriber: Subscriber) -> None:
+        while True:
+            await websocket.send_text(await subscriber.queue.get())
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            'subscribers': len(self._subscribers),
+            'version': self._version,
+            'refreshes': self.refreshes,
+            'broadcasts': self.broadcasts,
+            'resyncs': sum(subscriber.resyncs for subscriber in self._subscribers)
+        }
+
+
+# Shared feed behind /ws/leaderboard
+leaderboard_feed = LeaderboardFeed()
@@ -0,0 +1,94 @@
+"""
+In-process cache for the static level catalogue.
+The levels table is loaded once and then served from memory.
+crud.create_level and the admin reload endpoint invalidate it.
+"""
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import database, models, schemas
+from app.http_cache import versions
+
+
+class LevelCache:
+    """
+    Immutable snapshot of all levels, indexed by ID and by level number.
+    Readers never take the lock; a (re)load swaps the snapshot atomically.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def configure(self, session_factory: Callable[[], Session]) -> None:
+        """Use a different session factory for loading (e.g. in tests)."""
+        self._session_factory = session_factory
+        self.invalidate()
+
+    def load(self) -> None:
+        """Load all levels from the database and install them as the snapshot."""
+        with self._lock:
+            generation = self._generation
+            factory = self._session_factory or database.SessionLocal
+            db = factory()
+            try:
+                rows = db.query(models.Level).order_by(models.Level.level_number).all()
+                levels = [schemas.LevelResponse.model_validate(row) for row in rows]
+            finally:
+                db.close()
+
+            by_id = {level.id: level for level in levels}
+            by_number = {level.level_number: level for level in levels}
+            # Only install if nothing invalidated the cache while we were reading
+            if generation == self._generation:
+                self._snapshot = (levels, by_id, by_number)
+            self.loads += 1
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next lookup reloads from the database."""
+        self._generation += 1
+        self._snapshot = None
+        versions.bump("levels")
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        self.load()
+        return self._snapshot or ([], {}, {})
+
+    def get_levels(self) -> List[schemas.LevelResponse]:
+        """Get all levels ordered by level number."""
+        return list(self._get_snapshot()[0])
+
+    def get_level(self, level_id: int) -> Optional[schemas.LevelResponse]:
+        """Get a level by ID."""
+        return self._get_snapshot()[1].get(level_id)
+
+    def get_level_by_number(self, level_number: int) -> Optional[schemas.LevelResponse]:
+        """Get a level by level number."""
+        return self._get_snapshot()[2].get(level_number)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring."""
+        snapshot = self._snapshot
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'loads': self.loads,
+            'size': len(snapshot[0]) if snapshot else 0,
+            'loaded': snapshot is not None
+        }
+
+
+# Shared cache used by the routers
+level_cache = LevelCache()
@@ -1,22 +1,112 @@
 """
 Main FastAPI application for Snake Game.
 """
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import List
+
+from fastapi import FastAPI, HTTPException, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.exc import SQLAlchemyError
 
+from app import crud, database, metrics, schemas
 from app.config import get_settings
+from app.leaderboard_feed import leaderboard_feed
+from app.level_cache import level_cache
+from app.pool import pool_status
+from app.rank_index import rank_index
+from app.replicas import LAST_WRITE_HEADER, replicas
 from app.routers import players, levels, games, leaderboard
+from app.shared_leaderboard import shared_leaderboard
+from app.write_behind import score_buffer
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(interval: float, job, description: str):
+    """Run a blocking job in the threadpool every `interval` seconds until cancelled."""
+    while True:
+        try:
+            await run_in_threadpool(job)
+        except SQLAlchemyError:
+            logger.exception("%s failed", description)
+        await asyncio.sleep(interval)
+
+
+def prune_leaderboard_buckets():
+    """Delete expired day/week leaderboard buckets."""
+    settings = get_settings()
+    db = database.SessionLocal()
+    try:
+        crud.prune_leaderboard_buckets(
+            db,
+            keep_days=settings.LEADERBOARD_KEEP_DAYS,
+            keep_weeks=settings.LEADERBOARD_KEEP_WEEKS
+        )
+    finally:
+        db.close()
 
-# Get settings
-settings = get_settings()
 
-# Create FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup/shutdown hook.
+    Reads the settings and builds the database engines (neither happens
+    at import, which keeps worker start-up cheap), warms the
+    level cache and the rank index so the first requests are served from
+    memory, runs the write-behind flusher, draining it on shutdown,
+    attaches to the shared-memory leaderboard, and runs the periodic
+    maintenance jobs in the background.
+    """
+    settings = get_settings()
+    app.title, app.version = settings.APP_NAME, settings.APP_VERSION
+    await run_in_threadpool(database.init_engines)
+    await run_in_threadpool(level_cache.load)
+    if settings.WRITE_BEHIND_ENABLED:
+        score_buffer.configure(
+            flush_interval=settings.WRITE_BEHIND_FLUSH_MS / 1000,
+            max_items=settings.WRITE_BEHIND_MAX_ITEMS
+        )
+        score_buffer.start()
+    
+    tasks = []
+    if settings.LEADERBOARD_PRUNE_INTERVAL_S > 0:
+        tasks.append(asyncio.create_task(run_periodically(
+            settings.LEADERBOARD_PRUNE_INTERVAL_S, prune_leaderboard_buckets, "Pruning leaderboard buckets"
+        )))
+    if settings.LEADERBOARD_SHM_ENABLED:
+        # Every worker attaches and reads; the one holding the lock refreshes
+        shared_leaderboard.attach()
+        tasks.append(asyncio.create_task(run_periodically(
+            settings.LEADERBOARD_SHM_REFRESH_S, shared_leaderboard.refresh, "Refreshing the shared leaderboard"
+        )))
+    if settings.RANK_INDEX_REFRESH_S > 0:
+        # The first run seeds the index
+        tasks.append(asyncio.create_task(run_periodically(
+            settings.RANK_INDEX_REFRESH_S, rank_index.load, "Reloading the rank index"
+        )))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    try:
+        if settings.WRITE_BEHIND_ENABLED:
+            # Raises (after logging what is lost) if the results cannot be written
+            await run_in_threadpool(score_buffer.stop)
+    finally:
+        shared_leaderboard.close()
+
+
+# Create FastAPI app (title and version are set from the settings by lifespan)
 app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
     description="Backend API for Snake Game with 10 difficulty levels",
     docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc
+    redoc_url="/redoc",  # ReDoc
+    lifespan=lifespan
 )
 
 # Configure CORS (for frontend communication)
@@ -26,8 +116,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER],  # Echoed back by the frontend for read-your-writes
 )
 
+# Request instrumentation (outermost, so it times everything else; a
+# pass-through unless METRICS_ENABLED); the engines are instrumented
+# when database.py builds them
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(players.router)
 app.include_router(levels.router)
@@ -42,7 +138,7 @@ def root():
     """
     return {
         "message": "Welcome to Snake Game API",
-        "version": settings.APP_VERSION,
+        "version": get_settings().APP_VERSION,
         "docs": "/docs",
         "redoc": "/redoc"
     }
@@ -54,3 +150,42 @@ def health_check():
     Health check endpoint.
     """
     return {"status": "healthy"}
+
+
+@app.get("/health/pool", response_model=List[schemas.PoolStatus])
+def connection_pool_status():
+    """
+    Connection pool occupancy (checked out, idle, overflow) and checkout
+    statistics (count, wait times, timeouts, pings) of each engine.
+    """
+    engines = {"sync": database.engine}
+    if database.async_engine is not None:
+        engines["async"] = database.async_engine.sync_engine
+    engines.update(replicas.engines())
+    return [pool_status(name, engine, get_settings().DB_POOL_PRE_PING) for name, engine in engines.items()]
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    """
+    Prometheus metrics: request latency, statement counts and DB time per
+    route, threadpool and connection pool utilisation.
+    """
+    if not get_settings().METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    pools = {"sync": database.engine.pool}
+    if database.async_engine is not None:
+        pools["async"] = database.async_engine.pool
+    pools.update((name, engine.pool) for name, engine in replicas.engines().items())
+    return PlainTextResponse(metrics.render(pools), media_type="text/plain; version=0.0.4")
+
+
+@app.websocket("/ws/leaderboard")
+async def leaderboard_updates(websocket: WebSocket):
+    """
+    Live all-time leaderboard: a snapshot of the top players on connect,
+    then a diff (changed entries and removed usernames) whenever it
+    changes. See app/leaderboard_feed.py for the message format.
+    """
+    await websocket.accept()
+    await leaderboard_feed.serve(websocket)
@@ -0,0 +1,294 @@
+"""
+Request and database instrumentation, exposed in the Prometheus text
+format on /metrics.
+MetricsMiddleware times every HTTP request per route template. Cursor
+hooks on the engines count statements and their time against the
+request that ran them (found through a context variable, which follows
+the request into the threadpool). /metrics adds threadpool and
+connection pool utilisation read at scrape time. The cost per request is
+a few dictionary updates, so it can stay enabled in production.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from anyio import to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label of statements run outside any request (startup, background jobs)
+BACKGROUND_ROUTE = "(background)"
+# Label of requests that matched no route
+UNMATCHED_ROUTE = "(unmatched)"
+
+# Key of the statement start times in Connection.info
+_STARTED_KEY = "metrics_started"
+
+RouteKey = Tuple[str, str]  # (method, route template)
+
+
+class RequestStats:
+    """Database work of one request, filled in by the cursor hooks."""
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "metrics_request", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # The last one is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RouteMetrics:
+    """Everything recorded for one (method, route)."""
+    __slots__ = ("latency", "responses", "statements", "db_seconds")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.responses: Dict[int, int] = {}  # Status code -> count
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+class MetricsRegistry:
+    """Per-route counters of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[RouteKey, RouteMetrics] = {}
+        self.in_flight = 0
+
+    def _route(self, key: RouteKey) -> RouteMetrics:
+        metrics = self._routes.get(key)
+        if metrics is None:
+            metrics = self._routes[key] = RouteMetrics()
+        return metrics
+
+    def observe_request(self, key: RouteKey, status: int, seconds: float, stats: RequestStats) -> None:
+        """Record one finished request."""
+        with self._lock:
+            metrics = self._route(key)
+            metrics.latency.observe(seconds)
+            metrics.responses[status] = metrics.responses.get(status, 0) + 1
+            metrics.statements += stats.statements
+            metrics.db_seconds += stats.db_seconds
+
+    def observe_background_statement(self, seconds: float) -> None:
+        """Record a statement run outside any request."""
+        with self._lock:
+            metrics = self._route(("", BACKGROUND_ROUTE))
+            metrics.statements += 1
+            metrics.db_seconds += seconds
+
+    def reset(self) -> None:
+        """Forget everything recorded so far (e.g. between tests)."""
+        with self._lock:
+            self._routes = {}
+
+    def snapshot(self) -> Dict[RouteKey, RouteMetrics]:
+        """Copy of the per-route metrics, safe to read while requests run."""
+        with self._lock:
+            copy = {}
+            for key, metrics in self._routes.items():
+                clone = RouteMetrics()
+                clone.latency.counts = list(metrics.latency.counts)
+                clone.latency.total = metrics.latency.total
+                clone.latency.count = metrics.latency.count
+                clone.responses = dict(metrics.responses)
+                clone.statements = metrics.statements
+                clone.db_seconds = metrics.db_seconds
+                copy[key] = clone
+            return copy
+
+
+registry = MetricsRegistry()
+
+
+# ========== Middleware ==========
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request until its last byte is
+    sent. Passes requests straight through unless METRICS_ENABLED.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not get_settings().METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500  # If the app fails before starting a response
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            _current.reset(token)
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else UNMATCHED_ROUTE)
+            registry.observe_request(key, status, time.perf_counter() - start, stats)
+
+
+# ========== Engine hooks ==========
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED_KEY)
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is None:
+        registry.observe_background_statement(seconds)
+    else:
+        stats.statements += 1
+        stats.db_seconds += seconds
+
+
+def instrument(engine: Engine) -> None:
+    """Count and time the statements an engine executes."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ========== Prometheus text format ==========
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _pool_gauges(pools: Dict[str, object]) -> List[Tuple[str, str, float]]:
+    """(metric, labels, value) for each engine's connection pool."""
+    gauges = []
+    for name, pool in pools.items():
+        for metric, method in (
+            ("db_pool_size", "size"),
+            ("db_pool_checked_out", "checkedout"),
+            ("db_pool_checked_in", "checkedin"),
+            ("db_pool_overflow", "overflow"),
+        ):
+            # Only QueuePool-style pools report these
+            if hasattr(pool, method):
+                gauges.append((metric, _labels(engine=name), getattr(pool, method)()))
+    return gauges
+
+
+def render(pools: Optional[Dict[str, object]] = None) -> str:
+    """
+    Every metric in the Prometheus text exposition format.
+    `pools` maps an engine label to its connection pool. Must run on the
+    event loop (the threadpool limiter is read from there).
+    """
+    routes = sorted(registry.snapshot().items())
+    lines = []
+
+    def header(name: str, kind: str, help_text: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    header("http_request_duration_seconds", "histogram", "Request latency by route.")
+    for (method, route), metrics in routes:
+        if not metrics.latency.count:
+            continue
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), metrics.latency.counts):
+            cumulative += count
+            lines.append(
+                f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+            )
+        labels = _labels(method=method, route=route)
+        lines.append(f"http_request_duration_seconds_sum{labels} {metrics.latency.total}")
+        lines.append(f"http_request_duration_seconds_count{labels} {metrics.latency.count}")
+
+    header("http_responses_total", "counter", "Responses by route and status code.")
+    for (method, route), metrics in routes:
+        for status, count in sorted(metrics.responses.items()):
+            lines.append(f"http_responses_total{_labels(method=method, route=route, status=status)} {count}")
+
+    header("db_statements_total", "counter", "SQL statements executed, by the route that ran them.")
+    for (method, route), metrics in routes:
+        lines.append(f"db_statements_total{_labels(method=method, route=route)} {metrics.statements}")
+
+    header("db_seconds_total", "counter", "Time spent executing SQL statements, by route.")
+    for (method, route), metrics in routes:
+        lines.append(f"db_seconds_total{_labels(method=method, route=route)} {metrics.db_seconds}")
+
+    header("http_requests_in_flight", "gauge", "Requests being served.")
+    lines.append(f"http_requests_in_flight {registry.in_flight}")
+
+    limiter = to_thread.current_default_thread_limiter()
+    header("threadpool_threads_busy", "gauge", "Worker threads running blocking calls.")
+    lines.append(f"threadpool_threads_busy {limiter.borrowed_tokens}")
+    header("threadpool_threads_limit", "gauge", "Most worker threads that can run at once.")
+    lines.append(f"threadpool_threads_limit {limiter.total_tokens}")
+
+    gauges = _pool_gauges(pools or {})
+    for metric, help_text in (
+        ("db_pool_size", "Connections the pool keeps open."),
+        ("db_pool_checked_out", "Connections in use."),
+        ("db_pool_checked_in", "Idle connections in the pool."),
+        ("db_pool_overflow", "Connections opened beyond the pool size (negative: not yet opened)."),
+    ):
+        values = [(labels, value) for name, labels, value in gauges if name == metric]
+        if values:
+            header(metric, "gauge", help_text)
+            lines.extend(f"{metric}{labels} {value}" for labels, value in values)
+
+    # Checkout counters of the timed pools (app/pool.py)
+    timed = [(name, pool.stats) for name, pool in (pools or {}).items() if hasattr(pool, "stats")]
+    for metric, attribute, help_text in (
+        ("db_pool_checkouts_total", "checkouts", "Connections handed out by the pool."),
+        ("db_pool_checkout_wait_seconds_total", "wait_seconds_total", "Time spent waiting for a connection."),
+        ("db_pool_timeouts_total", "timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT."),
+    ):
+        if timed:
+            header(metric, "counter", help_text)
+            lines.extend(f"{metric}{_labels(engine=name)} {getattr(stats, attribute)}" for name, stats in timed)
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,101 @@
+"""
+Schema migrations for databases created before the current models.
+Base.metadata.create_all only creates missing tables, so columns and
+indexes added to existing tables are created here, and indexes they
+replace are dropped. Safe to run repeatedly.
+"""
+from typing import List
+
+from sqlalchemy import Column, Index, Integer, MetaData, Table, inspect, or_, update
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+from app import models  # Also registers the tables on Base.metadata
+
+# Indexes superseded by a composite index with the same leading column
+OBSOLETE_INDEXES = {
+    "games": ["ix_games_player_id"],
+}
+
+
+def _backfill_finished_at(conn) -> None:
+    """Games that already have a result finished no later than they were created."""
+    games = models.Game.__table__
+    conn.execute(
+        update(games)
+        .where(games.c.finished_at.is_(None), or_(games.c.score > 0, games.c.duration_seconds > 0))
+        .values(finished_at=games.c.created_at)
+    )
+
+
+# Fills a newly added column for the rows that existed before it
+COLUMN_BACKFILLS = {
+    ("games", "finished_at"): _backfill_finished_at,
+}
+
+
+def upgrade_columns(engine: Engine) -> List[str]:
+    """
+    Add declared columns that are missing from existing tables.
+    Only nullable columns can be added; returns a description of every change.
+    """
+    changes = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(engine.dialect)}"
+                )
+                backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                if backfill is not None:
+                    backfill(conn)
+            changes.append(f"added {table.name}.{column.name}")
+    
+    return changes
+
+
+def upgrade_indexes(engine: Engine) -> List[str]:
+    """
+    Create declared indexes that are missing and drop obsolete ones.
+    Returns a description of every change made.
+    """
+    changes = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"]: index for index in inspector.get_indexes(table.name)}
+
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(bind=engine)
+                changes.append(f"created {index.name} on {table.name}")
+
+        # Replacements were created above: MySQL needs an index on every FK column
+        for name in OBSOLETE_INDEXES.get(table.name, []):
+            if name in existing:
+                _drop_index(engine, table.name, name, existing[name]["column_names"])
+                changes.append(f"dropped {name} on {table.name}")
+
+    return changes
+
+
+def _drop_index(engine: Engine, table_name: str, name: str, column_names: List[str]) -> None:
+    """Drop an index that is no longer declared on the models."""
+    # Bind it to a scratch table so the real metadata is left untouched
+    scratch = Table(table_name, MetaData(), *[Column(column, Integer) for column in column_names])
+    Index(name, *[scratch.c[column] for column in column_names]).drop(bind=engine)
@@ -1,9 +1,10 @@
 """
 SQLAlchemy database models for the Snake Game.
-Models: Player, Game, Level
+Models: Player, Game, Level, PlayerStats, GameReplay, LeaderboardBucket
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, ForeignKey, Boolean, Index, LargeBinary
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -22,6 +23,9 @@ class Player(Base):
     # Relationship: one player can have many games
     games = relationship("Game", back_populates="player", cascade="all, delete-orphan")
     
+    # Relationship: one player has one leaderboard rollup row
+    stats = relationship("PlayerStats", back_populates="player", uselist=False, cascade="all, delete-orphan")
+    
     def __repr__(self):
         return f"<Player(id={self.id}, username='{self.username}')>"
 
@@ -54,7 +58,7 @@ class Game(Base):
     __tablename__ = "games"
     
     id = Column(Integer, primary_key=True, index=True)
-    player_id = Column(Integer, ForeignKey("players.id"), nullable=False, index=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)  # Indexed by the composites below
     level_id = Column(Integer, ForeignKey("levels.id"), nullable=False, index=True)
     
     score = Column(Integer, default=0)
@@ -62,7 +66,30 @@ class Game(Base):
     duration_seconds = Column(Integer, default=0)  # Game duration
     completed = Column(Boolean, default=False)  # Did player complete the level?
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the history cursor. On SQLite, bind values in the same
+    # second-precision text format CURRENT_TIMESTAMP stores (as MySQL's
+    # DATETIME does), so equality comparisons on the cursor work.
+    created_at = Column(
+        DateTime(timezone=True).with_variant(
+            sqlite.DATETIME(
+                storage_format="%(year)04d-%(month)02d-%(day)02d "
+                               "%(hour)02d:%(minute)02d:%(second)02d"
+            ),
+            "sqlite"
+        ),
+        server_default=func.now()
+    )
+    
+    # Set when the first result arrives (UTC); the time-windowed leaderboards bucket by it
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Indexes matched to the query shapes:
+    # - history: WHERE player_id = ? ORDER BY created_at DESC, id DESC (and its keyset cursor)
+    # - rollup: GROUP BY player_id with SUM(score), joined to levels (covering)
+    __table_args__ = (
+        Index("ix_games_player_created", "player_id", "created_at", "id"),
+        Index("ix_games_player_score_level", "player_id", "score", "level_id"),
+    )
     
     # Relationships
     player = relationship("Player", back_populates="games")
@@ -70,3 +97,86 @@ class Game(Base):
     
     def __repr__(self):
         return f"<Game(id={self.id}, player_id={self.player_id}, score={self.score})>"
+
+
+class PlayerStats(Base):
+    """
+    PlayerStats model - incrementally maintained leaderboard rollup.
+    One row per player who has played, kept in step with the games table
+    by crud.create_game and crud.update_game.
+    """
+    __tablename__ = "player_stats"
+    
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    total_score = Column(Integer, nullable=False, default=0)  # Sum of all game scores
+    games_played = Column(Integer, nullable=False, default=0)  # Number of games started
+    highest_level = Column(Integer, nullable=False, default=0)  # Highest level_number played
+    
+    # Serves ORDER BY total_score DESC, player_id straight from the index
+    __table_args__ = (
+        Index("ix_player_stats_leaderboard", total_score.desc(), player_id),
+    )
+    
+    # Relationships
+    player = relationship("Player", back_populates="stats")
+    
+    def __repr__(self):
+        return f"<PlayerStats(player_id={self.player_id}, total_score={self.total_score})>"
+
+
+class GameReplay(Base):
+    """
+    GameReplay model - optional recorded run of a game (app/replay.py format).
+    Kept out of the games table so game rows stay narrow; the header fields
+    are copied into columns so replays can be listed without reading blobs.
+    """
+    __tablename__ = "game_replays"
+    
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
+    seed = Column(BigInteger, nullable=False)  # Unsigned 32-bit PRNG seed
+    cols = Column(Integer, nullable=False)  # Grid the run was played on
+    rows = Column(Integer, nullable=False)
+    ticks = Column(Integer, nullable=False)  # Ticks played
+    move_count = Column(Integer, nullable=False)  # Direction changes recorded
+    size = Column(Integer, nullable=False)  # Length of data in bytes
+    # Header + packed moves; deferred so loading a replay row never pulls the blob
+    data = deferred(Column(LargeBinary().with_variant(mysql.MEDIUMBLOB(), "mysql"), nullable=False))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<GameReplay(game_id={self.game_id}, ticks={self.ticks}, size={self.size})>"
+
+
+class LeaderboardBucket(Base):
+    """
+    LeaderboardBucket model - per-window, per-level leaderboard rollup.
+    One row per (period, bucket_start, level_number, player), credited when
+    a game finishes: "day" and "week" buckets start at the UTC day / ISO
+    week of finished_at, "all" buckets use crud.BUCKET_EPOCH. level_number 0
+    holds the player's totals over all levels; the all-time total over all
+    levels is player_stats. Expired day/week buckets are pruned.
+    """
+    __tablename__ = "leaderboard_buckets"
+    
+    period = Column(String(5), primary_key=True)  # "day", "week" or "all"
+    bucket_start = Column(Date, primary_key=True)
+    level_number = Column(Integer, primary_key=True)  # 0 = all levels
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    total_score = Column(Integer, nullable=False, default=0)  # Sum of scores of games finished in the bucket
+    games_played = Column(Integer, nullable=False, default=0)  # Games finished in the bucket
+    highest_level = Column(Integer, nullable=False, default=0)  # Highest level_number finished
+    
+    # Serves one board (period, bucket_start, level_number) in rank order
+    __table_args__ = (
+        Index(
+            "ix_leaderboard_buckets_rank",
+            "period", "bucket_start", "level_number", total_score.desc(), "player_id"
+        ),
+        Index("ix_leaderboard_buckets_player", "player_id"),
+    )
+    
+    def __repr__(self):
+        return (
+            f"<LeaderboardBucket(period='{self.period}', start={self.bucket_start}, "
+            f"level={self.level_number}, player_id={self.player_id}, total_score={self.total_score})>"
+        )
@@ -0,0 +1,59 @@
+"""
+Opaque cursors for keyset (cursor-based) pagination.
+A cursor is the sort key of the last row of a page, JSON-encoded and
+base64url-wrapped so clients treat it as an opaque token.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not produce."""
+
+
+def _encode(payload: list) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(payload, list):
+        raise InvalidCursor(cursor)
+    return payload
+
+
+def encode_player_cursor(player_id: int) -> str:
+    """Cursor for the player list, keyed on id."""
+    return _encode([player_id])
+
+
+def decode_player_cursor(cursor: str) -> int:
+    """Return the id of the last player seen."""
+    payload = _decode(cursor)
+    if len(payload) != 1 or not isinstance(payload[0], int):
+        raise InvalidCursor(cursor)
+    return payload[0]
+
+
+def encode_game_cursor(created_at: datetime, game_id: int) -> str:
+    """Cursor for game history, keyed on (created_at, id)."""
+    return _encode([created_at.isoformat(), game_id])
+
+
+def decode_game_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return the (created_at, id) of the last game seen."""
+    payload = _decode(cursor)
+    if len(payload) != 2 or not isinstance(payload[0], str) or not isinstance(payload[1], int):
+        raise InvalidCursor(cursor)
+    try:
+        return datetime.fromisoformat(payload[0]), payload[1]
+    except ValueError:
+        raise InvalidCursor(cursor)
@@ -0,0 +1,164 @@
+"""
+Connection pool configuration and statistics.
+Both engines get a QueuePool sized from Settings (DB_POOL_*) whose
+checkouts are timed, so pools can be sized against the number of uvicorn
+workers from measured wait times instead of guesses.
+
+Pre-ping policies (DB_POOL_PRE_PING):
+    always  test every checkout with a round trip (SQLAlchemy pool_pre_ping)
+    idle    only test connections idle for DB_POOL_PRE_PING_IDLE_S or longer;
+            the ones in steady use skip the round trip
+    never   rely on DB_POOL_RECYCLE; a dropped connection fails one request
+"""
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import Settings
+
+# Key of the last check-in time in each connection record's info
+_CHECKIN_KEY = "pool_checked_in_at"
+
+
+class PoolStats:
+    """Checkout counters of one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def record_checkout(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_ping(self, failed: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            self.ping_failures += failed
+
+
+class _TimedPoolMixin:
+    """Times every checkout, including the wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, timed_out=False)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    # In-memory SQLite keeps one connection per thread (or one shared);
+    # queue pooling does not apply
+    return url.startswith("sqlite") and (url.rstrip("/").endswith(":") or ":memory:" in url)
+
+
+def engine_options(url: str, settings: Settings, asynchronous: bool = False) -> dict:
+    """Pool keyword arguments for create_engine / create_async_engine."""
+    if _is_sqlite_memory(url):
+        return {}
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+
+
+def install_idle_ping(engine: Engine, idle_seconds: float) -> None:
+    """
+    Test a connection on checkout only if it sat idle for `idle_seconds`.
+    A failed test discards it, and the pool hands out a fresh one.
+    """
+    @event.listens_for(engine, "checkin")
+    def _stamp(dbapi_connection, connection_record):
+        connection_record.info[_CHECKIN_KEY] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get(_CHECKIN_KEY)
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        stats = getattr(engine.pool, "stats", None)
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            # Any driver error means the connection is unusable
+            if stats is not None:
+                stats.record_ping(failed=True)
+            raise exc.DisconnectionError("Idle connection failed its ping")
+        finally:
+            cursor.close()
+        if stats is not None:
+            stats.record_ping(failed=False)
+
+
+def configure_engine(engine: Engine, settings: Settings) -> None:
+    """Apply the pre-ping policy that needs event hooks (idle)."""
+    if settings.DB_POOL_PRE_PING == "idle":
+        install_idle_ping(engine, settings.DB_POOL_PRE_PING_IDLE_S)
+
+
+def pool_status(name: str, engine: Engine, pre_ping: str) -> dict:
+    """Live occupancy and accumulated checkout statistics of an engine's pool."""
+    pool = engine.pool
+    status = {
+        "engine": name,
+        "pool_class": type(pool).__name__,
+        "pre_ping": pre_ping,
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    stats: Optional[PoolStats] = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update({
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_ms_total": round(stats.wait_seconds_total * 1000, 3),
+            "wait_ms_mean": round(stats.wait_seconds_total * 1000 / stats.checkouts, 3) if stats.checkouts else 0.0,
+            "wait_ms_max": round(stats.wait_seconds_max * 1000, 3),
+            "pings": stats.pings,
+            "ping_failures": stats.ping_failures,
+        })
+    return status
@@ -0,0 +1,367 @@
+"""
+In-process order-statistic index of player totals for rank lookups.
+Seeded from the player_stats rollup, then kept current from the score
+deltas that crud records on the session: they are applied when the
+session commits and dropped if it rolls back. Rank queries never touch
+the database; with several workers each one also reloads every
+RANK_INDEX_REFRESH_S seconds to pick up the others' commits.
+
+A reload must not count a commit twice: once in the totals it reads and
+again when that commit's deltas are applied after the swap. Sessions
+with deltas announce their commit before it reaches the database, and
+a reload only keeps totals read while no such commit was under way.
+"""
+import random
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import database, models
+
+# Keys of the per-session pending changes in Session.info
+_DELTAS_KEY = "rank_index_deltas"
+_RELOAD_KEY = "rank_index_reload"
+_COMMITTING_KEY = "rank_index_committing"
+
+# Same order as the leaderboard: total_score DESC, player_id ASC
+Key = Tuple[int, int]  # (-total_score, player_id)
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, height: int):
+        self.key = key
+        self.next = [None] * height
+        self.width = [1] * height  # Positions skipped by following next[level]
+
+
+class IndexableSkipList:
+    """
+    Sorted set with O(log n) insert, remove, position-of-key and
+    key-at-position. Every link stores how many positions it skips.
+    Positions are 1-based with the head at 0; a link to the end of the
+    list skips to position len + 1.
+    """
+
+    MAX_LEVELS = 24
+
+    def __init__(self, sorted_keys: Iterable = ()):
+        self._random = random.Random()
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._size = 0
+
+        # Bulk build in O(n) from keys that are already in order
+        last = [self._head] * self.MAX_LEVELS
+        last_position = [0] * self.MAX_LEVELS
+        for position, key in enumerate(sorted_keys, start=1):
+            node = _Node(key, self._random_height())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+            self._size = position
+        for level in range(self.MAX_LEVELS):
+            last[level].width[level] = self._size + 1 - last_position[level]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_height(self) -> int:
+        # Geometric(1/2): one plus the number of trailing zero bits
+        bits = self._random.getrandbits(self.MAX_LEVELS - 1)
+        return min(self.MAX_LEVELS, (bits & -bits or 1 << (self.MAX_LEVELS - 1)).bit_length())
+
+    def _path(self, key):
+        """Last node before `key` on every level, and its position."""
+        chain = [None] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node, following = following, following.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key) -> None:
+        """Add a key (keys must be unique)."""
+        chain, positions = self._path(key)
+        node = _Node(key, self._random_height())
+        position = positions[0] + 1
+        for level in range(len(node.next)):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            node.width[level] = previous.width[level] - (position - positions[level]) + 1
+            previous.next[level] = node
+            previous.width[level] = position - positions[level]
+        for level in range(len(node.next), self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key) -> None:
+        """Remove a key; raises KeyError if it is not present."""
+        chain, _ = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(self.MAX_LEVELS):
+            previous = chain[level]
+            if previous.next[level] is node:
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            else:
+                previous.width[level] -= 1
+        self._size -= 1
+
+    def index(self, key) -> int:
+        """0-based position of a key; raises KeyError if it is not present."""
+        chain, positions = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def __getitem__(self, index: int):
+        """Key at a 0-based position."""
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        target = index + 1
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and position + node.width[level] <= target:
+                position += node.width[level]
+                node = node.next[level]
+        return node.key
+
+
+class RankIndex:
+    """
+    Every ranked player (one with a player_stats row) ordered like the
+    leaderboard. Guarded by one lock: updates and lookups are O(log n).
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._commits_started = 0
+        self._in_flight = 0  # Commits with deltas not yet applied (or rolled back)
+        self._exclusive = False  # A reload is holding new commits back
+        self._totals: Dict[int, int] = {}
+        self._index: Optional[IndexableSkipList] = None
+        self._listeners: List[Callable[[Optional[Dict[int, int]]], None]] = []
+        self.loads = 0
+        self.updates = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+
+    def configure(self, session_factory: Callable[[], Session]) -> None:
+        """Use a different session factory for loading (e.g. in tests)."""
+        self._session_factory = session_factory
+        self.invalidate()
+
+    def load(self) -> None:
+        """
+        Read every player's total from player_stats and rebuild the index.
+        The totals are read without blocking commits first; if a commit
+        with deltas overlapped that read, new ones are held back in
+        begin_commit while the totals are read again.
+        """
+        with self._condition:
+            started, idle = self._commits_started, not self._in_flight
+        if idle:
+            snapshot = self._build(self._read_totals())
+            with self._condition:
+                if self._commits_started == started:
+                    self._swap(*snapshot)
+                    return
+
+        with self._condition:
+            self._condition.wait_for(lambda: not self._in_flight and not self._exclusive)
+            self._exclusive = True
+        try:
+            snapshot = self._build(self._read_totals())
+            with self._condition:
+                self._swap(*snapshot)
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+    def _read_totals(self) -> List[Tuple[int, int]]:
+        factory = self._session_factory or database.SessionLocal
+        db = factory()
+        try:
+            # Already in leaderboard order thanks to ix_player_stats_leaderboard
+            return db.execute(
+                select(models.PlayerStats.player_id, models.PlayerStats.total_score)
+                .order_by(models.PlayerStats.total_score.desc(), models.PlayerStats.player_id)
+            ).all()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _build(rows: List[Tuple[int, int]]) -> Tuple[Dict[int, int], IndexableSkipList]:
+        # O(n): done before taking the lock, so commits applying deltas
+        # (possibly on the event loop) only wait for the swap
+        totals = {player_id: total for player_id, total in rows}
+        return totals, IndexableSkipList((-total, player_id) for player_id, total in rows)
+
+    def _swap(self, totals: Dict[int, int], index: IndexableSkipList) -> None:
+        # Called with the lock held
+        self._totals = totals
+        self._index = index
+        self.loads += 1
+
+    def begin_commit(self) -> None:
+        """A session with deltas is about to commit (waits while a reload holds commits back)."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive)
+            self._commits_started += 1
+            self._in_flight += 1
+
+    def end_commit(self) -> None:
+        """That commit's deltas were applied, or it rolled back."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def invalidate(self) -> None:
+        """Drop the index; the next lookup reloads it from the database."""
+        with self._lock:
+            self._index = None
+            self._totals = {}
+
+    def apply(self, deltas: Dict[int, int]) -> None:
+        """
+        Apply committed score changes (player_id -> score delta).
+        A player not yet indexed starts from zero, like their new
+        player_stats row. Ignored while the index is not loaded.
+        """
+        with self._lock:
+            index = self._index
+            if index is None:
+                return
+            for player_id, delta in deltas.items():
+                total = self._totals.get(player_id)
+                if total is not None:
+                    if not delta:
+                        continue
+                    index.remove((-total, player_id))
+                else:
+                    total = 0
+                total += delta
+                index.insert((-total, player_id))
+                self._totals[player_id] = total
+            self.updates += 1
+
+    def total(self, player_id: int) -> Optional[int]:
+        """A player's indexed total, or None if unknown (or the index is not loaded)."""
+        return self._totals.get(player_id)
+
+    def add_listener(self, callback: Callable[[Optional[Dict[int, int]]], None]) -> None:
+        """
+        Call `callback` after each commit that changed player totals, with
+        the applied deltas (None when the index was reloaded instead).
+        It runs in the committing thread, so it must be quick.
+        """
+        self._listeners.append(callback)
+
+    def committed(self, deltas: Optional[Dict[int, int]]) -> None:
+        """Apply a commit's deltas, or drop the index for reloading, and tell the listeners."""
+        if deltas is None:
+            self.invalidate()
+        else:
+            self.apply(deltas)
+        for callback in self._listeners:
+            callback(deltas)
+
+    def rank(self, player_id: int) -> Optional[dict]:
+        """
+        A player's 1-based rank and total with the players directly above
+        and below, or None if the player has not played yet.
+        """
+        if self._index is None:
+            self.load()
+        with self._lock:
+            index = self._index
+            total = self._totals.get(player_id)
+            if index is None or total is None:
+                return None
+            position = index.index((-total, player_id))
+
+            def neighbour(at: int) -> Optional[dict]:
+                if not 0 <= at < len(index):
+                    return None
+                negative_total, other_id = index[at]
+                return {'player_id': other_id, 'rank': at + 1, 'total_score': -negative_total}
+
+            return {
+                'player_id': player_id,
+                'rank': position + 1,
+                'total_score': total,
+                'ranked_players': len(index),
+                'above': neighbour(position - 1),
+                'below': neighbour(position + 1)
+            }
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        index = self._index
+        return {
+            'loaded': index is not None,
+            'size': len(index) if index is not None else 0,
+            'loads': self.loads,
+            'updates': self.updates
+        }
+
+
+# ========== Session hooks ==========
+
+def record_score_delta(db: Session, player_id: int, score_delta: int) -> None:
+    """Queue a player_stats total change, applied to the index when `db` commits."""
+    deltas = db.info.setdefault(_DELTAS_KEY, {})
+    deltas[player_id] = deltas.get(player_id, 0) + score_delta
+
+
+def record_reload(db: Session) -> None:
+    """Reload the index from the database once `db` commits (e.g. after a rebuild)."""
+    db.info[_RELOAD_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _announce_commit(session: Session) -> None:
+    if session.info.get(_DELTAS_KEY) and not session.info.get(_COMMITTING_KEY):
+        rank_index.begin_commit()
+        session.info[_COMMITTING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session: Session) -> None:
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if session.info.pop(_RELOAD_KEY, False):
+        rank_index.committed(None)
+    elif deltas:
+        rank_index.committed(deltas)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted_changes(session: Session, transaction) -> None:
+    # Runs after after_commit; anything left belongs to a rolled back transaction
+    if transaction.parent is None:
+        session.info.pop(_DELTAS_KEY, None)
+        session.info.pop(_RELOAD_KEY, None)
+        if session.info.pop(_COMMITTING_KEY, False):
+            rank_index.end_commit()
+
+
+# Shared index used by the players router
+rank_index = RankIndex()
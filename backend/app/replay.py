@@ -0,0 +1,146 @@
+"""
+Compact binary replay format.
+A replay is the seed the game was generated from plus every accepted
+direction change. Layout (integers are unsigned LEB128 varints unless
+noted):
+
+    b"SNKR"             magic
+    version             1 byte (REPLAY_VERSION)
+    seed                4 bytes, little-endian
+    cols, rows          grid the browser played on
+    ticks               ticks played
+    move_count          number of direction changes
+    moves...            (tick_delta << 2) | direction, one per change
+
+tick_delta is the tick of the change minus the tick of the previous one,
+so a typical move fits in one byte. frontend/game.js writes the same
+layout. Moves decode lazily from any iterable of byte chunks.
+"""
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"SNKR"
+REPLAY_VERSION = 1
+HEADER_PREFIX_SIZE = len(MAGIC) + 1 + 4
+
+# Grids larger than this are rejected before anything is simulated
+MAX_GRID_SIDE = 256
+
+
+class InvalidReplay(ValueError):
+    """Raised when replay bytes are malformed."""
+
+
+@dataclass
+class ReplayHeader:
+    """Everything in a replay except the moves."""
+    seed: int
+    cols: int
+    rows: int
+    ticks: int
+    move_count: int
+    size: int  # Header length in bytes
+
+
+def _encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode(seed: int, cols: int, rows: int, ticks: int, moves: List[Tuple[int, int]]) -> bytes:
+    """Pack a run; `moves` are (tick, direction) pairs in tick order."""
+    out = bytearray(MAGIC)
+    out.append(REPLAY_VERSION)
+    out += (seed & 0xFFFFFFFF).to_bytes(4, "little")
+    for value in (cols, rows, ticks, len(moves)):
+        _encode_varint(value, out)
+    previous = 0
+    for tick, direction in moves:
+        if tick < previous or not 0 <= direction <= 3:
+            raise ValueError("moves must be in tick order with directions 0-3")
+        _encode_varint((tick - previous) << 2 | direction, out)
+        previous = tick
+    return bytes(out)
+
+
+def _varints(chunks: Iterable[bytes]) -> Iterator[int]:
+    """Decode a stream of varints that may straddle chunk boundaries."""
+    value = shift = 0
+    for chunk in chunks:
+        for byte in chunk:
+            value |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+                if shift > 63:
+                    raise InvalidReplay("Varint too long")
+            else:
+                yield value
+                value = shift = 0
+    if shift:
+        raise InvalidReplay("Truncated replay")
+
+
+def decode_header(data: bytes, max_ticks: Optional[int] = None) -> ReplayHeader:
+    """Parse the header from the start of a replay, rejecting runs longer than `max_ticks`."""
+    if len(data) < HEADER_PREFIX_SIZE or data[:len(MAGIC)] != MAGIC:
+        raise InvalidReplay("Not a replay")
+    if data[len(MAGIC)] != REPLAY_VERSION:
+        raise InvalidReplay(f"Unsupported replay version {data[len(MAGIC)]}")
+    seed = int.from_bytes(data[len(MAGIC) + 1:HEADER_PREFIX_SIZE], "little")
+
+    fields = []
+    position = HEADER_PREFIX_SIZE
+    value = shift = 0
+    while len(fields) < 4:
+        if position >= len(data):
+            raise InvalidReplay("Truncated replay header")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            if shift > 63:
+                raise InvalidReplay("Varint too long")
+        else:
+            fields.append(value)
+            value = shift = 0
+
+    cols, rows, ticks, move_count = fields
+    if not (4 <= cols <= MAX_GRID_SIDE and 1 <= rows <= MAX_GRID_SIDE):
+        raise InvalidReplay("Grid size out of range")
+    # Every move takes at least one byte, and without turning the snake
+    # hits a wall within max(cols, rows) ticks: both bound the simulation
+    if move_count > len(data) - position:
+        raise InvalidReplay("More moves declared than the replay holds")
+    if ticks > (move_count + 1) * max(cols, rows):
+        raise InvalidReplay("More ticks declared than the moves allow")
+    if max_ticks is not None and ticks > max_ticks:
+        raise InvalidReplay(f"Replay longer than {max_ticks} ticks")
+    return ReplayHeader(seed, cols, rows, ticks, move_count, position)
+
+
+def iter_moves(header: ReplayHeader, chunks: Iterable[bytes]) -> Iterator[Tuple[int, int]]:
+    """
+    Lazily decode (tick, direction) pairs from the bytes after the header.
+    Raises InvalidReplay if the stream does not hold exactly
+    header.move_count moves within header.ticks.
+    """
+    tick = count = 0
+    for value in _varints(chunks):
+        count += 1
+        if count > header.move_count:
+            raise InvalidReplay("More moves than the header declares")
+        tick += value >> 2
+        if tick > header.ticks:
+            raise InvalidReplay("Move after the last tick")
+        yield tick, value & 3
+    if count != header.move_count:
+        raise InvalidReplay("Fewer moves than the header declares")
+
+
+def decode(data: bytes) -> Tuple[ReplayHeader, List[Tuple[int, int]]]:
+    """Parse a whole replay held in memory."""
+    header = decode_header(data)
+    return header, list(iter_moves(header, [data[header.size:]]))
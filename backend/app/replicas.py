@@ -0,0 +1,146 @@
+"""
+Read-replica routing.
+Read-only endpoints take their session from get_read_db, which picks the
+replicas in DB_REPLICA_URLS round-robin; everything else, and every
+write, uses the primary. Replicas lag behind the primary, so a client
+reads from the primary for READ_YOUR_WRITES_S seconds after its own
+writes. Two signals mark those reads:
+
+- X-Last-Write: every write response carries the time of the write and
+  clients send it back on their reads (frontend/game.js does). It holds
+  across workers, as the header travels with the client.
+- Recent writes per player: routes about one player (a {player_id} path
+  parameter) also go to the primary after that player's writes seen by
+  this worker, for clients that do not echo the header.
+"""
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import metrics
+from app.config import get_settings, to_async_url
+from app.pool import configure_engine, engine_options
+
+# Response/request header carrying the time of the client's last write
+LAST_WRITE_HEADER = "X-Last-Write"
+
+# Recent writers kept before expired entries are swept
+_SWEEP_AT = 10000
+
+
+class ReplicaSet:
+    """Round-robin choice of replica sessions, with read-your-writes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session_factories: Optional[List[Callable]] = None
+        self._engines: Dict[str, Engine] = {}
+        self._next = itertools.count()
+        self._recent_writers: Dict[int, float] = {}  # player_id -> primary-only until
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def configure(self, session_factories: Optional[List[Callable]]) -> None:
+        """
+        Use these replica session factories (e.g. in tests); an empty list
+        disables replicas, None goes back to DB_REPLICA_URLS.
+        """
+        with self._lock:
+            self._session_factories = session_factories
+            self._engines = {}
+            self._recent_writers = {}
+
+    def _factories(self) -> List[Callable]:
+        if self._session_factories is None:
+            with self._lock:
+                if self._session_factories is None:
+                    self._session_factories = self._build_from_settings()
+        return self._session_factories
+
+    def _build_from_settings(self) -> List[Callable]:
+        settings = get_settings()
+        factories = []
+        for number, url in enumerate(settings.replica_urls):
+            if settings.DB_ASYNC:
+                async_engine = create_async_engine(
+                    to_async_url(url), **engine_options(to_async_url(url), settings, asynchronous=True)
+                )
+                engine = async_engine.sync_engine
+                factories.append(async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False))
+            else:
+                engine = create_engine(url, **engine_options(url, settings))
+                factories.append(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+            configure_engine(engine, settings)
+            if settings.METRICS_ENABLED:
+                metrics.instrument(engine)
+            self._engines[f"replica-{number}"] = engine
+        return factories
+
+    def engines(self) -> Dict[str, Engine]:
+        """Replica engines built from DB_REPLICA_URLS, by label."""
+        self._factories()
+        return dict(self._engines)
+
+    # ========== Read-your-writes ==========
+
+    def note_write(self, response: Response, player_ids: Iterable[int] = ()) -> None:
+        """Mark a write: stamp the response and pin these players' reads to the primary."""
+        now = time.time()
+        response.headers[LAST_WRITE_HEADER] = f"{now:.3f}"
+        if not self._factories():
+            return
+        until = now + get_settings().READ_YOUR_WRITES_S
+        with self._lock:
+            if len(self._recent_writers) >= _SWEEP_AT:
+                self._recent_writers = {
+                    player_id: deadline for player_id, deadline in self._recent_writers.items() if deadline > now
+                }
+            for player_id in player_ids:
+                self._recent_writers[player_id] = until
+
+    def wrote_recently(self, request: Request) -> bool:
+        """Whether the client behind `request` wrote within READ_YOUR_WRITES_S seconds."""
+        now = time.time()
+        last_write = request.headers.get(LAST_WRITE_HEADER)
+        if last_write:
+            try:
+                if now - float(last_write) < get_settings().READ_YOUR_WRITES_S:
+                    return True
+            except ValueError:
+                pass
+        player_id = request.path_params.get("player_id")
+        if player_id is not None:
+            try:
+                return self._recent_writers.get(int(player_id), 0) > now
+            except ValueError:
+                pass  # Not validated yet: the route answers with a 422
+        return False
+
+    def session_factory_for(self, request: Request) -> Optional[Callable]:
+        """The replica session factory to read with, or None for the primary."""
+        factories = self._factories()
+        if not factories or self.wrote_recently(request):
+            self.primary_reads += 1
+            return None
+        self.replica_reads += 1
+        return factories[next(self._next) % len(factories)]
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            'replicas': len(self._factories()),
+            'replica_reads': self.replica_reads,
+            'primary_reads': self.primary_reads,
+            'recent_writers': len(self._recent_writers)
+        }
+
+
+# Shared replica set used by get_read_db
+replicas = ReplicaSet()
@@ -1,12 +1,25 @@
 """
 Games router - Endpoints for game sessions and scores.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
 
-from app import crud, schemas
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from typing import List, Literal, Optional
+
+from app import async_crud, engine, export, fast_json, replay, schemas
+from app.config import get_settings
+from app.crud import game_export_query
+from app.database import DBSession, close_db, get_db, get_read_db, session_like
+from app.level_cache import level_cache
+from app.pagination import InvalidCursor, decode_game_cursor, encode_game_cursor
+from app.replicas import replicas
+from app.write_behind import score_buffer
+
+# Replays are streamed back in chunks of this many bytes
+REPLAY_CHUNK_BYTES = 16 * 1024
 
 router = APIRouter(
     prefix="/games",
@@ -15,38 +28,112 @@ router = APIRouter(
 
 
 @router.post("/", response_model=schemas.GameResponse, status_code=status.HTTP_201_CREATED)
-def create_game(game: schemas.GameCreate, db: Session = Depends(get_db)):
+async def create_game(game: schemas.GameCreate, response: Response, db: DBSession = Depends(get_db)):
     """
     Start a new game session.
     
     - **player_id**: ID of the player starting the game
     - **level_id**: ID of the level to play
+    
+    A single INSERT: the foreign keys reject unknown players or levels,
+    and only that failure path looks up which one was missing.
     """
-    # Verify player exists
-    db_player = crud.get_player(db, player_id=game.player_id)
-    if db_player is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Player not found"
-        )
+    try:
+        db_game = await async_crud.create_game(db, game=game)
+    except IntegrityError:
+        # Verify player exists
+        db_player = await async_crud.get_player(db, player_id=game.player_id)
+        if db_player is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Player not found"
+            )
+        
+        # Verify level exists (served from memory)
+        db_level = level_cache.get_level(game.level_id)
+        if db_level is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Level not found"
+            )
+        raise
+    replicas.note_write(response, [game.player_id])
+    return db_game
+
+
+@router.post("/batch", response_model=schemas.GameBatchResponse)
+async def create_games_batch(
+    batch: schemas.GameBatchCreate,
+    response: Response,
+    db: DBSession = Depends(get_db)
+):
+    """
+    Submit many finished games in one request (offline queues, replays).
+    
+    - **games**: Up to 1000 finished games, each with player_id, level_id,
+      score, food_eaten, duration_seconds and completed
     
-    # Verify level exists
-    db_level = crud.get_level(db, level_id=game.level_id)
-    if db_level is None:
+    Returns a status per submitted game, in order. Games referencing an
+    unknown player or level are rejected without affecting the others.
+    """
+    items = await async_crud.create_games_batch(db, games=batch.games)
+    created = sum(1 for item in items if item["status"] == "created")
+    replicas.note_write(response, {game.player_id for game in batch.games})
+    return {
+        "created": created,
+        "rejected": len(items) - created,
+        "items": items
+    }
+
+
+@router.get("/export")
+async def export_games(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    level_number: Optional[int] = None,
+    db: DBSession = Depends(get_read_db)
+):
+    """
+    Export games with their player and level, streamed as NDJSON or CSV.
+    
+    - **format**: `ndjson` (one JSON object per line, default) or `csv`
+    - **start**: Only games created at or after this time
+    - **end**: Only games created before this time
+    - **level_number**: Only games on this level (1-10)
+    
+    Rows are read through a server-side cursor and written as they
+    arrive, so any number of games can be exported in one request.
+    """
+    if level_number is not None and level_cache.get_level_by_number(level_number) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Level not found"
         )
+    query = game_export_query(start=start, end=end, level_number=level_number)
+    
+    async def chunks():
+        # The request's session is closed once this endpoint returns
+        export_db = session_like(db)
+        try:
+            async for chunk in export.aiter_export(export_db, query, fmt):
+                yield chunk
+        finally:
+            await close_db(export_db)
     
-    return crud.create_game(db=db, game=game)
+    return StreamingResponse(
+        chunks(),
+        media_type=export.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="games.{fmt}"'}
+    )
 
 
 @router.get("/{game_id}", response_model=schemas.GameDetailResponse)
-def get_game(game_id: int, db: Session = Depends(get_db)):
+async def get_game(game_id: int, db: DBSession = Depends(get_read_db)):
     """
     Get a game by ID with player and level details.
     """
-    db_game = crud.get_game(db, game_id=game_id)
+    db_game = await async_crud.get_game(db, game_id=game_id)
     if db_game is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,7 +143,12 @@ def get_game(game_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{game_id}", response_model=schemas.GameResponse)
-def update_game(game_id: int, game_update: schemas.GameUpdate, db: Session = Depends(get_db)):
+async def update_game(
+    game_id: int,
+    game_update: schemas.GameUpdate,
+    response: Response,
+    db: DBSession = Depends(get_db)
+):
     """
     Update game results after playing.
     
@@ -64,22 +156,132 @@ def update_game(game_id: int, game_update: schemas.GameUpdate, db: Session = Dep
     - **food_eaten**: Number of food items eaten
     - **duration_seconds**: Total game duration in seconds
     - **completed**: Whether the level was completed
+    
+    With WRITE_BEHIND_ENABLED the result is queued and written within one
+    flush interval; the response already shows the submitted values.
     """
-    db_game = crud.update_game(db, game_id=game_id, game_update=game_update)
+    if get_settings().WRITE_BEHIND_ENABLED:
+        db_game = await async_crud.get_game(db, game_id=game_id)
+        if db_game is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Game not found"
+            )
+        score_buffer.submit(game_id, game_update)
+        replicas.note_write(response, [db_game.player_id])
+        return schemas.GameResponse.model_validate(db_game).model_copy(
+            update=game_update.model_dump()
+        )
+    
+    db_game = await async_crud.update_game(db, game_id=game_id, game_update=game_update)
     if db_game is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Game not found"
         )
+    replicas.note_write(response, [db_game.player_id])
     return db_game
 
 
+@router.put("/{game_id}/replay", response_model=schemas.GameReplayResponse)
+async def upload_game_replay(
+    game_id: int,
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db)
+):
+    """
+    Attach a replay to a finished game.
+    
+    The body is the raw binary replay (application/octet-stream) written
+    by the frontend: seed, grid and packed direction changes. It is
+    re-simulated with the server-side engine and only stored if it
+    reproduces the game's recorded score and food count.
+    """
+    max_bytes = get_settings().REPLAY_MAX_BYTES
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Replay larger than {max_bytes} bytes"
+            )
+    data = bytes(body)
+    
+    db_game = await async_crud.get_game(db, game_id=game_id)
+    if db_game is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Game not found"
+        )
+    # A queued write-behind result is the game's latest one
+    result = score_buffer.get(game_id) or db_game
+    
+    try:
+        header = replay.decode_header(data, max_ticks=get_settings().REPLAY_MAX_TICKS)
+        obstacles_count = engine.obstacles_for_grid(db_game.level, header.cols, header.rows)
+        if not engine.grid_fits(header.cols, header.rows, obstacles_count):
+            raise replay.InvalidReplay("Grid too small for the snake, food and obstacles")
+        moves = replay.iter_moves(header, [memoryview(data)[header.size:]])
+        simulated = await run_in_threadpool(
+            engine.simulate, header.cols, header.rows, obstacles_count, header.seed, moves, header.ticks
+        )
+    except (replay.InvalidReplay, ValueError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid replay: {error}"
+        )
+    
+    if (simulated.ticks, simulated.score, simulated.food_eaten) != (header.ticks, result.score, result.food_eaten):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Replay does not reproduce the recorded score"
+        )
+    
+    db_replay = await async_crud.save_game_replay(db, game_id=game_id, header=header, data=data)
+    replicas.note_write(response, [db_game.player_id])
+    return db_replay
+
+
+@router.get("/{game_id}/replay")
+async def download_game_replay(game_id: int, db: DBSession = Depends(get_read_db)):
+    """
+    Download a game's replay as application/octet-stream.
+    The blob is read from the database in chunks while it is sent.
+    """
+    db_replay = await async_crud.get_game_replay(db, game_id=game_id)
+    if db_replay is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Replay not found"
+        )
+    size = db_replay.size
+    
+    async def chunks():
+        # The request's session is closed once this endpoint returns
+        chunk_db = session_like(db)
+        try:
+            for offset in range(0, size, REPLAY_CHUNK_BYTES):
+                yield await async_crud.get_game_replay_chunk(
+                    chunk_db, game_id=game_id, offset=offset, size=REPLAY_CHUNK_BYTES
+                )
+        finally:
+            await close_db(chunk_db)
+    
+    return StreamingResponse(
+        chunks(),
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(size)}
+    )
+
+
 @router.get("/player/{player_id}/history", response_model=List[schemas.GameDetailResponse])
-def get_player_games(
+async def get_player_games(
     player_id: int,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_read_db)
 ):
     """
     Get game history for a specific player.
@@ -89,12 +291,62 @@ def get_player_games(
     - **limit**: Maximum number of records to return (default: 50)
     """
     # Verify player exists
-    db_player = crud.get_player(db, player_id=player_id)
+    db_player = await async_crud.get_player(db, player_id=player_id)
     if db_player is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Player not found"
         )
     
-    games = crud.get_player_games(db, player_id=player_id, skip=skip, limit=limit)
+    games = await async_crud.get_player_games(db, player_id=player_id, skip=skip, limit=limit)
+    if get_settings().FAST_JSON:
+        return fast_json.json_response(schemas.GameDetailResponse, games, many=True)
     return games
+
+
+@router.get("/player/{player_id}/history/page", response_model=schemas.GamePage)
+async def get_player_games_page(
+    player_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    db: DBSession = Depends(get_read_db)
+):
+    """
+    Get game history for a specific player with cursor (keyset) pagination.
+    Pages stay stable while new games are being recorded.
+    
+    - **player_id**: ID of the player
+    - **cursor**: `next_cursor` from the previous page (omit for the first page)
+    - **limit**: Maximum number of records to return (default: 50, max: 200)
+    """
+    limit = max(1, min(limit, 200))
+    before = None
+    if cursor:
+        try:
+            before = decode_game_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    # Verify player exists
+    db_player = await async_crud.get_player(db, player_id=player_id)
+    if db_player is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player not found"
+        )
+    
+    # Fetch one extra row to know whether another page exists
+    games = await async_crud.get_player_games_before(
+        db, player_id=player_id, before=before, limit=limit + 1
+    )
+    next_cursor = None
+    if len(games) > limit:
+        games = games[:limit]
+        next_cursor = encode_game_cursor(games[-1].created_at, games[-1].id)
+    page = {"items": games, "next_cursor": next_cursor}
+    if get_settings().FAST_JSON:
+        return fast_json.json_response(schemas.GamePage, page)
+    return page
@@ -1,12 +1,16 @@
 """
 Leaderboard router - Endpoints for rankings and statistics.
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import List, Literal, Optional
 
-from app import crud, schemas
-from app.database import get_db
+from app import async_crud, schemas
+from app.database import DBSession, get_read_db
+from app.http_cache import conditional
+from app.config import get_settings
+from app.level_cache import level_cache
+from app.replicas import replicas
+from app.shared_leaderboard import shared_leaderboard
 
 router = APIRouter(
     prefix="/leaderboard",
@@ -14,12 +18,24 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[schemas.LeaderboardEntry])
-def get_leaderboard(limit: int = 10, db: Session = Depends(get_db)):
+@router.get(
+    "/",
+    response_model=List[schemas.LeaderboardEntry],
+    dependencies=[Depends(conditional("leaderboard", "CACHE_CONTROL_LEADERBOARD"))]
+)
+async def get_leaderboard(
+    request: Request,
+    limit: int = 10,
+    window: Literal["day", "week", "all"] = "all",
+    level_number: Optional[int] = None,
+    db: DBSession = Depends(get_read_db)
+):
     """
     Get the top players ranked by total score.
     
     - **limit**: Number of top players to return (default: 10, max: 100)
+    - **window**: `day` (current UTC day), `week` (current ISO week) or `all` (default)
+    - **level_number**: Only count games of this level (default: all levels)
     
     Returns player statistics including:
     - Rank position
@@ -27,9 +43,36 @@ def get_leaderboard(limit: int = 10, db: Session = Depends(get_db)):
     - Total score (sum of all games)
     - Number of games played
     - Highest level reached
+    
+    Day and week boards count games by when they finished; the all-time,
+    all-levels board counts every game started.
+    
+    Responses carry an ETag; send it back in If-None-Match to get a
+    304 Not Modified without a database query while nothing changed.
+    
+    With LEADERBOARD_SHM_ENABLED, the all-time, all-levels board comes
+    from the snapshot shared by all workers (up to LEADERBOARD_SHM_REFRESH_S
+    seconds old), except right after the client's own writes.
     """
     if limit > 100:
         limit = 100
     
-    leaderboard = crud.get_leaderboard(db, limit=limit)
+    if level_number is not None and level_cache.get_level_by_number(level_number) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Level not found"
+        )
+    
+    if (
+        get_settings().LEADERBOARD_SHM_ENABLED
+        and window == "all" and level_number is None
+        and not replicas.wrote_recently(request)
+    ):
+        leaderboard = await shared_leaderboard.get_leaderboard(db, limit)
+        if leaderboard is not None:
+            return leaderboard
+    
+    leaderboard = await async_crud.get_leaderboard(
+        db, limit=limit, window=window, level_number=level_number
+    )
     return leaderboard
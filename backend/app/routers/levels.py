@@ -1,36 +1,46 @@
 """
 Levels router - Endpoints for game levels.
+Levels are served from the in-process level cache, without a database session,
+with ETags that change whenever the cache is invalidated.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from typing import List
 
-from app import crud, schemas
-from app.database import get_db
+from app import fast_json, schemas
+from app.config import get_settings
+from app.http_cache import conditional
+from app.level_cache import level_cache
 
 router = APIRouter(
     prefix="/levels",
     tags=["levels"]
 )
 
+# ETag / If-None-Match / Cache-Control for the level reads
+levels_cache_headers = conditional("levels", "CACHE_CONTROL_LEVELS")
+
 
-@router.get("/", response_model=List[schemas.LevelResponse])
-def list_levels(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[schemas.LevelResponse], dependencies=[Depends(levels_cache_headers)])
+def list_levels(response: Response):
     """
     Get all game levels ordered by difficulty.
     
     Returns 10 levels from Beginner (1) to Impossible (10).
     """
-    levels = crud.get_levels(db)
+    levels = level_cache.get_levels()
+    if get_settings().FAST_JSON:
+        return fast_json.json_response(schemas.LevelResponse, levels, response, many=True)
     return levels
 
 
-@router.get("/{level_id}", response_model=schemas.LevelResponse)
-def get_level(level_id: int, db: Session = Depends(get_db)):
+@router.get("/{level_id}", response_model=schemas.LevelResponse, dependencies=[Depends(levels_cache_headers)])
+def get_level(level_id: int):
     """
     Get a specific level by ID.
     """
-    db_level = crud.get_level(db, level_id=level_id)
+    db_level = level_cache.get_level(level_id)
     if db_level is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,8 +49,12 @@ def get_level(level_id: int, db: Session = Depends(get_db)):
     return db_level
 
 
-@router.get("/number/{level_number}", response_model=schemas.LevelResponse)
-def get_level_by_number(level_number: int, db: Session = Depends(get_db)):
+@router.get(
+    "/number/{level_number}",
+    response_model=schemas.LevelResponse,
+    dependencies=[Depends(levels_cache_headers)]
+)
+def get_level_by_number(level_number: int):
     """
     Get a level by its number (1-10).
     
@@ -52,10 +66,45 @@ def get_level_by_number(level_number: int, db: Session = Depends(get_db)):
             detail="Level number must be between 1 and 10"
         )
     
-    db_level = crud.get_level_by_number(db, level_number=level_number)
+    db_level = level_cache.get_level_by_number(level_number)
     if db_level is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Level not found"
         )
     return db_level
+
+
+def verify_admin_key(x_admin_key: str = Header(...)):
+    """
+    Dependency that only lets requests carrying the SECRET_KEY through.
+    """
+    if not secrets.compare_digest(x_admin_key, get_settings().SECRET_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
+
+
+@router.get("/cache/stats", response_model=schemas.LevelCacheStats)
+def get_level_cache_stats():
+    """
+    Get hit/miss counters of the in-process level cache.
+    """
+    return level_cache.stats()
+
+
+@router.post(
+    "/cache/reload",
+    response_model=schemas.LevelCacheStats,
+    dependencies=[Depends(verify_admin_key)]
+)
+def reload_level_cache():
+    """
+    Reload the level cache from the database (admin only).
+    
+    Requires the **X-Admin-Key** header to match the server's SECRET_KEY.
+    """
+    level_cache.invalidate()
+    level_cache.load()
+    return level_cache.stats()
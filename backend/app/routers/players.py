@@ -1,12 +1,17 @@
 """
 Players router - Endpoints for player management.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 
-from app import crud, schemas
-from app.database import get_db
+from app import async_crud, fast_json, schemas
+from app.config import get_settings
+from app.database import DBSession, get_db, get_read_db
+from app.pagination import InvalidCursor, decode_player_cursor, encode_player_cursor
+from app.rank_index import rank_index
+from app.replicas import replicas
 
 router = APIRouter(
     prefix="/players",
@@ -15,38 +20,105 @@ router = APIRouter(
 
 
 @router.post("/", response_model=schemas.PlayerResponse, status_code=status.HTTP_201_CREATED)
-def create_player(player: schemas.PlayerCreate, db: Session = Depends(get_db)):
+async def create_player(player: schemas.PlayerCreate, response: Response, db: DBSession = Depends(get_db)):
     """
     Create a new player.
     
     - **username**: Unique username (3-50 characters)
     - **email**: Valid email address
+    
+    A single INSERT: the unique indexes on username and email reject
+    duplicates (even between concurrent registrations), and only that
+    failure path looks up which one was taken.
     """
-    # Check if username already exists
-    db_player = crud.get_player_by_username(db, username=player.username)
-    if db_player:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
+    try:
+        db_player = await async_crud.create_player(db, player=player)
+    except IntegrityError:
+        # Check if username already exists
+        db_player = await async_crud.get_player_by_username(db, username=player.username)
+        if db_player:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already registered"
+            )
+        
+        # Check if email already exists
+        db_player = await async_crud.get_player_by_email(db, email=player.email)
+        if db_player:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        raise
+    replicas.note_write(response, [db_player.id])
+    return db_player
+
+
+@router.post("/bulk", response_model=schemas.PlayerBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_players_bulk(
+    batch: schemas.PlayerBulkCreate,
+    response: Response,
+    db: DBSession = Depends(get_db)
+):
+    """
+    Import many players in one request.
     
-    # Check if email already exists
-    db_player = crud.get_player_by_email(db, email=player.email)
-    if db_player:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    - **players**: Up to 10000 players, each with username and email
     
-    return crud.create_player(db=db, player=player)
+    Players whose username or email is already registered are skipped.
+    For millions of accounts use the import_players.py script instead.
+    """
+    rows = [{"username": player.username, "email": player.email} for player in batch.players]
+    inserted = await async_crud.bulk_create_players(db, players=rows)
+    replicas.note_write(response)
+    return {
+        "received": len(rows),
+        "inserted": inserted,
+        "skipped": len(rows) - inserted
+    }
+
+
+@router.get("/page", response_model=schemas.PlayerPage)
+async def list_players_page(
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    db: DBSession = Depends(get_read_db)
+):
+    """
+    Get players with cursor (keyset) pagination, ordered by ID.
+    
+    - **cursor**: `next_cursor` from the previous page (omit for the first page)
+    - **limit**: Maximum number of records to return (default: 100, max: 500)
+    """
+    limit = max(1, min(limit, 500))
+    after_id = None
+    if cursor:
+        try:
+            after_id = decode_player_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    # Fetch one extra row to know whether another page exists
+    players = await async_crud.get_players_after(db, after_id=after_id, limit=limit + 1)
+    next_cursor = None
+    if len(players) > limit:
+        players = players[:limit]
+        next_cursor = encode_player_cursor(players[-1].id)
+    page = {"items": players, "next_cursor": next_cursor}
+    if get_settings().FAST_JSON:
+        return fast_json.json_response(schemas.PlayerPage, page)
+    return page
 
 
 @router.get("/{player_id}", response_model=schemas.PlayerResponse)
-def get_player(player_id: int, db: Session = Depends(get_db)):
+async def get_player(player_id: int, db: DBSession = Depends(get_read_db)):
     """
     Get a player by ID.
     """
-    db_player = crud.get_player(db, player_id=player_id)
+    db_player = await async_crud.get_player(db, player_id=player_id)
     if db_player is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -55,24 +127,61 @@ def get_player(player_id: int, db: Session = Depends(get_db)):
     return db_player
 
 
+@router.get("/{player_id}/rank", response_model=schemas.PlayerRank)
+async def get_player_rank(player_id: int, db: DBSession = Depends(get_read_db)):
+    """
+    Get a player's position in the all-time leaderboard.
+    
+    Returns the rank, the total score and the players directly above and
+    below. Served from the in-memory rank index in O(log n); only the
+    usernames are read from the database.
+    """
+    # A cold or invalidated index is reloaded by rank(): a full read of
+    # player_stats that must not block the event loop
+    position = await run_in_threadpool(rank_index.rank, player_id)
+    
+    player_ids = [player_id]
+    if position is not None:
+        player_ids += [position[key]['player_id'] for key in ('above', 'below') if position[key]]
+    usernames = await async_crud.get_usernames(db, player_ids=player_ids)
+    if player_id not in usernames:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player not found"
+        )
+    
+    if position is None:
+        return {
+            'player_id': player_id,
+            'username': usernames[player_id],
+            'ranked_players': rank_index.stats()['size']
+        }
+    for key in ('above', 'below'):
+        if position[key] is not None:
+            position[key]['username'] = usernames.get(position[key]['player_id'], "")
+    return {**position, 'username': usernames[player_id]}
+
+
 @router.get("/", response_model=List[schemas.PlayerResponse])
-def list_players(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_players(skip: int = 0, limit: int = 100, db: DBSession = Depends(get_read_db)):
     """
     Get all players with pagination.
     
     - **skip**: Number of records to skip (default: 0)
     - **limit**: Maximum number of records to return (default: 100)
     """
-    players = crud.get_players(db, skip=skip, limit=limit)
+    players = await async_crud.get_players(db, skip=skip, limit=limit)
+    if get_settings().FAST_JSON:
+        return fast_json.json_response(schemas.PlayerResponse, players, many=True)
     return players
 
 
 @router.get("/username/{username}", response_model=schemas.PlayerResponse)
-def get_player_by_username(username: str, db: Session = Depends(get_db)):
+async def get_player_by_username(username: str, db: DBSession = Depends(get_read_db)):
     """
     Get a player by username.
     """
-    db_player = crud.get_player_by_username(db, username=username)
+    db_player = await async_crud.get_player_by_username(db, username=username)
     if db_player is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
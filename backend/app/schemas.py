@@ -4,7 +4,7 @@ These define the structure of data sent to/from the API.
 """
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 # ========== Player Schemas ==========
@@ -28,6 +28,43 @@ class PlayerResponse(PlayerBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PlayerBulkCreate(BaseModel):
+    """Schema for importing many players at once."""
+    players: List[PlayerCreate] = Field(..., min_length=1, max_length=10000)
+
+
+class PlayerBulkResponse(BaseModel):
+    """Schema for bulk import results."""
+    received: int
+    inserted: int
+    skipped: int  # Username or email already registered
+
+
+class PlayerPage(BaseModel):
+    """Schema for a cursor-paginated page of players."""
+    items: List[PlayerResponse]
+    next_cursor: Optional[str] = None
+
+
+class RankNeighbour(BaseModel):
+    """Schema for a player next to another one in the ranking."""
+    player_id: int
+    username: str
+    rank: int
+    total_score: int
+
+
+class PlayerRank(BaseModel):
+    """Schema for a player's position in the all-time leaderboard."""
+    player_id: int
+    username: str
+    rank: Optional[int] = None  # None until the player has played a game
+    total_score: int = 0
+    ranked_players: int
+    above: Optional[RankNeighbour] = None
+    below: Optional[RankNeighbour] = None
+
+
 # ========== Level Schemas ==========
 
 class LevelBase(BaseModel):
@@ -51,6 +88,35 @@ class LevelResponse(LevelBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PoolStatus(BaseModel):
+    """Schema for one engine's connection pool occupancy and checkout statistics."""
+    engine: str  # "sync", "async" or "replica-N"
+    pool_class: str
+    pre_ping: str
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout: Optional[float] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None  # Negative while the pool is not yet full
+    checkouts: Optional[int] = None
+    timeouts: Optional[int] = None
+    wait_ms_total: Optional[float] = None
+    wait_ms_mean: Optional[float] = None
+    wait_ms_max: Optional[float] = None
+    pings: Optional[int] = None
+    ping_failures: Optional[int] = None
+
+
+class LevelCacheStats(BaseModel):
+    """Schema for level cache counters."""
+    hits: int
+    misses: int
+    loads: int
+    size: int
+    loaded: bool
+
+
 # ========== Game Schemas ==========
 
 class GameBase(BaseModel):
@@ -75,6 +141,32 @@ class GameUpdate(BaseModel):
     completed: bool = False
 
 
+class GameBatchItem(GameBase):
+    """Schema for one finished game in a batch submission."""
+    player_id: int
+    level_id: int
+
+
+class GameBatchCreate(BaseModel):
+    """Schema for submitting many finished games at once."""
+    games: List[GameBatchItem] = Field(..., min_length=1, max_length=1000)
+
+
+class GameBatchItemResult(BaseModel):
+    """Outcome of one item of a batch submission."""
+    index: int
+    status: str  # "created" or "rejected"
+    id: Optional[int] = None  # Only where the database supports RETURNING
+    detail: Optional[str] = None
+
+
+class GameBatchResponse(BaseModel):
+    """Schema for batch submission responses."""
+    created: int
+    rejected: int
+    items: List[GameBatchItemResult]
+
+
 class GameResponse(GameBase):
     """Schema for game responses."""
     id: int
@@ -93,6 +185,25 @@ class GameDetailResponse(GameResponse):
     model_config = ConfigDict(from_attributes=True)
 
 
+class GamePage(BaseModel):
+    """Schema for a cursor-paginated page of game history."""
+    items: List[GameDetailResponse]
+    next_cursor: Optional[str] = None
+
+
+class GameReplayResponse(BaseModel):
+    """Schema for a stored replay's metadata (the replay itself is binary)."""
+    game_id: int
+    seed: int
+    cols: int
+    rows: int
+    ticks: int
+    move_count: int
+    size: int
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 # ========== Leaderboard Schema ==========
 
 class LeaderboardEntry(BaseModel):
@@ -0,0 +1,246 @@
+"""
+All-time leaderboard shared by the worker processes of one host.
+With several uvicorn workers, per-process caches of the leaderboard are
+duplicated and go stale independently. Instead, the top
+LEADERBOARD_SHM_SIZE rows live in one multiprocessing.shared_memory
+segment: a single process refreshes it every LEADERBOARD_SHM_REFRESH_S
+seconds with one query, and every worker answers GET /leaderboard/
+(all-time, all levels) straight from the mapped memory.
+
+The refresher is whichever process holds an exclusive lock on
+<tempdir>/<LEADERBOARD_SHM_NAME>.lock: a worker tries to take it on every
+refresh tick, so when the refresher exits another worker takes over.
+Run leaderboard_refresher.py as a sidecar to keep the workers read-only.
+
+Layout (little-endian, fixed):
+    header  magic u32 | capacity u32 | sequence u64 | count u32 | pad u32 | refreshed_at f64
+    rows    capacity x (player_id i64 | total_score i64 | games_played i32 | highest_level i32)
+
+The sequence counter is a seqlock: the writer makes it odd before
+touching the rows and even again afterwards. Readers unpack the rows
+they need in place and retry if the counter was odd or moved meanwhile,
+so they never return a torn snapshot. Usernames are not stored; each
+worker maps player IDs to usernames once and caches them (usernames
+never change).
+"""
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import async_crud, crud, database
+from app.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no refresher election, every worker refreshes
+    fcntl = None
+
+MAGIC = 0x534E4B31  # "SNK1"
+HEADER = struct.Struct("<IIQI4xd")
+ROW = struct.Struct("<qqii")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 8
+_COUNT = struct.Struct("<I4xd")
+_COUNT_OFFSET = 16
+
+# Attempts before a reader gives up on a segment that keeps changing
+MAX_READ_ATTEMPTS = 100
+
+# Username cache entries kept before it is cleared
+_MAX_USERNAMES = 10000
+
+Row = Tuple[int, int, int, int]  # (player_id, total_score, games_played, highest_level)
+
+
+class SharedLeaderboard:
+    """This process's view of the shared segment, as reader and possibly refresher."""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._capacity = 0
+        self._lock_path: Optional[str] = None
+        self._lock_fd: Optional[int] = None
+        self._usernames: Dict[int, str] = {}
+        self.refreshes = 0
+        self.reads = 0
+        self.retries = 0
+
+    def configure(self, session_factory: Callable[[], Session]) -> None:
+        """Use a different session factory for refreshing (e.g. in tests)."""
+        self._session_factory = session_factory
+
+    @property
+    def attached(self) -> bool:
+        return self._shm is not None
+
+    @property
+    def refresher(self) -> bool:
+        """Whether this process currently holds the refresher lock."""
+        return self._lock_fd is not None
+
+    # ========== Segment ==========
+
+    def attach(self, name: Optional[str] = None, capacity: Optional[int] = None) -> None:
+        """Create the segment, or open it if another process already did."""
+        settings = get_settings()
+        name = name or settings.LEADERBOARD_SHM_NAME
+        capacity = capacity or settings.LEADERBOARD_SHM_SIZE
+        size = HEADER.size + capacity * ROW.size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            HEADER.pack_into(shm.buf, 0, MAGIC, capacity, 0, 0, 0.0)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            if shm.size < size:
+                shm.close()
+                raise RuntimeError(f"Shared memory segment {name} is too small for {capacity} rows")
+        # The segment outlives any one worker: do not let Python's resource
+        # tracker unlink it when the process that created or opened it exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+        self._shm = shm
+        self._capacity = capacity
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+    def close(self) -> None:
+        """Detach from the segment and give up the refresher role."""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # Releases the lock
+            self._lock_fd = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+        self._usernames = {}
+
+    def unlink(self) -> None:
+        """Remove the segment (once no worker uses it any more)."""
+        if self._shm is not None:
+            name = self._shm.name
+            self.close()
+            shm = shared_memory.SharedMemory(name=name)
+            shm.close()
+            shm.unlink()  # Also drops the tracker registration made by opening it
+
+    # ========== Refresher ==========
+
+    def _acquire_refresher(self) -> bool:
+        if self._lock_fd is not None or fcntl is None:
+            return True
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def write(self, rows: List[Row]) -> None:
+        """Publish a new snapshot (at most `capacity` rows, in rank order)."""
+        buf = self._shm.buf
+        rows = rows[:self._capacity]
+        sequence = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0]
+        if sequence & 1:
+            sequence += 1  # A writer died mid-update
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 1)
+        for position, row in enumerate(rows):
+            ROW.pack_into(buf, HEADER.size + position * ROW.size, *row)
+        _COUNT.pack_into(buf, _COUNT_OFFSET, len(rows), time.time())
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 2)
+
+    def refresh(self) -> bool:
+        """
+        Re-read the top rows and publish them, if this process is (or can
+        become) the refresher. Returns whether it refreshed.
+        """
+        if self._shm is None or not self._acquire_refresher():
+            return False
+        factory = self._session_factory or database.SessionLocal
+        db = factory()
+        try:
+            rows = crud.get_top_player_stats(db, limit=self._capacity)
+        finally:
+            db.close()
+        self.write(rows)
+        self.refreshes += 1
+        return True
+
+    # ========== Readers ==========
+
+    def read(self, limit: int) -> Optional[List[Row]]:
+        """
+        The top `limit` rows of a consistent snapshot, or None when there is
+        none to trust (not attached, never written, older than
+        LEADERBOARD_SHM_MAX_AGE_S, or being rewritten on every attempt).
+        """
+        if self._shm is None:
+            return None
+        buf = self._shm.buf
+        max_age = get_settings().LEADERBOARD_SHM_MAX_AGE_S
+        for _ in range(MAX_READ_ATTEMPTS):
+            before = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0]
+            if before & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            magic, capacity, _, count, refreshed_at = HEADER.unpack_from(buf, 0)
+            rows = [
+                ROW.unpack_from(buf, HEADER.size + position * ROW.size)
+                for position in range(min(limit, count, capacity))
+            ]
+            if _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0] != before:
+                self.retries += 1
+                continue
+            if magic != MAGIC or before == 0 or time.time() - refreshed_at > max_age:
+                return None
+            self.reads += 1
+            return rows
+        return None
+
+    async def get_leaderboard(self, db, limit: int) -> Optional[List[dict]]:
+        """
+        The all-time leaderboard as crud.get_leaderboard returns it, from
+        the shared snapshot; None to fall back to the database.
+        """
+        if limit > self._capacity:
+            return None
+        rows = self.read(limit)
+        if rows is None:
+            return None
+        missing = [player_id for player_id, _, _, _ in rows if player_id not in self._usernames]
+        if missing:
+            if len(self._usernames) > _MAX_USERNAMES:
+                self._usernames = {}
+            self._usernames.update(await async_crud.get_usernames(db, missing))
+            if any(player_id not in self._usernames for player_id in missing):
+                return None  # Deleted since the last refresh
+        return [
+            {
+                'rank': rank,
+                'username': self._usernames[player_id],
+                'total_score': total_score,
+                'games_played': games_played,
+                'highest_level': highest_level
+            }
+            for rank, (player_id, total_score, games_played, highest_level) in enumerate(rows, start=1)
+        ]
+
+    def stats(self) -> dict:
+        """Counters for monitoring."""
+        return {
+            'attached': self.attached,
+            'refresher': self.refresher,
+            'refreshes': self.refreshes,
+            'reads': self.reads,
+            'retries': self.retries
+        }
+
+
+# Shared leaderboard used by the leaderboard router
+shared_leaderboard = SharedLeaderboard()
@@ -0,0 +1,157 @@
+"""
+Write-behind buffer for game score updates.
+PUT /games/{id} hands results to the buffer instead of committing them;
+a background thread writes them in bulk every flush interval or as soon
+as enough updates are pending. Enabled with WRITE_BEHIND_ENABLED.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import crud, database, schemas
+
+logger = logging.getLogger(__name__)
+
+# Attempts at writing what is left when the buffer stops, and the delay
+# before the second one (doubled after each failure)
+SHUTDOWN_ATTEMPTS = 4
+SHUTDOWN_BACKOFF_S = 0.5
+
+
+class ScoreBuffer:
+    """
+    Pending game results keyed by game ID (a later result for the same game
+    replaces an earlier one), drained by a single flusher thread.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.2,
+        max_items: int = 500,
+        session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.flush_interval = flush_interval
+        self.max_items = max_items
+        self._session_factory = session_factory
+        self._pending: Dict[int, schemas.GameUpdate] = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.flushed = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def configure(
+        self,
+        flush_interval: Optional[float] = None,
+        max_items: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None
+    ) -> None:
+        """Change the flush policy or the session factory (e.g. in tests)."""
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if max_items is not None:
+            self.max_items = max_items
+        if session_factory is not None:
+            self._session_factory = session_factory
+
+    def start(self) -> None:
+        """Start the background flusher thread."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="score-write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, attempts: int = SHUTDOWN_ATTEMPTS, backoff: float = SHUTDOWN_BACKOFF_S) -> None:
+        """
+        Stop the flusher and write everything still pending, retrying with
+        exponential backoff. If the last attempt fails too, the results
+        still pending are logged and the error is raised.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for attempt in range(attempts):
+            try:
+                self.flush(raise_errors=True)
+                return
+            except SQLAlchemyError:
+                if attempt + 1 == attempts:
+                    with self._condition:
+                        lost = {game_id: update.model_dump() for game_id, update in self._pending.items()}
+                    logger.error("Write-behind buffer stopped with %d game results unwritten: %r", len(lost), lost)
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+
+    def submit(self, game_id: int, game_update: schemas.GameUpdate) -> None:
+        """Queue a game result; wakes the flusher early when the buffer is full."""
+        with self._condition:
+            self._pending[game_id] = game_update
+            if len(self._pending) >= self.max_items:
+                self._condition.notify()
+
+    def get(self, game_id: int) -> Optional[schemas.GameUpdate]:
+        """The result queued for a game, if it has not been written yet."""
+        with self._condition:
+            return self._pending.get(game_id)
+
+    def pending(self) -> int:
+        """Number of results not yet written."""
+        return len(self._pending)
+
+    def flush(self, raise_errors: bool = False) -> int:
+        """
+        Write all pending results in one transaction. Returns the number
+        written. On a database error the results stay pending, and the
+        error is raised if `raise_errors` is set.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            factory = self._session_factory or database.SessionLocal
+            db = factory()
+            try:
+                written = crud.update_games_bulk(db, batch)
+            except SQLAlchemyError:
+                db.rollback()
+                self.errors += 1
+                logger.exception("Write-behind flush of %d game results failed; will retry", len(batch))
+                # Put the batch back unless a newer result arrived meanwhile
+                with self._condition:
+                    for game_id, game_update in batch.items():
+                        self._pending.setdefault(game_id, game_update)
+                if raise_errors:
+                    raise
+                return 0
+            finally:
+                db.close()
+
+            self.flushed += written
+            self.flushes += 1
+            return written
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._stopping and len(self._pending) < self.max_items:
+                    self._condition.wait(self.flush_interval)
+                stopping = self._stopping
+            if stopping:
+                return
+            self.flush()
+
+
+# Shared buffer used by the games router
+score_buffer = ScoreBuffer()
@@ -0,0 +1,21 @@
+"""
+Common setup for the benchmark scripts: puts backend/ on sys.path and
+provides harmless defaults for the settings the app reads at import time.
+Import it before anything from `app`:
+
+    import _env  # noqa: F401
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Only used where the environment does not set them already
+SETTINGS_DEFAULTS = {
+    "DB_HOST": "localhost", "DB_PORT": "3306", "DB_USER": "bench", "DB_PASSWORD": "bench",
+    "DB_NAME": "bench", "APP_NAME": "Snake Game API", "APP_VERSION": "bench", "SECRET_KEY": "bench",
+}
+for key, value in SETTINGS_DEFAULTS.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,107 @@
+"""
+Benchmark: rows/second for POST /games/batch versus the per-game
+POST /games/ + PUT /games/{id} round trips it replaces.
+
+Runs the app in-process against a temporary SQLite file by default;
+pass --url to benchmark against MySQL instead.
+
+    python benchmarks/bench_batch.py --games 5000 --batch-size 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import _env  # noqa: F401  (sys.path and settings defaults)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.database import Base, get_db
+from app.level_cache import level_cache
+from app.main import app
+
+
+def make_games(count: int, players: int) -> list:
+    """Finished games spread over the players and the first two levels."""
+    return [
+        {
+            "player_id": i % players + 1,
+            "level_id": i % 2 + 1,
+            "score": (i % 40) * 10,
+            "food_eaten": i % 40,
+            "duration_seconds": 30 + i % 90,
+            "completed": i % 7 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch game submission benchmark")
+    parser.add_argument("--url", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--single", type=int, default=500, help="Games to submit one by one for comparison")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = args.url or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = session_factory()
+    for number in (1, 2):
+        crud.create_level(db, schemas.LevelCreate(
+            level_number=number, name=f"Level {number}", speed=200, obstacles_count=0, grid_size=20
+        ))
+    for i in range(args.players):
+        crud.create_player(db, schemas.PlayerCreate(username=f"bench{i}", email=f"bench{i}@example.com"))
+    db.close()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    level_cache.configure(session_factory)
+    client = TestClient(app)
+
+    games = make_games(args.games, args.players)
+    start = time.perf_counter()
+    for offset in range(0, len(games), args.batch_size):
+        response = client.post("/games/batch", json={"games": games[offset:offset + args.batch_size]})
+        response.raise_for_status()
+    batch_rate = len(games) / (time.perf_counter() - start)
+
+    singles = make_games(args.single, args.players)
+    start = time.perf_counter()
+    for game in singles:
+        created = client.post("/games/", json={"player_id": game["player_id"], "level_id": game["level_id"]})
+        created.raise_for_status()
+        client.put(f"/games/{created.json()['id']}", json={
+            key: game[key] for key in ("score", "food_eaten", "duration_seconds", "completed")
+        }).raise_for_status()
+    single_rate = len(singles) / (time.perf_counter() - start)
+
+    print(f"{url.split('://')[0]}: {args.games} games in batches of {args.batch_size}")
+    print(f"  batch:      {batch_rate:10.0f} rows/s")
+    print(f"  per game:   {single_rate:10.0f} rows/s ({args.single} games, POST + PUT)")
+    print(f"  speed-up:   {batch_rate / single_rate:.1f}x")
+
+    app.dependency_overrides.clear()
+    Base.metadata.drop_all(bind=engine)
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: statements and latency per game creation, before and after
+the single-INSERT path.
+
+"before" replays the previous flow (SELECT player, SELECT level, INSERT,
+COMMIT, SELECT to refresh); "after" is crud.create_game. Statements are
+counted with a before_cursor_execute hook (COMMIT is counted separately).
+
+    python benchmarks/bench_create_game.py --games 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import _env  # noqa: F401  (sys.path and settings defaults)
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.database import Base
+
+
+def legacy_create_game(db, game: schemas.GameCreate) -> models.Game:
+    """The game creation flow before the single-INSERT change."""
+    if crud.get_player(db, game.player_id) is None or crud.get_level(db, game.level_id) is None:
+        raise LookupError("not found")
+    db_game = models.Game(player_id=game.player_id, level_id=game.level_id)
+    db.add(db_game)
+    crud._bump_player_stats(db, game.player_id, games_delta=1, level_id=game.level_id)
+    db.commit()
+    db.refresh(db_game)
+    return db_game
+
+
+def measure(session_factory, engine, fn, count: int, players: int) -> dict:
+    """Create `count` games with `fn`; return statements/commits per game and latency."""
+    counters = {"statements": 0, "commits": 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counters["statements"] += 1
+
+    def on_commit(conn):
+        counters["commits"] += 1
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    latencies = []
+    db = session_factory()
+    try:
+        for i in range(count):
+            game = schemas.GameCreate(player_id=i % players + 1, level_id=1)
+            start = time.perf_counter()
+            fn(db, game)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(engine, "commit", on_commit)
+
+    latencies.sort()
+    return {
+        "statements": counters["statements"] / count,
+        "commits": counters["commits"] / count,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Game creation round-trip benchmark")
+    parser.add_argument("--url", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = args.url or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    engine = create_engine(url)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = session_factory()
+    crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Beginner", speed=200, obstacles_count=0, grid_size=20
+    ))
+    for i in range(args.players):
+        crud.create_player(db, schemas.PlayerCreate(username=f"bench{i}", email=f"bench{i}@example.com"))
+    db.close()
+
+    print(f"{url.split('://')[0]}: {args.games} games per variant")
+    print(f"  {'variant':<8} {'stmts/req':>10} {'commits':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, fn in (("before", legacy_create_game), ("after", crud.create_game)):
+        result = measure(session_factory, engine, fn, args.games, args.players)
+        print(
+            f"  {name:<8} {result['statements']:>10.2f} {result['commits']:>8.2f}"
+            f" {result['p50']:>8.3f} {result['p95']:>8.3f}"
+        )
+
+    Base.metadata.drop_all(bind=engine)
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
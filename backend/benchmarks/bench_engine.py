@@ -0,0 +1,61 @@
+"""
+Benchmark: replays verified per second by the headless snake engine.
+
+Records a set of runs with a simple food-seeking autopilot, then
+re-simulates every run from its seed and move log on a single core.
+
+    python benchmarks/bench_engine.py --replays 2000 --ticks 1000
+"""
+import argparse
+import time
+
+import _env  # noqa: F401  (sys.path and settings defaults)
+
+from app.engine import DOWN, EMPTY, LEFT, RIGHT, UP, SnakeGame, verify
+
+
+def record(cols: int, rows: int, obstacles: int, seed: int, max_ticks: int) -> tuple:
+    """Play one run with the autopilot; returns (moves, ticks, score, food_eaten)."""
+    game = SnakeGame(cols, rows, obstacles, seed)
+    moves = []
+    for tick in range(max_ticks):
+        hx, hy = game.position(game.snake[0])
+        fx, fy = game.position(game.food)
+        for direction in (RIGHT if fx > hx else LEFT, DOWN if fy > hy else UP, UP, DOWN, LEFT, RIGHT):
+            if game.board[game.snake[0] + game.offsets[direction]] == EMPTY:
+                if direction != game.direction:
+                    moves.append((tick, direction))
+                    game.turn(direction)
+                break
+        if not game.step():
+            break
+    return moves, game.ticks, game.score, game.food_eaten
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snake engine replay verification benchmark")
+    parser.add_argument("--replays", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=1000, help="Maximum ticks per run")
+    parser.add_argument("--grid", type=int, default=20)
+    parser.add_argument("--obstacles", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [
+        (seed, *record(args.grid, args.grid, args.obstacles, seed, args.ticks))
+        for seed in range(args.replays)
+    ]
+    total_ticks = sum(run[2] for run in runs)
+
+    start = time.perf_counter()
+    for seed, moves, ticks, score, food_eaten in runs:
+        if not verify(args.grid, args.grid, args.obstacles, seed, moves, ticks, score, food_eaten):
+            raise SystemExit(f"replay {seed} failed verification")
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.replays} replays on a {args.grid}x{args.grid} grid, {total_ticks / args.replays:.0f} ticks on average")
+    print(f"  replays/s:  {args.replays / elapsed:10.0f}")
+    print(f"  ticks/s:    {total_ticks / elapsed:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: FastAPI's response_model serialization versus the FAST_JSON
+path (rows copied straight to JSON bytes, no re-validation) for list
+endpoints.
+
+For 100- and 1000-item pages of /players/ and /games/player/{id}/history
+it times serialization alone (the ORM objects loaded once, then turned
+into response bytes by each path) and whole requests through the app.
+Both paths must produce identical bytes. Uses a temporary SQLite file by
+default; pass --url to benchmark against MySQL instead.
+
+    python benchmarks/bench_serialization.py --repeat 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import _env  # noqa: F401  (sys.path and settings defaults)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, fast_json, schemas
+from app.config import get_settings
+from app.database import Base, get_db
+from app.level_cache import level_cache
+from app.main import app
+
+PAGE_SIZES = (100, 1000)
+
+
+def seed(session_factory, count: int) -> int:
+    """Create `count` players and `count` finished games for the first one."""
+    db = session_factory()
+    level = crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Beginner", speed=200, obstacles_count=0, grid_size=20
+    ))
+    crud.bulk_create_players(db, [
+        {"username": f"bench{i}", "email": f"bench{i}@example.com"} for i in range(count)
+    ])
+    player_id = crud.get_player_by_username(db, "bench0").id
+    crud.create_games_batch(db, [
+        schemas.GameBatchItem(player_id=player_id, level_id=level.id,
+                              score=i, food_eaten=i, duration_seconds=60)
+        for i in range(count)
+    ])
+    db.close()
+    return player_id
+
+
+def route_field(path: str):
+    """The response_model field FastAPI serializes a GET route's result with."""
+    for route in app.routes:
+        if getattr(route, "path", None) == path and "GET" in route.methods:
+            return route.secure_cloned_response_field
+    raise LookupError(path)
+
+
+def default_bytes(field, items) -> bytes:
+    content = asyncio.run(serialize_response(field=field, response_content=items, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def timed(function, repeat: int) -> float:
+    """Mean milliseconds per call."""
+    function()  # Warm up (and build the field plans)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--url", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = args.url or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    level_cache.configure(session_factory)
+    player_id = seed(session_factory, max(PAGE_SIZES))
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    settings = get_settings()
+
+    endpoints = [
+        ("/players/", "/players/?limit={n}", schemas.PlayerResponse,
+         lambda db, n: crud.get_players(db, limit=n)),
+        ("/games/player/{player_id}/history", f"/games/player/{player_id}/history?limit={{n}}",
+         schemas.GameDetailResponse,
+         lambda db, n: crud.get_player_games(db, player_id, limit=n)),
+    ]
+
+    print(f"{'endpoint':<36} {'items':>5}   {'serialize ms':>22}   {'request ms':>22}")
+    print(f"{'':<36} {'':>5}   {'default':>9} {'fast':>7} {'x':>4}   {'default':>9} {'fast':>7} {'x':>4}")
+    db = session_factory()
+    for route_path, url_template, schema, load in endpoints:
+        field = route_field(route_path)
+        for n in PAGE_SIZES:
+            items = load(db, n)
+            assert default_bytes(field, items) == fast_json.json_response(schema, items, many=True).body
+
+            default_ms = timed(lambda: default_bytes(field, items), args.repeat)
+            fast_ms = timed(lambda: fast_json.json_response(schema, items, many=True).body, args.repeat)
+
+            path = url_template.format(n=n)
+            settings.FAST_JSON = False
+            request_default_ms = timed(lambda: client.get(path).raise_for_status(), args.repeat)
+            settings.FAST_JSON = True
+            request_fast_ms = timed(lambda: client.get(path).raise_for_status(), args.repeat)
+            settings.FAST_JSON = False
+
+            print(f"{route_path:<36} {n:>5}   {default_ms:9.2f} {fast_ms:7.2f} {default_ms / fast_ms:4.1f}"
+                  f"   {request_default_ms:9.2f} {request_fast_ms:7.2f} {request_default_ms / request_fast_ms:4.1f}")
+    db.close()
+
+    app.dependency_overrides.clear()
+    engine.dispose()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: GET /leaderboard/ across several uvicorn workers, from the
+database versus from the shared-memory snapshot (LEADERBOARD_SHM_ENABLED).
+
+Starts uvicorn on a temporary SQLite file (as loadtest.py does) once per
+mode, seeds PLAYERS players with finished games, then sends REQUESTS
+leaderboard reads, CONCURRENCY at a time, while a writer keeps changing
+scores. Reports throughput and latency percentiles per mode.
+
+    python benchmarks/bench_shared_leaderboard.py
+    WORKERS=4 REQUESTS=20000 python benchmarks/bench_shared_leaderboard.py
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+from loadtest import free_port, percentile, start_server, wait_until_up
+
+WORKERS = int(os.environ.get("WORKERS", 3))
+PLAYERS = int(os.environ.get("PLAYERS", 2000))
+REQUESTS = int(os.environ.get("REQUESTS", 5000))
+CONCURRENCY = int(os.environ.get("CONCURRENCY", 32))
+
+
+async def seed(client: httpx.AsyncClient) -> list:
+    """Players with one finished game each; returns the games to update."""
+    players = []
+    for start in range(0, PLAYERS, 1000):
+        response = await client.post("/players/bulk", json={"players": [
+            {"username": f"shm_{number}", "email": f"shm_{number}@example.com"}
+            for number in range(start, min(PLAYERS, start + 1000))
+        ]})
+        response.raise_for_status()
+    cursor = None
+    while True:
+        params = {"limit": 500, "cursor": cursor} if cursor else {"limit": 500}
+        page = (await client.get("/players/page", params=params)).json()
+        players.extend(player["id"] for player in page["items"])
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    rng = random.Random(1)
+    games = []
+    for start in range(0, len(players), 500):
+        response = await client.post("/games/batch", json={"games": [
+            {"player_id": player_id, "level_id": 1, "score": rng.randrange(10, 5000),
+             "food_eaten": 1, "duration_seconds": 10}
+            for player_id in players[start:start + 500]
+        ]})
+        response.raise_for_status()
+        games.extend(item["id"] for item in response.json()["items"] if item.get("id"))
+    return games
+
+
+async def writer(client: httpx.AsyncClient, games: list, stop: asyncio.Event) -> None:
+    rng = random.Random(2)
+    while not stop.is_set():
+        await client.put(f"/games/{rng.choice(games)}", json={
+            "score": rng.randrange(10, 10000), "food_eaten": 1, "duration_seconds": 10
+        })
+        await asyncio.sleep(0.01)
+
+
+async def run(base_url: str, games: list = None) -> tuple:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        if games is None:
+            games = await seed(client)
+        stop = asyncio.Event()
+        background = asyncio.create_task(writer(client, games, stop))
+        await asyncio.sleep(1.5)  # Let the shared snapshot be written
+
+        latencies = []
+        remaining = iter(range(REQUESTS))
+
+        async def reader():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get("/leaderboard/", params={"limit": 10})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(reader() for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await background
+    latencies.sort()
+    return games, REQUESTS / elapsed, latencies
+
+
+def main() -> int:
+    games = None
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{directory}/bench.db"
+        for shared in (False, True):
+            os.environ["LEADERBOARD_SHM_ENABLED"] = str(shared).lower()
+            os.environ["LEADERBOARD_SHM_NAME"] = f"snake_bench_{os.getpid()}"
+            port = free_port()
+            server = start_server(url, port, WORKERS)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                asyncio.run(wait_until_up(base_url, server))
+                games, throughput, latencies = asyncio.run(run(base_url, games))
+            finally:
+                server.terminate()
+                server.wait()
+            print(
+                f"  {'shared memory' if shared else 'database':>13}: {throughput:7.0f} req/s  "
+                f"p50 {percentile(latencies, 0.5):6.2f} ms  p99 {percentile(latencies, 0.99):6.2f} ms"
+            )
+        os.environ["LEADERBOARD_SHM_ENABLED"] = "true"
+        from app.shared_leaderboard import shared_leaderboard
+        shared_leaderboard.attach()
+        shared_leaderboard.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark: fan-out of /ws/leaderboard to many subscribers.
+
+Starts uvicorn on a temporary SQLite file (as loadtest.py does), connects
+SUBSCRIBERS clients that read every message and STALLED clients that
+never read, then pushes UPDATES score changes into the top N. Reports
+how long the readers waited for each diff after the write returned, and
+how many leaderboard reads the server did for all of them.
+
+    python benchmarks/bench_ws_leaderboard.py
+    SUBSCRIBERS=1000 STALLED=50 UPDATES=100 python benchmarks/bench_ws_leaderboard.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+import websockets
+
+from loadtest import free_port, percentile, start_server, wait_until_up
+
+SUBSCRIBERS = int(os.environ.get("SUBSCRIBERS", 500))
+STALLED = int(os.environ.get("STALLED", 20))
+UPDATES = int(os.environ.get("UPDATES", 50))
+
+
+async def reader(url: str, ready: asyncio.Event, received: list, ready_count: list) -> None:
+    async with websockets.connect(url, max_size=None) as websocket:
+        await websocket.recv()  # Snapshot
+        ready_count[0] += 1
+        if ready_count[0] == SUBSCRIBERS:
+            ready.set()
+        async for _ in websocket:
+            received.append(time.perf_counter())
+
+
+async def stalled(url: str, stop: asyncio.Event) -> None:
+    # Never reads: once its small buffer is full, only TCP buffers are left
+    async with websockets.connect(url, max_queue=1):
+        await stop.wait()
+
+
+async def run(base_url: str) -> None:
+    ws_url = base_url.replace("http", "ws") + "/ws/leaderboard"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        game_ids = []
+        for number in range(12):
+            player = (await client.post("/players/", json={
+                "username": f"ws_bench_{number}", "email": f"ws_bench_{number}@example.com"
+            })).json()
+            game = (await client.post("/games/", json={"player_id": player["id"], "level_id": 1})).json()
+            game_ids.append(game["id"])
+
+        stop, ready = asyncio.Event(), asyncio.Event()
+        tasks = [asyncio.create_task(stalled(ws_url, stop)) for _ in range(STALLED)]
+        received = [[] for _ in range(SUBSCRIBERS)]
+        ready_count = [0]
+        tasks += [asyncio.create_task(reader(ws_url, ready, received[n], ready_count)) for n in range(SUBSCRIBERS)]
+        await asyncio.wait_for(ready.wait(), timeout=60)
+
+        delays = []
+        for update in range(UPDATES):
+            before = [len(times) for times in received]
+            score = 1000 + 10 * update
+            written = time.perf_counter()
+            await client.put(f"/games/{game_ids[update % len(game_ids)]}", json={
+                "score": score, "food_eaten": score // 10, "duration_seconds": 60
+            })
+            deadline = time.perf_counter() + 5
+            while any(len(times) == count for times, count in zip(received, before)):
+                if time.perf_counter() > deadline:
+                    raise SystemExit("Some subscribers got no diff within 5s")
+                await asyncio.sleep(0.001)
+            delays.extend((times[count] - written) * 1000 for times, count in zip(received, before))
+
+        metrics = (await client.get("/metrics")).text
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    delays.sort()
+    print(f"  {SUBSCRIBERS} readers + {STALLED} stalled clients, {UPDATES} top-N updates")
+    print(
+        f"  diff delivered after the write: p50 {percentile(delays, 0.5):.1f} ms, "
+        f"p95 {percentile(delays, 0.95):.1f} ms, p99 {percentile(delays, 0.99):.1f} ms"
+    )
+    background = [line for line in metrics.splitlines()
+                  if line.startswith("db_statements_total") and "(background)" in line]
+    print(f"  leaderboard reads outside requests: {background or 'none'}")
+
+
+def main() -> int:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(f"sqlite:///{directory}/bench.db", port, workers=1)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_until_up(base_url, server))
+            asyncio.run(run(base_url))
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+Load test: virtual players running the frontend's call sequence against
+a real uvicorn server.
+
+Each virtual player follows frontend/game.js:
+    createPlayer (first session) or loginPlayer (later sessions)
+    getLevels
+    per game: createGame, updateGame, uploadReplay, getLeaderboard
+Scores come with genuine replays, recorded beforehand by an autopilot on
+the server's own engine, so uploadReplay exercises the full verification.
+
+By default a uvicorn server is started on a temporary SQLite file,
+initialised with init_db.py. Pass --url to start it on another database
+instead (e.g. a local MySQL), or --base-url to load a server that is
+already running. Reports p50/p95/p99 latency and throughput per call and
+writes them as JSON (--out); --baseline compares against an earlier file.
+
+    python benchmarks/loadtest.py --players 200 --concurrency 50 --out results.json
+    python benchmarks/loadtest.py --players 200 --concurrency 50 --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from _env import BACKEND_DIR, SETTINGS_DEFAULTS
+
+import httpx
+
+from app import replay
+from app.engine import DOWN, EMPTY, LEFT, RIGHT, UP, SnakeGame, duration_seconds
+
+# Calls in the order the frontend makes them (named like its functions)
+CALLS = ("createPlayer", "loginPlayer", "getLevels", "createGame", "updateGame", "uploadReplay", "getLeaderboard")
+
+# Settings the server needs; harmless defaults for a local run
+SERVER_ENV = SETTINGS_DEFAULTS
+
+
+# ========== Recorded runs ==========
+
+def record_run(level, seed: int, max_ticks: int) -> dict:
+    """Play one game with a food-seeking autopilot; returns what the frontend would send."""
+    game = SnakeGame.from_level(level, seed)
+    moves = []
+    for tick in range(max_ticks):
+        hx, hy = game.position(game.snake[0])
+        fx, fy = game.position(game.food)
+        for direction in (RIGHT if fx > hx else LEFT, DOWN if fy > hy else UP, UP, DOWN, LEFT, RIGHT):
+            if game.board[game.snake[0] + game.offsets[direction]] == EMPTY:
+                if direction != game.direction:
+                    moves.append((tick, direction))
+                    game.turn(direction)
+                break
+        if not game.step():
+            break
+    return {
+        "score": game.score,
+        "food_eaten": game.food_eaten,
+        "duration_seconds": duration_seconds(level, game.ticks),
+        "replay": replay.encode(seed, game.cols, game.rows, game.ticks, moves),
+    }
+
+
+def record_runs(levels: List[dict], per_level: int, rng: random.Random) -> Dict[int, List[dict]]:
+    """A pool of runs for every level, keyed by level ID."""
+    runs = {}
+    for level in levels:
+        spec = SimpleNamespace(**level)
+        runs[level["id"]] = [
+            record_run(spec, rng.getrandbits(32), rng.randint(50, 1500)) for _ in range(per_level)
+        ]
+    return runs
+
+
+# ========== Virtual players ==========
+
+class Recorder:
+    """Latency samples and failures per call."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {call: [] for call in CALLS}
+        self.errors: Dict[str, Dict[str, int]] = {call: {} for call in CALLS}
+
+    async def call(self, name: str, request) -> Optional[httpx.Response]:
+        """Time one request; returns the response, or None if it failed."""
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as error:
+            failure = type(error).__name__
+            response = None
+        else:
+            failure = None if response.is_success else str(response.status_code)
+        self.samples[name].append((time.perf_counter() - start) * 1000)
+        if failure is not None:
+            self.errors[name][failure] = self.errors[name].get(failure, 0) + 1
+            return None
+        return response
+
+
+async def virtual_player(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    number: int,
+    args,
+    runs: Dict[int, List[dict]],
+    rng: random.Random
+) -> None:
+    """One player's sessions, exactly as the browser makes the calls."""
+    username = f"{args.prefix}{number}"
+
+    async def think():
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+
+    for session in range(args.sessions):
+        if session == 0:
+            response = await recorder.call("createPlayer", client.post(
+                "/players/", json={"username": username, "email": f"{username}@example.com"}
+            ))
+        else:
+            response = await recorder.call("loginPlayer", client.get(f"/players/username/{username}"))
+        if response is None:
+            return
+        player_id = response.json()["id"]
+
+        response = await recorder.call("getLevels", client.get("/levels/"))
+        if response is None:
+            return
+        levels = response.json()
+        await think()
+
+        for _ in range(args.games):
+            level = rng.choice(levels)
+            response = await recorder.call("createGame", client.post(
+                "/games/", json={"player_id": player_id, "level_id": level["id"]}
+            ))
+            if response is None:
+                continue
+            game_id = response.json()["id"]
+            run = rng.choice(runs[level["id"]])
+            await think()
+
+            response = await recorder.call("updateGame", client.put(f"/games/{game_id}", json={
+                "score": run["score"],
+                "food_eaten": run["food_eaten"],
+                "duration_seconds": run["duration_seconds"],
+                "completed": False
+            }))
+            if response is not None:
+                await recorder.call("uploadReplay", client.put(
+                    f"/games/{game_id}/replay",
+                    content=run["replay"],
+                    headers={"Content-Type": "application/octet-stream"}
+                ))
+            await recorder.call("getLeaderboard", client.get("/leaderboard/", params={"limit": 10}))
+            await think()
+
+
+# ========== Server ==========
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(url: str, port: int, workers: int) -> subprocess.Popen:
+    """Initialise the database with init_db.py and start uvicorn on it."""
+    env = {**SERVER_ENV, **os.environ, "DATABASE_URL": url}
+    subprocess.run(
+        [sys.executable, "init_db.py"], cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+    if url.startswith("sqlite"):
+        # Readers no longer wait for writers; the setting is stored in the file
+        with closing(sqlite3.connect(url.split(":///", 1)[1])) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env
+    )
+
+
+async def wait_until_up(base_url: str, server: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            if server.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            try:
+                if (await client.get("/health")).is_success:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit(f"Server at {base_url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.1)
+
+
+# ========== Report ==========
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(samples: List[float], errors: Dict[str, int], elapsed: float) -> dict:
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: dict, baseline: Optional[dict]) -> None:
+    print(f"{'call':<16} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'p95 vs base':>12} {'req/s vs base':>14}" if baseline else ""))
+    for name, stats in [*results["calls"].items(), ("total", results["total"])]:
+        line = (f"{name:<16} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput_rps']:>8.1f}"
+                f" {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+        before = baseline["calls"].get(name) if baseline and name != "total" else (baseline or {}).get("total")
+        if before and before["p95_ms"] and before["throughput_rps"]:
+            line += (f" {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:>+11.1f}%"
+                     f" {(stats['throughput_rps'] / before['throughput_rps'] - 1) * 100:>+13.1f}%")
+        print(line)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    server = None
+    tmpdir = None
+    base_url = args.base_url
+    if base_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = args.url or f"sqlite:///{os.path.join(tmpdir.name, 'loadtest.db')}"
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"🚀 Starting uvicorn ({args.workers} worker(s)) on {url.split('@')[-1]}...")
+        server = start_server(url, port, args.workers)
+
+    try:
+        if server is not None:
+            await wait_until_up(base_url, server)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            levels = (await client.get("/levels/")).raise_for_status().json()
+            print(f"🎮 Recording {args.runs_per_level} autopilot runs for each of {len(levels)} levels...")
+            runs = record_runs(levels, args.runs_per_level, rng)
+
+            print(f"🏃 {args.players} players, {args.concurrency} at a time, "
+                  f"{args.sessions} session(s) x {args.games} game(s) each...")
+            recorder = Recorder()
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one(number: int) -> None:
+                async with semaphore:
+                    await virtual_player(client, recorder, number, args, runs, random.Random(rng.random()))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(number) for number in range(args.players)))
+            elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    all_errors: Dict[str, int] = {}
+    for name in CALLS:
+        for kind, count in recorder.errors[name].items():
+            all_errors[kind] = all_errors.get(kind, 0) + count
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "target": args.base_url or (args.url.split("@")[-1] if args.url else "sqlite (temporary)"),
+            "workers": None if args.base_url else args.workers,
+            "players": args.players,
+            "concurrency": args.concurrency,
+            "sessions": args.sessions,
+            "games": args.games,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+            "duration_s": round(elapsed, 3),
+        },
+        "calls": {
+            name: summarize(recorder.samples[name], recorder.errors[name], elapsed)
+            for name in CALLS if recorder.samples[name]
+        },
+        "total": summarize(
+            [sample for name in CALLS for sample in recorder.samples[name]], all_errors, elapsed
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test replaying the frontend's call sequence")
+    parser.add_argument("--base-url", help="Load this running server instead of starting uvicorn")
+    parser.add_argument("--url", help="Database for the started server (default: temporary SQLite file)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--players", type=int, default=200, help="Virtual players in total")
+    parser.add_argument("--concurrency", type=int, default=50, help="Players active at once")
+    parser.add_argument("--sessions", type=int, default=2, help="Sessions per player (register, then log in)")
+    parser.add_argument("--games", type=int, default=3, help="Games per session")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a player's steps")
+    parser.add_argument("--runs-per-level", type=int, default=20, help="Distinct recorded runs per level")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--prefix", default=None, help="Username prefix (default: unique per run)")
+    parser.add_argument("--out", default="loadtest_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    if args.prefix is None:
+        args.prefix = f"lt{int(time.time()) % 100000}_"
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
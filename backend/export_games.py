@@ -0,0 +1,55 @@
+"""
+Script to export games, with their player and level, as NDJSON or CSV.
+Rows are read through a server-side cursor and written as they arrive,
+so memory use stays flat regardless of the number of games. Progress
+goes to stderr, so the export itself can go to stdout.
+
+    python export_games.py games.ndjson --start 2024-01-01 --level 5
+    python export_games.py - --format csv | gzip > games.csv.gz
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from app import crud, export
+from app.database import SessionLocal
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export games as NDJSON or CSV")
+    parser.add_argument("path", help="Output file ('-' for stdout)")
+    parser.add_argument("--format", choices=sorted(export.FORMATS), default="ndjson")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Only games created at or after this time")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Only games created before this time")
+    parser.add_argument("--level", type=int, help="Only games on this level number")
+    parser.add_argument("--batch-size", type=int, default=export.DEFAULT_BATCH_SIZE, help="Rows fetched at a time")
+    args = parser.parse_args()
+
+    query = crud.game_export_query(start=args.start, end=args.end, level_number=args.level)
+    rows = 0
+    db = SessionLocal()
+    start = time.perf_counter()
+    print(f"📤 Exporting games as {args.format} to {args.path}...", file=sys.stderr)
+    try:
+        with (sys.stdout.buffer if args.path == "-" else open(args.path, "wb")) as out:
+            for number, chunk in enumerate(export.iter_export(db, query, args.format, args.batch_size)):
+                out.write(chunk)
+                if number == 0:
+                    continue  # The header
+                rows += chunk.count(b"\n")
+                elapsed = time.perf_counter() - start
+                print(f"  … {rows:,} rows ({rows / elapsed:,.0f} rows/s)", file=sys.stderr)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Exported {rows:,} games in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
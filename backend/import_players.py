@@ -0,0 +1,73 @@
+"""
+Script to bulk-import player accounts from a CSV file.
+The file needs a header row with at least `username` and `email` columns.
+Rows are validated, then inserted in chunks (one executemany and one
+commit per chunk); accounts whose username or email already exists are
+skipped. Memory use stays flat regardless of file size.
+
+    python import_players.py players.csv --chunk-size 5000
+"""
+import argparse
+import csv
+import sys
+import time
+
+from pydantic import ValidationError
+
+from app.database import SessionLocal
+from app import crud, schemas
+
+
+def read_players(path: str, stats: dict):
+    """Yield validated {'username', 'email'} rows, counting invalid ones."""
+    with (sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")) as handle:
+        for row in csv.DictReader(handle):
+            try:
+                player = schemas.PlayerCreate(username=row.get("username"), email=row.get("email"))
+            except ValidationError:
+                stats["invalid"] += 1
+                continue
+            yield {"username": player.username, "email": player.email}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import players from CSV")
+    parser.add_argument("path", help="CSV file with username,email columns ('-' for stdin)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per INSERT/commit")
+    args = parser.parse_args()
+    
+    stats = {"read": 0, "inserted": 0, "invalid": 0}
+    chunk = []
+    db = SessionLocal()
+    start = time.perf_counter()
+    
+    def flush():
+        stats["inserted"] += crud.bulk_create_players(db, chunk, chunk_size=args.chunk_size)
+        chunk.clear()
+        elapsed = time.perf_counter() - start
+        print(f"  … {stats['read']:,} rows read, {stats['inserted']:,} inserted ({stats['read'] / elapsed:,.0f} rows/s)")
+    
+    print(f"👥 Importing players from {args.path}...")
+    try:
+        for row in read_players(args.path, stats):
+            chunk.append(row)
+            stats["read"] += 1
+            if len(chunk) >= args.chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        db.close()
+    
+    elapsed = time.perf_counter() - start
+    skipped = stats["read"] - stats["inserted"]
+    print(
+        f"✅ Imported {stats['inserted']:,} players in {elapsed:.1f}s "
+        f"({stats['read'] / elapsed if elapsed else 0:,.0f} rows/s); "
+        f"{skipped:,} already registered, {stats['invalid']:,} invalid"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
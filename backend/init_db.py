@@ -1,9 +1,10 @@
 """
 Script to initialize the database.
-Creates all tables and initializes the 10 game levels.
+Creates all tables, brings columns and indexes up to date and initializes the 10 game levels.
 """
-from app.database import init_db
+from app.database import engine, init_db
 from app.init_levels import init_levels
+from app.migrations import upgrade_columns, upgrade_indexes
 
 
 if __name__ == '__main__':
@@ -11,4 +12,14 @@ if __name__ == '__main__':
     init_db()
     print('✅ Tables created successfully!')
     print('')
+    print('🧱 Checking columns...')
+    for change in upgrade_columns(engine):
+        print(f'  ✓ {change}')
+    print('✅ Columns up to date!')
+    print('')
+    print('🗂️  Checking indexes...')
+    for change in upgrade_indexes(engine):
+        print(f'  ✓ {change}')
+    print('✅ Indexes up to date!')
+    print('')
     init_levels()
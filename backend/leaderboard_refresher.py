@@ -0,0 +1,55 @@
+"""
+Script to refresh the shared-memory leaderboard as a sidecar.
+Run it next to uvicorn workers started with LEADERBOARD_SHM_ENABLED=true:
+it holds the refresher lock, so the workers only read the segment. If it
+stops, a worker takes over on its next refresh tick. --unlink removes the
+segment once nothing uses it any more.
+
+    python leaderboard_refresher.py
+    python leaderboard_refresher.py --unlink
+"""
+import argparse
+import sys
+import time
+
+from app.config import get_settings
+from app.shared_leaderboard import shared_leaderboard
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Refresh the shared-memory leaderboard")
+    parser.add_argument("--unlink", action="store_true", help="Remove the shared memory segment and exit")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    shared_leaderboard.attach()
+    if args.unlink:
+        shared_leaderboard.unlink()
+        print(f"🧹 Removed shared memory segment {settings.LEADERBOARD_SHM_NAME}")
+        return 0
+
+    print(
+        f"🏆 Refreshing the top {settings.LEADERBOARD_SHM_SIZE} in {settings.LEADERBOARD_SHM_NAME} "
+        f"every {settings.LEADERBOARD_SHM_REFRESH_S}s (Ctrl+C to stop)..."
+    )
+    waiting = False
+    try:
+        while True:
+            start = time.perf_counter()
+            if shared_leaderboard.refresh():
+                if waiting or shared_leaderboard.refreshes == 1:
+                    print("✅ Holding the refresher lock")
+                waiting = False
+            elif not waiting:
+                print("⏳ Another process is refreshing; waiting for the lock...")
+                waiting = True
+            time.sleep(max(0.0, settings.LEADERBOARD_SHM_REFRESH_S - (time.perf_counter() - start)))
+    except KeyboardInterrupt:
+        print(f"👋 Stopped after {shared_leaderboard.refreshes:,} refreshes")
+    finally:
+        shared_leaderboard.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
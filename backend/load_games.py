@@ -0,0 +1,95 @@
+"""
+Script to bulk-load games, for realistic staging data or large test databases.
+Loads an NDJSON or CSV file with the columns written by export_games.py
+(players that do not exist yet are created), or generates synthetic
+players and games. Games are inserted in chunks, one executemany and one
+transaction per chunk, with the games indexes built once at the end;
+player_stats and leaderboard_buckets are then rebuilt.
+
+    python load_games.py games.ndjson
+    python load_games.py - --format csv < games.csv
+    python load_games.py --synthetic --players 10000 --games 1000000 --days 180 --seed 1
+"""
+import argparse
+import sys
+import time
+
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app import bulk_load, crud, models
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load games from a file or a synthetic generator")
+    parser.add_argument("path", nargs="?", help="NDJSON or CSV file ('-' for stdin)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="File format (default: from the extension)")
+    parser.add_argument("--synthetic", action="store_true", help="Generate players and games instead of reading a file")
+    parser.add_argument("--players", type=int, default=1000, help="Synthetic players")
+    parser.add_argument("--games", type=int, default=100000, help="Synthetic games")
+    parser.add_argument("--days", type=int, default=90, help="Synthetic games are spread over this many days")
+    parser.add_argument("--prefix", default="synth_", help="Username prefix of synthetic players")
+    parser.add_argument("--seed", type=int, help="Random seed, for repeatable datasets")
+    parser.add_argument("--chunk-size", type=int, default=bulk_load.DEFAULT_CHUNK_SIZE, help="Rows per INSERT/transaction")
+    parser.add_argument("--keep-indexes", action="store_true", help="Do not drop the games indexes during the load")
+    parser.add_argument("--skip-rollups", action="store_true", help="Do not rebuild player_stats and leaderboard_buckets")
+    args = parser.parse_args()
+    if args.synthetic == (args.path is not None):
+        parser.error("give either a file to load or --synthetic")
+
+    loader = bulk_load.GameLoader(engine, chunk_size=args.chunk_size)
+    start = time.perf_counter()
+
+    if args.synthetic:
+        print(f"👥 Creating {args.players:,} synthetic players...")
+        player_ids = bulk_load.create_synthetic_players(engine, args.players, args.prefix, args.chunk_size)
+        print(f"✅ {len(player_ids):,} players ready")
+        games = bulk_load.synthetic_games(player_ids, args.games, levels=len(loader.level_ids),
+                                          days=args.days, seed=args.seed)
+        source = f"{args.games:,} synthetic games"
+    else:
+        fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        games = bulk_load.read_games(args.path, fmt, loader.stats)
+        source = f"games from {args.path} ({fmt})"
+
+    def progress(stats):
+        elapsed = time.perf_counter() - start
+        print(f"  … {stats['read']:,} rows read, {stats['inserted']:,} inserted ({stats['read'] / elapsed:,.0f} rows/s)")
+
+    print(f"🎮 Loading {source}...")
+    table = models.Game.__table__
+    if args.keep_indexes:
+        stats = loader.load(games, progress)
+    else:
+        with bulk_load.deferred_indexes(engine, table) as names:
+            print(f"🗂️  Deferring indexes: {', '.join(names) or 'none'}")
+            stats = loader.load(games, progress)
+            loaded = time.perf_counter()
+            print("🗂️  Rebuilding indexes...")
+        print(f"✅ Indexes rebuilt in {time.perf_counter() - loaded:.1f}s")
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Loaded {stats['inserted']:,} games in {elapsed:.1f}s "
+        f"({stats['inserted'] / elapsed if elapsed else 0:,.0f} rows/s); "
+        f"{stats['players_created']:,} players created, {stats['invalid']:,} invalid rows"
+    )
+    print(f"📈 The games table now holds {bulk_load.count_games(engine):,} games")
+
+    if not args.skip_rollups:
+        db = SessionLocal()
+        try:
+            print("📊 Rebuilding player_stats and leaderboard_buckets...")
+            players = crud.rebuild_player_stats(db)
+            buckets = crud.rebuild_leaderboard_buckets(db)
+            settings = get_settings()
+            buckets -= crud.prune_leaderboard_buckets(
+                db, keep_days=settings.LEADERBOARD_KEEP_DAYS, keep_weeks=settings.LEADERBOARD_KEEP_WEEKS
+            )
+            print(f"✅ Rollups rebuilt ({players:,} players, {buckets:,} buckets)")
+        finally:
+            db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Script to rebuild or verify the leaderboard rollups (player_stats and
+the windowed leaderboard_buckets).
+Run it once after upgrading an existing database, or with --check
+to compare player_stats against a full aggregation over the games table.
+"""
+import argparse
+import sys
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app import crud
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report differences, do not rewrite the table"
+    )
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        if args.check:
+            mismatches = crud.check_player_stats(db)
+            for mismatch in mismatches:
+                print(
+                    f"  ✗ Player {mismatch['player_id']}: "
+                    f"expected {mismatch['expected']}, found {mismatch['actual']}"
+                )
+            if mismatches:
+                print(f"❌ {len(mismatches)} player_stats rows are inconsistent")
+                return 1
+            print("✅ player_stats is consistent with the games table")
+            return 0
+        
+        print("📊 Rebuilding player_stats from the games table...")
+        count = crud.rebuild_player_stats(db)
+        print(f"✅ player_stats rebuilt ({count} players)")
+        print("📅 Rebuilding leaderboard_buckets from finished games...")
+        count = crud.rebuild_leaderboard_buckets(db)
+        settings = get_settings()
+        count -= crud.prune_leaderboard_buckets(
+            db, keep_days=settings.LEADERBOARD_KEEP_DAYS, keep_weeks=settings.LEADERBOARD_KEEP_WEEKS
+        )
+        print(f"✅ leaderboard_buckets rebuilt ({count} buckets)")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,25 @@
 """
 Integration tests for API endpoints.
 """
+import asyncio
+import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
+from app.config import get_settings
 from app.database import Base, get_db
 from app.init_levels import init_levels
+from app.leaderboard_feed import Subscriber, leaderboard_feed
+from app.level_cache import level_cache
+from app.metrics import instrument, registry
+from app.rank_index import RankIndex, rank_index
+from app.replicas import LAST_WRITE_HEADER, replicas
+from app.shared_leaderboard import SharedLeaderboard, shared_leaderboard
 
 # Test database
 TEST_DATABASE_URL = "sqlite:///./test_api.db"
@@ -27,6 +38,11 @@ def override_get_db():
 
 # Override dependency
 app.dependency_overrides[get_db] = override_get_db
+level_cache.configure(TestingSessionLocal)
+rank_index.configure(TestingSessionLocal)
+leaderboard_feed.configure(TestingSessionLocal)
+shared_leaderboard.configure(TestingSessionLocal)
+instrument(engine)
 
 # Test client
 client = TestClient(app)
@@ -42,6 +58,8 @@ def setup_database():
     db.close()
     yield
     Base.metadata.drop_all(bind=engine)
+    level_cache.invalidate()
+    rank_index.invalidate()
 
 
 def init_levels_test(db):
@@ -69,6 +87,15 @@ def test_root():
     assert "version" in data
 
 
+def test_pool_status():
+    """Test the connection pool statistics endpoint."""
+    response = client.get("/health/pool")
+    assert response.status_code == 200
+    status = response.json()[0]
+    assert status["engine"] == "sync"
+    assert status["pre_ping"] == get_settings().DB_POOL_PRE_PING
+
+
 def test_health_check():
     """Test health check endpoint."""
     response = client.get("/health")
@@ -107,6 +134,23 @@ def test_create_player_duplicate_email():
     assert "Email already registered" in response.json()["detail"]
 
 
+def test_create_players_bulk():
+    """Test bulk import skipping already registered usernames and emails."""
+    client.post("/players/", json={"username": "existing", "email": "existing@test.com"})
+    players = [
+        {"username": "bulk1", "email": "bulk1@test.com"},
+        {"username": "existing", "email": "new@test.com"},
+        {"username": "bulk2", "email": "existing@test.com"},
+        {"username": "bulk3", "email": "bulk3@test.com"},
+        {"username": "bulk3", "email": "bulk3-again@test.com"},
+    ]
+    
+    response = client.post("/players/bulk", json={"players": players})
+    assert response.status_code == 201
+    assert response.json() == {"received": 5, "inserted": 2, "skipped": 3}
+    assert len(client.get("/players/").json()) == 3
+
+
 def test_get_player():
     """Test getting a player by ID."""
     # Create player
@@ -141,6 +185,71 @@ def test_list_players():
     assert len(data) == 2
 
 
+def test_list_players_cursor_pages():
+    """Test walking the player list with keyset cursors."""
+    for i in range(5):
+        client.post("/players/", json={"username": f"page{i}", "email": f"page{i}@test.com"})
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/players/page", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(player["username"] for player in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert seen == [f"page{i}" for i in range(5)]
+
+
+def test_get_player_rank(monkeypatch):
+    """Test a player's rank with the neighbours above and below."""
+    ids = []
+    for name, score in (("first", 300), ("second", 200), ("third", 100)):
+        player_id = client.post("/players/", json={"username": name, "email": f"{name}@test.com"}).json()["id"]
+        game_id = client.post("/games/", json={"player_id": player_id, "level_id": 1}).json()["id"]
+        client.put(f"/games/{game_id}", json={"score": score, "food_eaten": score // 10, "duration_seconds": 10})
+        ids.append(player_id)
+    newcomer = client.post("/players/", json={"username": "newcomer", "email": "new@test.com"}).json()["id"]
+    
+    response = client.get(f"/players/{ids[1]}/rank")
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["rank"], data["total_score"], data["ranked_players"]) == (2, 200, 3)
+    assert data["above"] == {"player_id": ids[0], "username": "first", "rank": 1, "total_score": 300}
+    assert data["below"]["username"] == "third"
+    
+    assert client.get(f"/players/{newcomer}/rank").json()["rank"] is None
+    assert client.get("/players/9999/rank").status_code == 404
+    
+    # Lookups, which reload a cold or invalidated index, run off the event loop
+    on_loop = []
+    
+    def rank(player_id):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return RankIndex.rank(rank_index, player_id)
+    
+    rank_index.committed(None)
+    monkeypatch.setattr(rank_index, "rank", rank)
+    assert client.get(f"/players/{ids[1]}/rank").json()["rank"] == 2
+    assert on_loop == [False] and rank_index.loaded
+
+
+def test_list_players_invalid_cursor():
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/players/page", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
 # ========== Levels Endpoints Tests ==========
 
 def test_list_levels():
@@ -174,6 +283,34 @@ def test_get_level_by_invalid_number():
     assert response.status_code == 400
 
 
+def test_levels_served_from_cache():
+    """Test that repeated level reads are cache hits."""
+    client.get("/levels/")
+    before = client.get("/levels/cache/stats").json()
+    
+    client.get("/levels/1")
+    client.get("/levels/number/2")
+    after = client.get("/levels/cache/stats").json()
+    
+    assert after["loaded"] is True
+    assert after["size"] == 2
+    assert after["hits"] >= before["hits"] + 2
+    assert after["loads"] == before["loads"]
+
+
+def test_reload_level_cache_requires_admin_key():
+    """Test the admin-only level cache reload."""
+    response = client.post("/levels/cache/reload", headers={"X-Admin-Key": "wrong"})
+    assert response.status_code == 403
+    
+    response = client.post(
+        "/levels/cache/reload",
+        headers={"X-Admin-Key": get_settings().SECRET_KEY}
+    )
+    assert response.status_code == 200
+    assert response.json()["size"] == 2
+
+
 # ========== Games Endpoints Tests ==========
 
 def test_create_game():
@@ -206,6 +343,20 @@ def test_create_game_invalid_player():
     assert response.status_code == 404
 
 
+def test_create_game_invalid_level():
+    """Test creating game with invalid level."""
+    player_id = client.post("/players/", json={"username": "nolevel", "email": "nolevel@test.com"}).json()["id"]
+    response = client.post(
+        "/games/",
+        json={"player_id": player_id, "level_id": 9999}
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Level not found"
+    
+    # The failed insert left nothing behind
+    assert client.get(f"/games/player/{player_id}/history").json() == []
+
+
 def test_update_game():
     """Test updating game results."""
     # Setup
@@ -230,6 +381,105 @@ def test_update_game():
     assert data["completed"] is True
 
 
+def test_create_games_batch():
+    """Test submitting finished games in one batch with per-item status."""
+    player_id = client.post("/players/", json={"username": "batcher", "email": "batch@test.com"}).json()["id"]
+    games = [
+        {"player_id": player_id, "level_id": 1, "score": 100, "food_eaten": 10, "duration_seconds": 30},
+        {"player_id": 9999, "level_id": 1, "score": 50, "food_eaten": 5, "duration_seconds": 10},
+        {"player_id": player_id, "level_id": 2, "score": 200, "food_eaten": 20, "duration_seconds": 60, "completed": True},
+        {"player_id": player_id, "level_id": 99, "score": 10, "food_eaten": 1, "duration_seconds": 5},
+    ]
+    
+    response = client.post("/games/batch", json={"games": games})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["rejected"] == 2
+    assert [item["status"] for item in data["items"]] == ["created", "rejected", "created", "rejected"]
+    assert data["items"][1]["detail"] == "Player not found"
+    assert data["items"][3]["detail"] == "Level not found"
+    
+    game = client.get(f"/games/{data['items'][2]['id']}").json()
+    assert game["score"] == 200
+    assert game["completed"] is True
+    
+    leaderboard = client.get("/leaderboard/").json()
+    assert leaderboard[0]["total_score"] == 300
+    assert leaderboard[0]["games_played"] == 2
+    assert leaderboard[0]["highest_level"] == 2
+
+
+def test_update_game_write_behind(monkeypatch):
+    """Test that write-behind mode answers from the buffer and writes on flush."""
+    from app.write_behind import score_buffer
+    
+    monkeypatch.setattr(get_settings(), "WRITE_BEHIND_ENABLED", True)
+    score_buffer.configure(session_factory=TestingSessionLocal)
+    player_id = client.post("/players/", json={"username": "behind", "email": "wb@test.com"}).json()["id"]
+    game_id = client.post("/games/", json={"player_id": player_id, "level_id": 1}).json()["id"]
+    
+    response = client.put(
+        f"/games/{game_id}",
+        json={"score": 400, "food_eaten": 40, "duration_seconds": 90, "completed": False}
+    )
+    assert response.status_code == 200
+    assert response.json()["score"] == 400
+    assert client.get(f"/games/{game_id}").json()["score"] == 0
+    assert client.put("/games/9999", json={"score": 1, "food_eaten": 1, "duration_seconds": 1}).status_code == 404
+    
+    assert score_buffer.flush() == 1
+    assert client.get(f"/games/{game_id}").json()["score"] == 400
+    assert client.get("/leaderboard/").json()[0]["total_score"] == 400
+
+
+def test_game_replay_round_trip(monkeypatch):
+    """Test uploading a verified replay and streaming it back."""
+    from app import engine, replay, schemas
+    from app.engine import SnakeGame
+    from tests.test_engine import play
+    
+    player_id = client.post("/players/", json={"username": "replayer", "email": "rp@test.com"}).json()["id"]
+    level = client.get("/levels/2").json()
+    game_id = client.post("/games/", json={"player_id": player_id, "level_id": level["id"]}).json()["id"]
+    # Played on a 30x24 canvas rather than the level's 20x20 grid
+    run = SnakeGame.from_level(schemas.LevelResponse(**level), seed=99, cols=30, rows=24)
+    moves = play(run, 1500)
+    data = replay.encode(99, 30, 24, run.ticks, moves)
+    client.put(f"/games/{game_id}", json={
+        "score": run.score, "food_eaten": run.food_eaten, "duration_seconds": 60, "completed": False
+    })
+    headers = {"Content-Type": "application/octet-stream"}
+    
+    response = client.put(f"/games/{game_id}/replay", content=data, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["move_count"] == len(moves)
+    assert response.json()["size"] == len(data)
+    
+    downloaded = client.get(f"/games/{game_id}/replay")
+    assert downloaded.status_code == 200
+    assert downloaded.content == data
+    
+    # Claiming an extra food is caught by the re-simulation
+    client.put(f"/games/{game_id}", json={
+        "score": run.score + 10, "food_eaten": run.food_eaten + 1, "duration_seconds": 60
+    })
+    assert client.put(f"/games/{game_id}/replay", content=data, headers=headers).status_code == 422
+    assert client.put(f"/games/{game_id}/replay", content=b"junk", headers=headers).status_code == 400
+    assert client.get("/games/9999/replay").status_code == 404
+    
+    # Grids too small for the level's obstacles, more ticks than the
+    # moves allow, and runs longer than REPLAY_MAX_TICKS are rejected
+    # before anything is simulated
+    for bad in (replay.encode(1, 4, 1, 1, []), replay.encode(1, 30, 24, 10 ** 9, moves)):
+        response = client.put(f"/games/{game_id}/replay", content=bad, headers=headers)
+        assert response.status_code == 400
+    monkeypatch.setattr(get_settings(), "REPLAY_MAX_TICKS", run.ticks - 1)
+    monkeypatch.setattr(engine, "simulate", lambda *args: pytest.fail("simulated an over-long replay"))
+    response = client.put(f"/games/{game_id}/replay", content=data, headers=headers)
+    assert response.status_code == 400
+
+
 def test_get_player_games():
     """Test getting player game history."""
     # Setup
@@ -245,6 +495,52 @@ def test_get_player_games():
     assert len(data) == 2
 
 
+def test_get_player_games_cursor_pages():
+    """Test that history pages neither repeat nor skip games created in the same second."""
+    player_id = client.post("/players/", json={"username": "pager", "email": "pager@test.com"}).json()["id"]
+    created = [
+        client.post("/games/", json={"player_id": player_id, "level_id": 1}).json()["id"]
+        for _ in range(5)
+    ]
+    
+    first = client.get(f"/games/player/{player_id}/history/page", params={"limit": 3}).json()
+    # A game recorded between page requests must not shift the next page
+    client.post("/games/", json={"player_id": player_id, "level_id": 2})
+    second = client.get(
+        f"/games/player/{player_id}/history/page",
+        params={"limit": 3, "cursor": first["next_cursor"]}
+    ).json()
+    
+    assert [game["id"] for game in first["items"] + second["items"]] == created[::-1]
+    assert second["next_cursor"] is None
+
+
+def test_export_games(history):
+    """Test streaming the game export as NDJSON and CSV, with filters."""
+    import csv
+    import io
+    import json
+    
+    response = client.get("/games/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 50
+    assert [row["game_id"] for row in rows] == sorted(row["game_id"] for row in rows)
+    assert rows[0]["username"] == "veteran"
+    assert rows[0]["level_name"] == "Beginner"
+    
+    response = client.get("/games/export", params={"format": "csv", "level_number": 2})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 25
+    assert {row["level_number"] for row in rows} == {"2"}
+    assert rows[0]["completed"] == "false"
+    
+    assert client.get("/games/export", params={"start": "2999-01-01T00:00:00"}).text == ""
+    assert client.get("/games/export", params={"level_number": 7}).status_code == 404
+
+
 # ========== Leaderboard Endpoints Tests ==========
 
 def test_get_leaderboard():
@@ -269,5 +565,342 @@ def test_get_leaderboard():
     assert data[0]["rank"] == 1
 
 
+def test_get_leaderboard_windows():
+    """Test the daily, weekly and per-level leaderboards."""
+    p1 = client.post("/players/", json={"username": "daily", "email": "daily@test.com"}).json()
+    p2 = client.post("/players/", json={"username": "weekly", "email": "weekly@test.com"}).json()
+    client.post("/games/batch", json={"games": [
+        {"player_id": p1["id"], "level_id": 1, "score": 300, "food_eaten": 30, "duration_seconds": 60},
+        {"player_id": p2["id"], "level_id": 2, "score": 200, "food_eaten": 20, "duration_seconds": 60},
+    ]})
+    # Started but not finished: on the all-time board only
+    client.post("/games/", json={"player_id": p2["id"], "level_id": 1})
+    
+    day = client.get("/leaderboard/", params={"window": "day"}).json()
+    assert [(e["username"], e["total_score"], e["games_played"]) for e in day] == [("daily", 300, 1), ("weekly", 200, 1)]
+    assert client.get("/leaderboard/", params={"window": "week"}).json() == day
+    level2 = client.get("/leaderboard/", params={"level_number": 2}).json()
+    assert [e["username"] for e in level2] == ["weekly"]
+    assert client.get("/leaderboard/").json()[1]["games_played"] == 2
+    
+    assert client.get("/leaderboard/", params={"level_number": 9}).status_code == 404
+    assert client.get("/leaderboard/", params={"window": "month"}).status_code == 422
+
+
+def test_leaderboard_websocket(monkeypatch):
+    """Test the top-N snapshot on connect and the diffs pushed after score changes."""
+    monkeypatch.setattr(get_settings(), "LEADERBOARD_WS_TOP_N", 2)
+    monkeypatch.setattr(get_settings(), "LEADERBOARD_WS_MIN_INTERVAL_MS", 0)
+    games = {}
+    for username, score in (("gold", 300), ("silver", 200), ("bronze", 100)):
+        player = client.post("/players/", json={"username": username, "email": f"{username}@test.com"}).json()
+        games[username] = client.post("/games/", json={"player_id": player["id"], "level_id": 1}).json()["id"]
+        client.put(f"/games/{games[username]}", json={"score": score, "food_eaten": 1, "duration_seconds": 1})
+    rank_index.load()
+    
+    with client.websocket_connect("/ws/leaderboard") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert [(e["username"], e["total_score"]) for e in snapshot["entries"]] == [("gold", 300), ("silver", 200)]
+        
+        # Below the top 2 before and after: no refresh at all
+        refreshes = leaderboard_feed.stats()["refreshes"]
+        client.put(f"/games/{games['bronze']}", json={"score": 150, "food_eaten": 1, "duration_seconds": 1})
+        
+        client.put(f"/games/{games['bronze']}", json={"score": 500, "food_eaten": 1, "duration_seconds": 1})
+        diff = websocket.receive_json()
+        assert diff["type"] == "diff" and diff["version"] > snapshot["version"]
+        assert [(e["username"], e["rank"]) for e in diff["changed"]] == [("bronze", 1), ("gold", 2)]
+        assert diff["removed"] == ["silver"]
+        assert leaderboard_feed.stats()["refreshes"] == refreshes + 1
+        
+        # A new game leaves the total alone but changes games_played
+        player_id = client.get("/players/username/gold").json()["id"]
+        client.post("/games/", json={"player_id": player_id, "level_id": 1})
+        diff = websocket.receive_json()
+        assert [(e["username"], e["games_played"]) for e in diff["changed"]] == [("gold", 2)]
+    
+    # A subscriber that falls behind gets one snapshot instead of the backlog
+    subscriber = Subscriber(max_queue=2)
+    for number in range(3):
+        subscriber.offer(f"diff {number}", lambda: "snapshot")
+    assert subscriber.queue.qsize() == 1 and subscriber.queue.get_nowait() == "snapshot"
+    assert subscriber.resyncs == 1
+
+
+@pytest.fixture
+def shared_segment(monkeypatch):
+    """The shared-memory leaderboard on a segment of its own."""
+    monkeypatch.setattr(get_settings(), "LEADERBOARD_SHM_ENABLED", True)
+    shared_leaderboard.attach(name=f"snake_test_{os.getpid()}", capacity=5)
+    yield shared_leaderboard
+    shared_leaderboard.unlink()
+
+
+def test_shared_memory_leaderboard(shared_segment):
+    """Test that workers answer from the shared snapshot, which readers never see torn."""
+    for username, score in (("alpha", 300), ("beta", 200)):
+        player = client.post("/players/", json={"username": username, "email": f"{username}@test.com"}).json()
+        game = client.post("/games/", json={"player_id": player["id"], "level_id": 1}).json()
+        client.put(f"/games/{game['id']}", json={"score": score, "food_eaten": 1, "duration_seconds": 1})
+    expected = client.get("/leaderboard/").json()
+    
+    # Not refreshed yet: served by the database
+    assert shared_segment.read(10) is None
+    assert shared_segment.refresh() and shared_segment.refresher
+    
+    # Another worker attached to the same segment reads it without a query
+    worker = SharedLeaderboard()
+    worker.attach(name=shared_segment._shm.name.lstrip("/"), capacity=5)
+    assert not worker.refresh()  # The lock is taken
+    assert worker.read(10) == [(1, 300, 1, 1), (2, 200, 1, 1)]
+    assert client.get("/leaderboard/").json() == expected
+    with count_statements() as statements:
+        assert client.get("/leaderboard/", params={"limit": 1}).json() == expected[:1]
+    assert not any("player_stats" in statement for statement in statements)
+    
+    # A write in progress (odd sequence) is never read
+    shared_segment._shm.buf[8] += 1
+    assert worker.read(10) is None
+    shared_segment._shm.buf[8] -= 1
+    assert worker.read(1) == [(1, 300, 1, 1)]
+    worker.close()
+
+
+# ========== HTTP Caching Tests ==========
+
+def test_levels_conditional_get():
+    """Test that a repeated level read with its ETag gets an empty 304."""
+    first = client.get("/levels/")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == get_settings().CACHE_CONTROL_LEVELS
+    
+    repeat = client.get("/levels/", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["etag"] == etag
+    assert client.get("/levels/1", headers={"If-None-Match": etag}).status_code == 304
+    
+    # Reloading the catalogue changes the version
+    client.post("/levels/cache/reload", headers={"X-Admin-Key": get_settings().SECRET_KEY})
+    changed = client.get("/levels/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_leaderboard_conditional_get_skips_database(monkeypatch):
+    """Test that an unchanged leaderboard is answered with 304 without any query."""
+    from sqlalchemy import event
+    
+    monkeypatch.setattr(get_settings(), "LEADERBOARD_ETAG_WINDOW_S", 0)
+    player_id = client.post("/players/", json={"username": "etag", "email": "etag@test.com"}).json()["id"]
+    game_id = client.post("/games/", json={"player_id": player_id, "level_id": 1}).json()["id"]
+    etag = client.get("/leaderboard/").headers["etag"]
+    
+    statements = []
+    def count(*args):
+        statements.append(args)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/leaderboard/", headers={"If-None-Match": etag}).status_code == 304
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
+    
+    client.put(f"/games/{game_id}", json={"score": 70, "food_eaten": 7, "duration_seconds": 20})
+    response = client.get("/leaderboard/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["total_score"] == 70
+
+
+# ========== Statement Count Tests ==========
+
+@contextmanager
+def count_statements():
+    """Collect every SQL statement the test engine executes inside the block."""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def history():
+    """A player with 50 finished games over both levels."""
+    player_id = client.post("/players/", json={"username": "veteran", "email": "vet@test.com"}).json()["id"]
+    client.post("/games/batch", json={"games": [
+        {"player_id": player_id, "level_id": i % 2 + 1, "score": i * 10, "food_eaten": i, "duration_seconds": 30}
+        for i in range(50)
+    ]})
+    game_id = client.get(f"/games/player/{player_id}/history", params={"limit": 1}).json()[0]["id"]
+    return {"player_id": player_id, "game_id": game_id}
+
+
+# (method, path, JSON body, most statements allowed); {player_id} and {game_id}
+# come from the history fixture. History pages must not grow with their size.
+STATEMENT_BUDGETS = [
+    ("GET", "/players/", None, 1),
+    ("GET", "/players/page", None, 1),
+    ("GET", "/players/{player_id}", None, 1),
+    ("GET", "/players/username/veteran", None, 1),
+    ("GET", "/players/{player_id}/rank", None, 2),
+    ("POST", "/players/", {"username": "budget", "email": "budget@test.com"}, 1),
+    ("GET", "/levels/", None, 0),
+    ("GET", "/levels/1", None, 0),
+    ("GET", "/levels/number/2", None, 0),
+    ("GET", "/games/{game_id}", None, 1),
+    ("POST", "/games/", {"player_id": "{player_id}", "level_id": 1}, 2),
+    ("PUT", "/games/{game_id}", {"score": 10, "food_eaten": 1, "duration_seconds": 5}, 6),
+    ("GET", "/games/player/{player_id}/history", None, 2),
+    ("GET", "/games/player/{player_id}/history/page", None, 2),
+    ("GET", "/leaderboard/", None, 1),
+    ("GET", "/leaderboard/?window=week", None, 1),
+]
+
+
+@pytest.mark.parametrize("method, path, body, budget", STATEMENT_BUDGETS)
+def test_statement_budget(history, method, path, body, budget):
+    """Test that no endpoint issues per-row (N+1) queries."""
+    path = path.format(**history)
+    if body is not None:
+        body = {key: int(value.format(**history)) if isinstance(value, str) and "{" in value else value
+                for key, value in body.items()}
+    client.get("/levels/")  # Level cache warm, as after startup
+    client.get(f"/players/{history['player_id']}/rank")  # Rank index too
+    
+    with count_statements() as statements:
+        response = client.request(method, path, json=body)
+    assert response.status_code < 300, response.text
+    assert len(statements) <= budget, statements
+
+
+# ========== Fast JSON Tests ==========
+
+@pytest.mark.parametrize("path", [
+    "/players/",
+    "/players/page?limit=1",
+    "/levels/",
+    "/games/player/{player_id}/history",
+    "/games/player/{player_id}/history/page?limit=20",
+])
+def test_fast_json_matches_default_bytes(history, monkeypatch, path):
+    """Test that FAST_JSON changes how list responses are built, not what they contain."""
+    client.post("/players/", json={"username": "zoë_ñandú", "email": "zoe@test.com"})
+    path = path.format(**history)
+    
+    default = client.get(path)
+    monkeypatch.setattr(get_settings(), "FAST_JSON", True)
+    fast = client.get(path)
+    
+    assert fast.status_code == default.status_code == 200
+    assert fast.content == default.content
+    assert fast.headers["content-type"] == default.headers["content-type"]
+    assert fast.headers.get("etag") == default.headers.get("etag")
+    assert fast.headers.get("cache-control") == default.headers.get("cache-control")
+
+
+# ========== Metrics Tests ==========
+
+def metric_value(text, line_prefix):
+    """Value of the metrics line that starts with `line_prefix`."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in metrics")
+
+
+def test_metrics(history):
+    """Test that /metrics reports latency, statements and status per route template."""
+    registry.reset()
+    path = f"/games/player/{history['player_id']}/history"
+    with count_statements() as statements:
+        client.get(path)
+    client.get(path)
+    client.get("/players/999999")
+    client.get("/no-such-route")
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    
+    route = 'method="GET",route="/games/player/{player_id}/history"'
+    assert metric_value(text, f"http_request_duration_seconds_count{{{route}}}") == 2
+    assert metric_value(text, f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 2
+    assert metric_value(text, f'http_responses_total{{{route},status="200"}}') == 2
+    assert metric_value(text, f"db_statements_total{{{route}}}") == 2 * len(statements)
+    assert metric_value(text, f"db_seconds_total{{{route}}}") > 0
+    assert metric_value(text, 'http_responses_total{method="GET",route="/players/{player_id}",status="404"}') == 1
+    assert metric_value(text, 'http_responses_total{method="GET",route="(unmatched)",status="404"}') == 1
+    assert metric_value(text, "threadpool_threads_limit") > 0
+    assert "# TYPE http_request_duration_seconds histogram" in text
+
+
+# ========== Read Replica Tests ==========
+
+@pytest.fixture
+def replica(tmp_path):
+    """Two read replicas, separate SQLite files with the levels but none of the primary's later writes."""
+    factories = []
+    for number in range(2):
+        replica_engine = create_engine(
+            f"sqlite:///{tmp_path / f'replica{number}.db'}", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=replica_engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+        db = factory()
+        init_levels_test(db)
+        db.close()
+        factories.append(factory)
+    replicas.configure(factories)
+    yield
+    replicas.configure(None)
+
+
+def test_reads_go_to_replicas(replica):
+    """Test that read-only endpoints use the replicas round-robin and writes the primary."""
+    created = client.post("/players/", json={"username": "primary", "email": "primary@test.com"})
+    assert created.status_code == 201
+    assert LAST_WRITE_HEADER in created.headers
+    
+    # Not replicated yet: without the write marker both replicas miss it
+    before = replicas.stats()["replica_reads"]
+    assert client.get("/players/username/primary").status_code == 404
+    assert client.get("/players/username/primary").status_code == 404
+    assert client.get("/leaderboard/").json() == []
+    assert replicas.stats()["replica_reads"] == before + 3
+
+
+def test_read_your_writes(replica, monkeypatch):
+    """Test that a client's reads right after its writes are served by the primary."""
+    created = client.post("/players/", json={"username": "writer", "email": "writer@test.com"})
+    player_id = created.json()["id"]
+    last_write = {LAST_WRITE_HEADER: created.headers[LAST_WRITE_HEADER]}
+    
+    # The client echoes X-Last-Write
+    assert client.get("/players/username/writer", headers=last_write).status_code == 200
+    # Routes about the player who just wrote need no header
+    assert client.get(f"/players/{player_id}").status_code == 200
+    assert client.get(f"/games/player/{player_id}/history").status_code == 200
+    
+    # Outside the window, reads go back to the replicas
+    monkeypatch.setattr(get_settings(), "READ_YOUR_WRITES_S", 0)
+    assert client.get("/players/username/writer", headers=last_write).status_code == 404
+    client.post("/games/", json={"player_id": player_id, "level_id": 1})
+    assert client.get(f"/players/{player_id}").status_code == 404
+
+
+def test_invalid_path_id_with_replicas(replica):
+    """Test that a malformed player ID is still a validation error when reads are routed."""
+    assert client.get("/players/abc").status_code == 422
+    assert client.get("/games/player/abc/history").status_code == 422
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+"""
+Integration tests for the async database mode (AsyncSession on aiosqlite).
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import crud, schemas
+from app.database import Base, get_db
+from app.level_cache import level_cache
+from app.main import app
+
+# Test database, shared by a sync engine (setup) and an async engine (requests)
+TEST_DATABASE_URL = "sqlite:///./test_async.db"
+engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# NullPool: every TestClient request runs on its own event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_async.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_db():
+    """Override database dependency with an AsyncSession."""
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client():
+    """Create a fresh database and route requests through the async session."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Beginner", speed=200, obstacles_count=0, grid_size=20
+    ))
+    db.close()
+
+    previous_override = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    level_cache.configure(TestingSessionLocal)
+    try:
+        yield TestClient(app)
+    finally:
+        if previous_override is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous_override
+        Base.metadata.drop_all(bind=engine)
+        level_cache.invalidate()
+
+
+def test_async_game_flow(client):
+    """Test the full register/play/leaderboard flow in async mode."""
+    player = client.post("/players/", json={"username": "async", "email": "async@test.com"})
+    assert player.status_code == 201
+    player_id = player.json()["id"]
+
+    duplicate = client.post("/players/", json={"username": "async", "email": "other@test.com"})
+    assert duplicate.status_code == 400
+
+    game = client.post("/games/", json={"player_id": player_id, "level_id": 1})
+    assert game.status_code == 201
+    game_id = game.json()["id"]
+
+    updated = client.put(
+        f"/games/{game_id}",
+        json={"score": 120, "food_eaten": 12, "duration_seconds": 30, "completed": False}
+    )
+    assert updated.status_code == 200
+    assert updated.json()["score"] == 120
+
+    detail = client.get(f"/games/{game_id}")
+    assert detail.status_code == 200
+    assert detail.json()["player"]["username"] == "async"
+    assert detail.json()["level"]["name"] == "Beginner"
+
+    history = client.get(f"/games/player/{player_id}/history")
+    assert history.status_code == 200
+    assert len(history.json()) == 1
+
+    leaderboard = client.get("/leaderboard/")
+    assert leaderboard.json()[0]["total_score"] == 120
+
+
+def test_async_not_found(client):
+    """Test that 404s are reported the same way in async mode."""
+    assert client.get("/players/9999").status_code == 404
+    assert client.post("/games/", json={"player_id": 9999, "level_id": 1}).status_code == 404
@@ -0,0 +1,125 @@
+"""
+Unit tests for the headless snake engine.
+"""
+import pytest
+
+from app import replay, schemas
+from app.engine import (
+    DOWN, EMPTY, LEFT, OBSTACLE, RIGHT, SNAKE, UP,
+    Mulberry32, SnakeGame, obstacles_for_grid, simulate, verify
+)
+
+
+def play(game: SnakeGame, max_ticks: int) -> list:
+    """Steer greedily towards the food and return the (tick, direction) log."""
+    moves = []
+    for tick in range(max_ticks):
+        hx, hy = game.position(game.snake[0])
+        fx, fy = game.position(game.food)
+        wanted = [RIGHT if fx > hx else LEFT, DOWN if fy > hy else UP, UP, DOWN, LEFT, RIGHT]
+        for direction in wanted:
+            if game.board[game.snake[0] + game.offsets[direction]] == EMPTY:
+                if direction != game.direction:
+                    moves.append((tick, direction))
+                    game.turn(direction)
+                break
+        if not game.step():
+            break
+    return moves
+
+
+def test_rng_matches_javascript_reference():
+    """Test that the PRNG reproduces the JavaScript mulberry32 sequence."""
+    rng = Mulberry32(42)
+    assert [rng.random() for _ in range(3)] == [0.6011037519201636, 0.44829055899754167, 0.8524657934904099]
+
+
+def test_initial_board():
+    """Test the starting snake, food and obstacles."""
+    game = SnakeGame(20, 20, 15, seed=7)
+
+    assert [game.position(cell) for cell in game.snake] == [(10, 10), (9, 10), (8, 10)]
+    assert game.board.count(SNAKE) == 3
+    assert game.board.count(OBSTACLE) == 15
+    assert game.board[game.food] == EMPTY
+
+    same = SnakeGame(20, 20, 15, seed=7)
+    assert same.board == game.board and same.food == game.food
+
+
+def test_wall_collision():
+    """Test that running straight ends at the wall."""
+    result = simulate(20, 20, 0, seed=1, moves=[], total_ticks=100)
+
+    assert result.alive is False
+    assert result.ticks == 10  # head starts at x=10, the tenth step leaves the board
+
+
+def test_reverse_is_ignored():
+    """Test that turning back onto the body is ignored, as in the browser."""
+    game = SnakeGame(20, 20, 0, seed=1)
+    game.turn(LEFT)
+    assert game.step() is True
+    assert game.direction == RIGHT
+
+    # UP then LEFT in one tick: LEFT is still a reversal of RIGHT
+    result = simulate(20, 20, 0, seed=1, moves=[(0, UP), (0, LEFT)], total_ticks=10)
+    assert result.ticks == 10 and result.alive
+
+
+def test_run_ends_when_the_board_is_full():
+    """Test that filling the board ends the run instead of looking for food forever."""
+    # 4x1: the snake covers three cells and the food the fourth
+    result = simulate(4, 1, 0, seed=123, moves=[], total_ticks=5)
+    assert (result.ticks, result.food_eaten, result.length, result.alive) == (1, 1, 4, True)
+
+    game = SnakeGame(4, 1, 0, seed=123)
+    assert game.step() is True
+    assert game.food is None
+    assert game.step() is False and game.ticks == 1
+
+
+def test_verify_replayed_run():
+    """Test re-simulating a recorded run and rejecting a tampered score."""
+    game = SnakeGame(20, 20, 10, seed=1234)
+    moves = play(game, 2000)
+    assert game.food_eaten > 5
+
+    assert verify(20, 20, 10, 1234, moves, game.ticks, game.score, game.food_eaten)
+    assert not verify(20, 20, 10, 1234, moves, game.ticks, game.score + 10, game.food_eaten)
+    assert not verify(20, 20, 10, 4321, moves, game.ticks, game.score, game.food_eaten)
+
+
+def test_from_level_scales_obstacles():
+    """Test that a resized grid keeps the level's obstacle density."""
+    level = schemas.LevelCreate(level_number=2, name="Medium", speed=150, obstacles_count=10, grid_size=20)
+
+    assert obstacles_for_grid(level, 20, 20) == 10
+    assert obstacles_for_grid(level, 40, 30) == 30
+    game = SnakeGame.from_level(level, seed=5, cols=40, rows=30)
+    assert (game.cols, game.rows) == (40, 30)
+    assert game.board.count(OBSTACLE) == 30
+
+
+def test_replay_round_trip_in_small_chunks():
+    """Test that moves decode lazily across arbitrary chunk boundaries."""
+    moves = [(0, UP), (3, LEFT), (3, DOWN), (20, RIGHT), (150, UP)]
+    data = replay.encode(0xDEADBEEF, 30, 24, 160, moves)
+
+    header = replay.decode_header(data)
+    assert (header.seed, header.cols, header.rows, header.ticks, header.move_count) == (0xDEADBEEF, 30, 24, 160, 5)
+    body = data[header.size:]
+    assert list(replay.iter_moves(header, (body[i:i + 1] for i in range(len(body))))) == moves
+
+
+def test_replay_rejects_malformed_data():
+    """Test that truncated or inconsistent replays are rejected."""
+    data = replay.encode(1, 20, 20, 50, [(5, UP), (9, LEFT)])
+
+    for bad in (b"junk", data[:6], data[:-1], data + b"\x04", replay.encode(1, 2, 20, 10, []),
+                replay.encode(1, 20, 20, 10 ** 6, [(5, UP)])):
+        with pytest.raises(replay.InvalidReplay):
+            replay.decode(bad)
+    with pytest.raises(replay.InvalidReplay):
+        replay.decode_header(data, max_ticks=49)
+    assert replay.decode_header(data, max_ticks=50).ticks == 50
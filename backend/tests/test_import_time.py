@@ -0,0 +1,41 @@
+"""
+Import-time budget of the application, measured with python -X importtime.
+"""
+import os
+import subprocess
+import sys
+
+# Budget for a cold `import app.main` (FastAPI, pydantic and the
+# email-validator stack included), in milliseconds: about 1250 ms median
+# and 1460 ms worst over 45 runs on a slow shared runner
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1600))
+
+# Only loaded once a database engine is built
+DEFERRED = ("pymysql", "aiomysql", "aiosqlite", "cryptography")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(statement: str) -> dict:
+    """Cumulative import time (µs) of every module imported by `statement`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_budget():
+    """Test that importing the app builds no engine or Settings and stays within budget."""
+    times = import_times(
+        "import app.main; from app import database; from app.config import get_settings; "
+        "assert not database.engines_built(); assert get_settings.cache_info().currsize == 0"
+    )
+    assert not [name for name in times if name.split(".")[0] in DEFERRED]
+    assert times["app.main"] / 1000 < IMPORT_BUDGET_MS
@@ -175,5 +175,205 @@ def test_get_leaderboard(db):
     assert leaderboard[1]['total_score'] == 800
 
 
+def test_player_stats_follow_games(db):
+    """Test that the player_stats rollup is maintained on create and update."""
+    player = crud.create_player(db, schemas.PlayerCreate(username="rollup", email="rollup@test.com"))
+    level1 = crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Easy", speed=150, obstacles_count=0, grid_size=20
+    ))
+    level3 = crud.create_level(db, schemas.LevelCreate(
+        level_number=3, name="Hard", speed=100, obstacles_count=5, grid_size=25
+    ))
+    
+    game1 = crud.create_game(db, schemas.GameCreate(player_id=player.id, level_id=level3.id))
+    game2 = crud.create_game(db, schemas.GameCreate(player_id=player.id, level_id=level1.id))
+    crud.update_game(db, game1.id, schemas.GameUpdate(score=300, food_eaten=30, duration_seconds=60))
+    crud.update_game(db, game2.id, schemas.GameUpdate(score=200, food_eaten=20, duration_seconds=40))
+    # Re-submitting a result replaces the old score instead of adding to it
+    crud.update_game(db, game2.id, schemas.GameUpdate(score=250, food_eaten=25, duration_seconds=45))
+    
+    stats = db.get(models.PlayerStats, player.id)
+    assert stats.total_score == 550
+    assert stats.games_played == 2
+    assert stats.highest_level == 3
+    assert crud.check_player_stats(db) == []
+
+
+def test_rebuild_player_stats(db):
+    """Test rebuilding the rollup after it drifted from the games table."""
+    player = crud.create_player(db, schemas.PlayerCreate(username="drift", email="drift@test.com"))
+    level = crud.create_level(db, schemas.LevelCreate(
+        level_number=2, name="Medium", speed=120, obstacles_count=2, grid_size=20
+    ))
+    game = crud.create_game(db, schemas.GameCreate(player_id=player.id, level_id=level.id))
+    crud.update_game(db, game.id, schemas.GameUpdate(score=400, food_eaten=40, duration_seconds=90))
+    
+    db.query(models.PlayerStats).update({models.PlayerStats.total_score: 1})
+    db.commit()
+    mismatches = crud.check_player_stats(db)
+    assert mismatches == [{'player_id': player.id, 'expected': (400, 1, 2), 'actual': (1, 1, 2)}]
+    
+    assert crud.rebuild_player_stats(db) == 1
+    assert crud.check_player_stats(db) == []
+    assert crud.get_leaderboard(db)[0]['total_score'] == 400
+
+
+def test_leaderboard_buckets_follow_games(db):
+    """Test the day/week/per-level boards across single, bulk and batch writes."""
+    from datetime import datetime, timedelta, timezone
+    from app.level_cache import level_cache
+    
+    level_cache.configure(TestingSessionLocal)
+    alice = crud.create_player(db, schemas.PlayerCreate(username="alice", email="alice@test.com"))
+    bob = crud.create_player(db, schemas.PlayerCreate(username="bob", email="bob@test.com"))
+    level1 = crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Easy", speed=150, obstacles_count=0, grid_size=20
+    ))
+    level2 = crud.create_level(db, schemas.LevelCreate(
+        level_number=2, name="Medium", speed=120, obstacles_count=2, grid_size=20
+    ))
+    
+    game = crud.create_game(db, schemas.GameCreate(player_id=alice.id, level_id=level1.id))
+    crud.update_game(db, game.id, schemas.GameUpdate(score=100, food_eaten=10, duration_seconds=30))
+    crud.update_game(db, game.id, schemas.GameUpdate(score=120, food_eaten=12, duration_seconds=30))
+    unfinished = crud.create_game(db, schemas.GameCreate(player_id=bob.id, level_id=level2.id))
+    crud.update_games_bulk(db, {unfinished.id: schemas.GameUpdate(score=90, food_eaten=9, duration_seconds=20)})
+    crud.create_games_batch(db, [
+        schemas.GameBatchItem(player_id=bob.id, level_id=level2.id, score=50, food_eaten=5),
+    ])
+    level_cache.invalidate()
+    
+    day = crud.get_leaderboard(db, window="day")
+    assert [(e['username'], e['total_score'], e['games_played'], e['highest_level']) for e in day] == [
+        ("bob", 140, 2, 2), ("alice", 120, 1, 1)
+    ]
+    assert crud.get_leaderboard(db, window="week") == day
+    assert [e['username'] for e in crud.get_leaderboard(db, level_number=1)] == ["alice"]
+    assert crud.get_leaderboard(db, window="day", level_number=2)[0]['total_score'] == 140
+    
+    # Rebuilding from the games table gives the same buckets
+    before = {(b.period, b.level_number, b.player_id, b.total_score, b.games_played) for b in db.query(models.LeaderboardBucket)}
+    crud.rebuild_leaderboard_buckets(db)
+    after = {(b.period, b.level_number, b.player_id, b.total_score, b.games_played) for b in db.query(models.LeaderboardBucket)}
+    assert after == before
+    
+    # Yesterday's day buckets go with keep_days=1; week and all-time buckets stay
+    db.query(models.LeaderboardBucket).filter(models.LeaderboardBucket.period == "day").update(
+        {models.LeaderboardBucket.bucket_start: datetime.now(timezone.utc).date() - timedelta(days=1)}
+    )
+    db.commit()
+    assert crud.prune_leaderboard_buckets(db, keep_days=1, keep_weeks=4) == 4
+    assert crud.get_leaderboard(db, window="day") == []
+    assert len(crud.get_leaderboard(db, window="week")) == 2
+
+
+def test_score_buffer_flushes_in_bulk(db):
+    """Test that buffered results are coalesced per game and written on stop."""
+    from app.write_behind import ScoreBuffer
+    
+    player = crud.create_player(db, schemas.PlayerCreate(username="buffered", email="buf@test.com"))
+    level = crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Easy", speed=150, obstacles_count=0, grid_size=20
+    ))
+    game1 = crud.create_game(db, schemas.GameCreate(player_id=player.id, level_id=level.id))
+    game2 = crud.create_game(db, schemas.GameCreate(player_id=player.id, level_id=level.id))
+    
+    buffer = ScoreBuffer(flush_interval=60, max_items=100, session_factory=TestingSessionLocal)
+    buffer.start()
+    buffer.submit(game1.id, schemas.GameUpdate(score=100, food_eaten=10, duration_seconds=30))
+    buffer.submit(game1.id, schemas.GameUpdate(score=150, food_eaten=15, duration_seconds=35))
+    buffer.submit(game2.id, schemas.GameUpdate(score=70, food_eaten=7, duration_seconds=20, completed=True))
+    buffer.submit(9999, schemas.GameUpdate(score=10, food_eaten=1, duration_seconds=1))
+    assert buffer.pending() == 3
+    
+    # Nothing is written until the flush (long interval, buffer not full)
+    db.expire_all()
+    assert crud.get_game(db, game1.id).score == 0
+    
+    buffer.stop()
+    assert buffer.pending() == 0
+    assert buffer.flushed == 2
+    
+    db.expire_all()
+    assert crud.get_game(db, game1.id).score == 150
+    assert crud.get_game(db, game2.id).completed is True
+    assert db.get(models.PlayerStats, player.id).total_score == 220
+    assert crud.check_player_stats(db) == []
+
+
+def test_score_buffer_stop_retries_then_raises(db, caplog):
+    """Test that a failing shutdown flush is retried, then logged with the lost results and raised."""
+    from sqlalchemy.exc import OperationalError
+    from app.write_behind import ScoreBuffer
+    
+    attempts = []
+    
+    class LostConnection:
+        """A session whose database went away."""
+        def __init__(self):
+            attempts.append(self)
+        
+        def execute(self, *args, **kwargs):
+            raise OperationalError("SELECT", {}, Exception("server has gone away"))
+        
+        def rollback(self):
+            pass
+        
+        def close(self):
+            pass
+    
+    buffer = ScoreBuffer(flush_interval=60, session_factory=LostConnection)
+    buffer.submit(42, schemas.GameUpdate(score=10, food_eaten=1, duration_seconds=5))
+    with pytest.raises(OperationalError):
+        buffer.stop(attempts=3, backoff=0)
+    assert len(attempts) == 3
+    assert buffer.pending() == 1
+    assert "42" in caplog.text and "'score': 10" in caplog.text
+
+
+def test_bulk_load_games(db, tmp_path):
+    """Test synthetic and file loads, with the indexes deferred and rebuilt."""
+    from sqlalchemy import inspect
+    from app import bulk_load
+    
+    crud.bulk_create_levels(db, [
+        {"level_number": number, "name": f"Level {number}", "speed": 200 - 10 * number,
+         "obstacles_count": number, "grid_size": 20}
+        for number in (1, 2, 3)
+    ])
+    loader = bulk_load.GameLoader(engine, chunk_size=40)
+    player_ids = bulk_load.create_synthetic_players(engine, 20, chunk_size=8)
+    assert bulk_load.create_synthetic_players(engine, 20) == player_ids
+    
+    games_table = models.Game.__table__
+    with bulk_load.deferred_indexes(engine, games_table) as deferred:
+        assert "ix_games_player_created" in deferred
+        assert "ix_games_player_created" not in {i["name"] for i in inspect(engine).get_indexes("games")}
+        loader.load(bulk_load.synthetic_games(player_ids, 100, levels=3, seed=1))
+    assert set(deferred) <= {i["name"] for i in inspect(engine).get_indexes("games")}
+    assert loader.stats == {"read": 100, "inserted": 100, "invalid": 0, "players_created": 0}
+    
+    path = tmp_path / "games.ndjson"
+    path.write_text(
+        '{"username": "synth_0000001", "level_number": 2, "score": 50, "completed": true,'
+        ' "created_at": "2024-05-01T10:00:00", "finished_at": "2024-05-01T10:01:00+00:00"}\n'
+        '{"username": "newcomer", "level_number": 3, "score": 30}\n'
+        '{"username": "lost", "level_number": 99}\n'
+        '{"level_number": 1}\n'
+        '{"username": "truncated", "level_n\n'
+        '{"player_id": 999999, "level_number": 1}\n'
+    )
+    stats = {"invalid": 0}
+    games = list(bulk_load.read_games(str(path), "ndjson", stats))
+    assert stats["invalid"] == 2
+    loader.load(games)
+    assert (loader.stats["inserted"], loader.stats["invalid"], loader.stats["players_created"]) == (102, 2, 1)
+    assert crud.get_player_by_username(db, "newcomer").email == "newcomer@imported.invalid"
+    
+    crud.rebuild_player_stats(db)
+    assert crud.check_player_stats(db) == []
+    assert bulk_load.count_games(engine) == 102
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
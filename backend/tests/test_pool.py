@@ -0,0 +1,62 @@
+"""
+Unit tests for the connection pool configuration and statistics.
+"""
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.config import get_settings
+from app.pool import TimedQueuePool, configure_engine, engine_options, pool_status
+
+
+def make_engine(tmp_path, **overrides):
+    """A file SQLite engine with the app's pool setup and the given DB_POOL_* settings."""
+    settings = get_settings().model_copy(update=overrides)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url, settings))
+    configure_engine(engine, settings)
+    return engine
+
+
+def test_engine_options():
+    """Test that pool settings reach the engine, except for in-memory SQLite."""
+    settings = get_settings().model_copy(update={"DB_POOL_SIZE": 7, "DB_POOL_PRE_PING": "idle"})
+    options = engine_options("mysql+pymysql://u:p@h/db", settings)
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 7
+    assert options["pool_pre_ping"] is False
+    assert engine_options("sqlite://", settings) == {}
+
+
+def test_pool_timeout_is_counted(tmp_path):
+    """Test that occupancy, waits and timeouts are reported."""
+    engine = make_engine(tmp_path, DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=0.1)
+    held = engine.connect()
+    status = pool_status("sync", engine, "always")
+    assert (status["size"], status["checked_out"], status["checkouts"]) == (1, 1, 1)
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    status = pool_status("sync", engine, "always")
+    assert status["checked_out"] == 0
+    assert status["timeouts"] == 1
+    assert status["wait_ms_max"] >= 100
+    engine.dispose()
+
+
+def test_idle_pre_ping(tmp_path):
+    """Test that only connections idle past the threshold are pinged."""
+    engine = make_engine(tmp_path, DB_POOL_PRE_PING="idle", DB_POOL_PRE_PING_IDLE_S=3600)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    assert engine.pool.stats.pings == 0
+
+    engine = make_engine(tmp_path, DB_POOL_PRE_PING="idle", DB_POOL_PRE_PING_IDLE_S=0)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    # The first checkout opens a new connection, which needs no ping
+    assert (engine.pool.stats.pings, engine.pool.stats.ping_failures) == (2, 0)
+    engine.dispose()
@@ -0,0 +1,125 @@
+"""
+Query-plan tests: the hot queries must be served by the declared indexes.
+Runs EXPLAIN QUERY PLAN on the SQL the crud functions actually emit.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.database import Base
+from app.migrations import upgrade_columns, upgrade_indexes
+
+# In-memory SQLite stand-in
+engine = create_engine("sqlite://")
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create a fresh schema for each test."""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def query_plan(db, fn, *args, **kwargs) -> str:
+    """Run a crud function and return the query plan of its first SELECT."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn(db, *args, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = next(s for s in statements if s[0].lstrip().startswith("SELECT"))
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return "\n".join(row[3] for row in rows)
+
+
+def test_history_uses_player_created_index(db):
+    """Test that history is an index range scan with no sort step."""
+    plan = query_plan(db, crud.get_player_games, player_id=1)
+    assert "SEARCH games USING INDEX ix_games_player_created (player_id=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_history_cursor_uses_player_created_index(db):
+    """Test that a keyset page is an index range scan with no sort step."""
+    plan = query_plan(db, crud.get_player_games_before, player_id=1, before=(datetime(2024, 1, 1), 10))
+    assert "USING INDEX ix_games_player_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_stats_aggregation_uses_covering_index(db):
+    """Test that the player_stats rebuild/check aggregation never touches the games table rows."""
+    plan = query_plan(db, crud.check_player_stats)
+    assert "SCAN games USING COVERING INDEX ix_games_player_score_level" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_leaderboard_uses_rollup_index(db):
+    """Test that the leaderboard reads player_stats in index order."""
+    plan = query_plan(db, crud.get_leaderboard, limit=10)
+    assert "SCAN player_stats USING INDEX ix_player_stats_leaderboard" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_windowed_leaderboard_uses_bucket_index(db):
+    """Test that a day/week/per-level board reads its bucket in index order."""
+    plan = query_plan(db, crud.get_leaderboard, limit=10, window="week")
+    assert "SEARCH leaderboard_buckets USING INDEX ix_leaderboard_buckets_rank" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_upgrade_columns_adds_finished_at():
+    """Test adding games.finished_at to an old games table, backfilling finished games."""
+    old_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=old_engine)
+    with old_engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE games DROP COLUMN finished_at")
+        conn.exec_driver_sql("INSERT INTO players (id, username, email) VALUES (1, 'old', 'old@test.com')")
+        conn.exec_driver_sql(
+            "INSERT INTO levels (id, level_number, name, speed, obstacles_count, grid_size) "
+            "VALUES (1, 1, 'Easy', 150, 0, 20)"
+        )
+        conn.exec_driver_sql("INSERT INTO games (player_id, level_id, score, duration_seconds) VALUES (1, 1, 0, 0)")
+        conn.exec_driver_sql("INSERT INTO games (player_id, level_id, score, duration_seconds) VALUES (1, 1, 50, 20)")
+    
+    assert upgrade_columns(old_engine) == ["added games.finished_at"]
+    with old_engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT finished_at IS NULL, finished_at = created_at FROM games ORDER BY id").all()
+    assert rows == [(1, None), (0, 1)]
+    assert upgrade_columns(old_engine) == []
+
+
+def test_upgrade_indexes_on_old_schema():
+    """Test migrating a games table that only has the old single-column indexes."""
+    old_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=old_engine)
+    with old_engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_games_player_created")
+        conn.exec_driver_sql("DROP INDEX ix_games_player_score_level")
+        conn.exec_driver_sql("CREATE INDEX ix_games_player_id ON games (player_id)")
+
+    changes = upgrade_indexes(old_engine)
+
+    names = {index["name"] for index in inspect(old_engine).get_indexes("games")}
+    assert {"ix_games_player_created", "ix_games_player_score_level", "ix_games_level_id"} <= names
+    assert "ix_games_player_id" not in names
+    assert changes == [
+        "created ix_games_player_created on games",
+        "created ix_games_player_score_level on games",
+        "dropped ix_games_player_id on games",
+    ]
+    assert upgrade_indexes(old_engine) == []
@@ -0,0 +1,117 @@
+"""
+Unit tests for the in-memory rank index.
+"""
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.database import Base
+from app.rank_index import IndexableSkipList, RankIndex, rank_index
+
+# In-memory SQLite stand-in
+engine = create_engine("sqlite://")
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Create a fresh database for each test, with the shared index pointed at it."""
+    Base.metadata.create_all(bind=engine)
+    rank_index.configure(TestingSessionLocal)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        rank_index.invalidate()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_skip_list_matches_sorted_list():
+    """Test positions and lookups against a plain sorted list under random churn."""
+    rng = random.Random(3)
+    reference = sorted(rng.sample(range(10000), 500))
+    skip_list = IndexableSkipList(reference)
+
+    for _ in range(2000):
+        if rng.random() < 0.5 and reference:
+            key = rng.choice(reference)
+            reference.remove(key)
+            skip_list.remove(key)
+        else:
+            key = rng.randrange(10000)
+            if key not in reference:
+                reference.append(key)
+                reference.sort()
+                skip_list.insert(key)
+
+    assert len(skip_list) == len(reference)
+    assert [skip_list[i] for i in range(len(reference))] == reference
+    for position in rng.sample(range(len(reference)), 50):
+        assert skip_list.index(reference[position]) == position
+    with pytest.raises(KeyError):
+        skip_list.remove(-1)
+
+
+def test_rank_follows_commits(db):
+    """Test that committed score changes move players and rollbacks do not."""
+    level = crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Easy", speed=150, obstacles_count=0, grid_size=20
+    ))
+    players = [
+        crud.create_player(db, schemas.PlayerCreate(username=f"ranked{i}", email=f"r{i}@test.com"))
+        for i in range(3)
+    ]
+    games = [crud.create_game(db, schemas.GameCreate(player_id=p.id, level_id=level.id)) for p in players]
+    for game, score in zip(games, (100, 300, 200)):
+        crud.update_game(db, game.id, schemas.GameUpdate(score=score, food_eaten=score // 10, duration_seconds=10))
+
+    rank_index.load()
+    assert rank_index.rank(players[0].id)['rank'] == 3
+
+    # Player 0 overtakes everybody after the index was seeded
+    crud.update_game(db, games[0].id, schemas.GameUpdate(score=500, food_eaten=50, duration_seconds=10))
+    top = rank_index.rank(players[0].id)
+    assert (top['rank'], top['total_score'], top['above']) == (1, 500, None)
+    assert top['below'] == {'player_id': players[1].id, 'rank': 2, 'total_score': 300}
+
+    # Uncommitted changes are discarded
+    crud._bump_player_stats(db, players[2].id, score_delta=1000)
+    db.rollback()
+    assert rank_index.rank(players[2].id)['rank'] == 3
+
+    # Matches a fresh load from player_stats
+    fresh = RankIndex(TestingSessionLocal)
+    assert [fresh.rank(p.id) for p in players] == [rank_index.rank(p.id) for p in players]
+
+
+def test_reload_does_not_count_overlapping_commits_twice(db, monkeypatch):
+    """Test that a commit landing while the totals are read is counted exactly once."""
+    level = crud.create_level(db, schemas.LevelCreate(
+        level_number=1, name="Easy", speed=150, obstacles_count=0, grid_size=20
+    ))
+    player = crud.create_player(db, schemas.PlayerCreate(username="racer", email="racer@test.com"))
+    game = crud.create_game(db, schemas.GameCreate(player_id=player.id, level_id=level.id))
+    crud.update_game(db, game.id, schemas.GameUpdate(score=100, food_eaten=10, duration_seconds=10))
+    rank_index.load()
+
+    read_totals = rank_index._read_totals
+    reads = []
+
+    def read_then_commit():
+        rows = read_totals()
+        if not reads:
+            # Committed after the read, applied before the swap
+            crud.update_game(db, game.id, schemas.GameUpdate(score=250, food_eaten=25, duration_seconds=10))
+        reads.append(rows)
+        return rows
+
+    monkeypatch.setattr(rank_index, "_read_totals", read_then_commit)
+    rank_index.load()
+
+    assert len(reads) == 2  # The overlapped read was thrown away
+    assert rank_index.rank(player.id)['total_score'] == 250
+    assert rank_index._in_flight == 0
@@ -18,6 +18,8 @@ let gameInterval = null;
 let timerInterval = null;
 let isPaused = false;
 let gameStarted = false;  // NEW: Track if game has started
+let lastWrite = null;  // X-Last-Write of our latest write, sent back on reads
+let leaderboardSocket = null;  // Live leaderboard updates while its screen is shown
 
 // Game state
 let snake = [];
@@ -29,6 +31,14 @@ let score = 0;
 let foodEaten = 0;
 let gameTime = 0;
 
+// Replay recording: food and obstacles come from a seeded PRNG so the
+// server can re-simulate the run from the seed and the direction changes
+const DIRECTION_CODES = { UP: 0, DOWN: 1, LEFT: 2, RIGHT: 3 };
+let random = Math.random;
+let replaySeed = 0;
+let replayMoves = [];  // [tick, direction code] pairs
+let tickCount = 0;
+
 // Canvas configuration
 let canvas = null;
 let ctx = null;
@@ -63,8 +73,65 @@ function showScreen(screenId) {
     document.getElementById(screenId).classList.remove('hidden');
 }
 
+/**
+ * Seeded PRNG (mulberry32), identical to app/engine.py Mulberry32
+ */
+function mulberry32(seed) {
+    let state = seed >>> 0;
+    return function() {
+        state = (state + 0x6D2B79F5) | 0;
+        let t = Math.imul(state ^ (state >>> 15), state | 1);
+        t = (t + Math.imul(t ^ (t >>> 7), t | 61)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+/**
+ * Pack the current run in the binary replay format of app/replay.py
+ */
+function encodeReplay() {
+    const bytes = [0x53, 0x4E, 0x4B, 0x52, 1];  // "SNKR", version 1
+    for (let i = 0; i < 4; i++) {
+        bytes.push((replaySeed >>> (8 * i)) & 0xFF);
+    }
+    
+    const pushVarint = (value) => {
+        while (value >= 0x80) {
+            bytes.push((value % 0x80) | 0x80);
+            value = Math.floor(value / 0x80);
+        }
+        bytes.push(value);
+    };
+    
+    [window.gridCols, window.gridRows, tickCount, replayMoves.length].forEach(pushVarint);
+    let previousTick = 0;
+    for (const [tick, code] of replayMoves) {
+        pushVarint((tick - previousTick) * 4 + code);
+        previousTick = tick;
+    }
+    return new Uint8Array(bytes);
+}
+
 // ========== API Functions ==========
 
+/**
+ * Remember the time of a successful write. Sending it back on reads
+ * keeps them on the primary database while replicas may still lag.
+ */
+function rememberWrite(response) {
+    const stamp = response.headers.get('X-Last-Write');
+    if (stamp) {
+        lastWrite = stamp;
+    }
+}
+
+/**
+ * Headers for read requests
+ */
+function readHeaders() {
+    return lastWrite ? { 'X-Last-Write': lastWrite } : {};
+}
+
 /**
  * Create a new player (Register)
  */
@@ -87,6 +154,7 @@ async function createPlayer(username, email) {
             throw new Error(error.detail || 'Failed to create player');
         }
         
+        rememberWrite(response);
         const player = await response.json();
         return player;
     } catch (error) {
@@ -102,7 +170,9 @@ async function loginPlayer(username) {
     try {
         showLoading();
         
-        const response = await fetch(`${API_URL}/players/username/${username}`);
+        const response = await fetch(`${API_URL}/players/username/${username}`, {
+            headers: readHeaders(),
+        });
         
         hideLoading();
         
@@ -165,6 +235,7 @@ async function createGame(playerId, levelId) {
             throw new Error('Failed to create game');
         }
         
+        rememberWrite(response);
         const game = await response.json();
         return game;
     } catch (error) {
@@ -199,6 +270,7 @@ async function updateGame(gameId, score, foodEaten, durationSeconds, completed)
             throw new Error('Failed to update game');
         }
         
+        rememberWrite(response);
         const game = await response.json();
         return game;
     } catch (error) {
@@ -207,6 +279,26 @@ async function updateGame(gameId, score, foodEaten, durationSeconds, completed)
     }
 }
 
+/**
+ * Upload the replay of a finished game
+ */
+async function uploadReplay(gameId) {
+    const response = await fetch(`${API_URL}/games/${gameId}/replay`, {
+        method: 'PUT',
+        headers: {
+            'Content-Type': 'application/octet-stream',
+        },
+        body: encodeReplay(),
+    });
+    
+    if (!response.ok) {
+        throw new Error('Failed to upload replay');
+    }
+    
+    rememberWrite(response);
+    return await response.json();
+}
+
 /**
  * Get leaderboard
  */
@@ -214,7 +306,9 @@ async function getLeaderboard(limit = 10) {
     try {
         showLoading();
         
-        const response = await fetch(`${API_URL}/leaderboard/?limit=${limit}`);
+        const response = await fetch(`${API_URL}/leaderboard/?limit=${limit}`, {
+            headers: readHeaders(),
+        });
         
         hideLoading();
         
@@ -378,46 +472,86 @@ document.getElementById('viewLeaderboardFromLevels').addEventListener('click', a
  * Back to levels from leaderboard
  */
 document.getElementById('backToLevelsBtn').addEventListener('click', () => {
+    stopWatchingLeaderboard();
     showScreen('levelScreen');
 });
 
 /**
- * Load and display leaderboard
+ * Load and display leaderboard, then keep it live
  */
 async function loadLeaderboard() {
     try {
-        const leaderboard = await getLeaderboard();
-        const leaderboardTable = document.getElementById('leaderboardTable');
-        leaderboardTable.innerHTML = '';
-        
-        const header = document.createElement('div');
-        header.className = 'leaderboard-header';
-        header.innerHTML = `
-            <div>Rank</div>
-            <div>Player</div>
-            <div>Total Score</div>
-            <div>Games Played</div>
-            <div>Highest Level</div>
-        `;
-        leaderboardTable.appendChild(header);
-        
-        leaderboard.forEach(entry => {
-            const entryDiv = document.createElement('div');
-            entryDiv.className = `leaderboard-entry rank-${entry.rank}`;
-            entryDiv.innerHTML = `
-                <div class="leaderboard-rank">${entry.rank}</div>
-                <div class="leaderboard-username">${entry.username}</div>
-                <div class="leaderboard-stat">${entry.total_score}</div>
-                <div class="leaderboard-stat">${entry.games_played}</div>
-                <div class="leaderboard-stat">${entry.highest_level}</div>
-            `;
-            leaderboardTable.appendChild(entryDiv);
-        });
+        renderLeaderboard(await getLeaderboard());
+        watchLeaderboard();
     } catch (error) {
         alert('Failed to load leaderboard: ' + error.message);
     }
 }
 
+/**
+ * Display leaderboard entries
+ */
+function renderLeaderboard(leaderboard) {
+    const leaderboardTable = document.getElementById('leaderboardTable');
+    leaderboardTable.innerHTML = '';
+    
+    const header = document.createElement('div');
+    header.className = 'leaderboard-header';
+    header.innerHTML = `
+        <div>Rank</div>
+        <div>Player</div>
+        <div>Total Score</div>
+        <div>Games Played</div>
+        <div>Highest Level</div>
+    `;
+    leaderboardTable.appendChild(header);
+    
+    leaderboard.forEach(entry => {
+        const entryDiv = document.createElement('div');
+        entryDiv.className = `leaderboard-entry rank-${entry.rank}`;
+        entryDiv.innerHTML = `
+            <div class="leaderboard-rank">${entry.rank}</div>
+            <div class="leaderboard-username">${entry.username}</div>
+            <div class="leaderboard-stat">${entry.total_score}</div>
+            <div class="leaderboard-stat">${entry.games_played}</div>
+            <div class="leaderboard-stat">${entry.highest_level}</div>
+        `;
+        leaderboardTable.appendChild(entryDiv);
+    });
+}
+
+/**
+ * Follow /ws/leaderboard: a snapshot on connect, then diffs
+ * (changed entries and removed usernames). Without it the table
+ * simply keeps the result of getLeaderboard().
+ */
+function watchLeaderboard() {
+    stopWatchingLeaderboard();
+    let entries = [];
+    const socket = new WebSocket(`${API_URL.replace(/^http/, 'ws')}/ws/leaderboard`);
+    socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'snapshot') {
+            entries = message.entries;
+        } else {
+            const replaced = new Set([...message.removed, ...message.changed.map(entry => entry.username)]);
+            entries = entries
+                .filter(entry => !replaced.has(entry.username))
+                .concat(message.changed)
+                .sort((a, b) => a.rank - b.rank);
+        }
+        renderLeaderboard(entries);
+    };
+    leaderboardSocket = socket;
+}
+
+function stopWatchingLeaderboard() {
+    if (leaderboardSocket) {
+        leaderboardSocket.close();
+        leaderboardSocket = null;
+    }
+}
+
 // ========== Game Logic ==========
 
 /**
@@ -504,6 +638,14 @@ function initGame() {
     gameTime = 0;
     gameStarted = false;
     
+    // New seed for this run; obstacles are cleared so food placement
+    // draws from the PRNG exactly as the server replays it
+    replaySeed = crypto.getRandomValues(new Uint32Array(1))[0];
+    random = mulberry32(replaySeed);
+    replayMoves = [];
+    tickCount = 0;
+    obstacles = [];
+    
     // Store adjusted obstacles count
     window.adjustedObstaclesCount = adjustedObstaclesCount;
     
@@ -543,8 +685,8 @@ function generateFood() {
     
     while (!validPosition) {
         food = {
-            x: Math.floor(Math.random() * gridCols),
-            y: Math.floor(Math.random() * gridRows)
+            x: Math.floor(random() * gridCols),
+            y: Math.floor(random() * gridRows)
         };
         
         validPosition = !isPositionOccupied(food.x, food.y);
@@ -586,8 +728,8 @@ function generateObstacles() {
         
         while (!validPosition) {
             obstacle = {
-                x: Math.floor(Math.random() * gridCols),
-                y: Math.floor(Math.random() * gridRows)
+                x: Math.floor(random() * gridCols),
+                y: Math.floor(random() * gridRows)
             };
             
             validPosition = !isPositionOccupied(obstacle.x, obstacle.y) &&
@@ -624,6 +766,7 @@ function startGame() {
 function gameLoop() {
     if (isPaused) return;
     
+    tickCount++;
     direction = nextDirection;
     
     const head = { ...snake[0] };
@@ -772,21 +915,25 @@ document.addEventListener('keydown', (e) => {
         case 'ArrowUp':
             if (direction !== 'DOWN') {
                 nextDirection = 'UP';
+                recordMove('UP');
             }
             break;
         case 'ArrowDown':
             if (direction !== 'UP') {
                 nextDirection = 'DOWN';
+                recordMove('DOWN');
             }
             break;
         case 'ArrowLeft':
             if (direction !== 'RIGHT') {
                 nextDirection = 'LEFT';
+                recordMove('LEFT');
             }
             break;
         case 'ArrowRight':
             if (direction !== 'LEFT') {
                 nextDirection = 'RIGHT';
+                recordMove('RIGHT');
             }
             break;
         case ' ':
@@ -797,6 +944,13 @@ document.addEventListener('keydown', (e) => {
     }
 });
 
+/**
+ * Record an accepted direction change for the replay
+ */
+function recordMove(newDirection) {
+    replayMoves.push([tickCount, DIRECTION_CODES[newDirection]]);
+}
+
 /**
  * Toggle pause
  */
@@ -833,6 +987,7 @@ async function gameOver(completed) {
     
     try {
         await updateGame(currentGame.id, score, foodEaten, gameTime, completed);
+        await uploadReplay(currentGame.id);
     } catch (error) {
         console.error('Failed to update game:', error);
     }